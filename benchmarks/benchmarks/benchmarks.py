@@ -309,3 +309,16 @@ class DifferentialEquationSuite:
 
 
 DifferentialEquationSuite.track_1var_2par_ode_ess.unit = "Effective samples per second"
+
+
+class ImportSuite:
+    """Time a bare ``import pymc3`` in a fresh interpreter, as paid by every
+    short-lived worker and spawned chain process."""
+
+    repeat = 10
+
+    def timeraw_import_pymc3(self):
+        return "import pymc3"
+
+    def timeraw_import_pymc3_variational(self):
+        return "import pymc3; pymc3.fit"
@@ -19,6 +19,8 @@ import logging
 import multiprocessing as mp
 import platform
 
+from typing import TYPE_CHECKING
+
 _log = logging.getLogger("pymc3")
 
 if not logging.root.handlers:
@@ -38,7 +40,7 @@ def __set_compiler_flags():
 
 __set_compiler_flags()
 
-from pymc3 import gp, ode, sampling
+from pymc3 import checkpoint, compile_cache, sampling
 from pymc3.backends import load_trace, save_trace
 from pymc3.backends.tracetab import *
 from pymc3.blocking import *
@@ -46,7 +48,6 @@ from pymc3.data import *
 from pymc3.distributions import *
 from pymc3.distributions import transforms
 from pymc3.exceptions import *
-from pymc3.glm import *
 from pymc3.math import (
     expand_packed_triangular,
     invlogit,
@@ -57,13 +58,109 @@ from pymc3.math import (
     probit,
 )
 from pymc3.model import *
-from pymc3.model_graph import model_to_graphviz
-from pymc3.plots import *
 from pymc3.sampling import *
 from pymc3.smc import *
 from pymc3.step_methods import *
-from pymc3.tests import test
 from pymc3.theanof import *
 from pymc3.tuning import *
-from pymc3.variational import *
 from pymc3.vartypes import *
+
+# The subpackages below (and the ArviZ, xarray and matplotlib imports they pull
+# in) are only needed by some users, so they are imported on first access to
+# one of their names instead of with ``import pymc3``.
+_LAZY_MODULES = {
+    "gp": "pymc3.gp",
+    "ode": "pymc3.ode",
+    "glm": "pymc3.glm",
+    "plots": "pymc3.plots",
+    "variational": "pymc3.variational",
+    "model_graph": "pymc3.model_graph",
+    "tests": "pymc3.tests",
+    **{name: f"pymc3.glm.{name}" for name in ["families", "linear", "utils"]},
+    **{
+        name: f"pymc3.variational.{name}"
+        for name in [
+            "approximations",
+            "callbacks",
+            "flows",
+            "inference",
+            "operators",
+            "opvi",
+            "stein",
+            "test_functions",
+            "updates",
+        ]
+    },
+}
+_LAZY_ATTRIBUTES = {
+    "GLM": "pymc3.glm",
+    "LinearComponent": "pymc3.glm",
+    "model_to_graphviz": "pymc3.model_graph",
+    "plot_posterior_predictive_glm": "pymc3.plots",
+    "test": "pymc3.tests",
+    **dict.fromkeys(
+        [
+            "ADVI",
+            "ASVGD",
+            "Approximation",
+            "Empirical",
+            "FullRank",
+            "FullRankADVI",
+            "Group",
+            "ImplicitGradient",
+            "Inference",
+            "KLqp",
+            "MeanField",
+            "NFVI",
+            "NormalizingFlow",
+            "SVGD",
+            "Stein",
+            "adadelta",
+            "adagrad",
+            "adagrad_window",
+            "adam",
+            "adamax",
+            "apply_momentum",
+            "apply_nesterov_momentum",
+            "fit",
+            "momentum",
+            "nesterov_momentum",
+            "norm_constraint",
+            "rmsprop",
+            "sample_approx",
+            "sgd",
+            "total_norm_constraint",
+        ],
+        "pymc3.variational",
+    ),
+}
+
+if TYPE_CHECKING:
+    from pymc3 import gp, ode
+    from pymc3.glm import *
+    from pymc3.model_graph import model_to_graphviz
+    from pymc3.plots import *
+    from pymc3.tests import test
+    from pymc3.variational import *
+
+del TYPE_CHECKING
+
+
+def __getattr__(name):
+    from importlib import import_module
+
+    if name in _LAZY_MODULES:
+        value = import_module(_LAZY_MODULES[name])
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(import_module(_LAZY_ATTRIBUTES[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES) | set(_LAZY_ATTRIBUTES))
+
+
+__all__ = [name for name in __dir__() if not name.startswith("_")]
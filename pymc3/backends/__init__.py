@@ -15,6 +15,12 @@
 """Storage backends for traces
 
 The NDArray (pymc3.backends.NDArray) backend holds the entire trace in memory.
+The MemmapTrace (pymc3.backends.MemmapTrace) backend writes the values to
+memory-mapped `.npy` files on disk, so that the trace can be larger than the
+memory. It is used with `pm.sample(..., trace="memmap")`.
+The SummaryTrace (pymc3.backends.SummaryTrace) backend keeps only running
+means, variances, quantile estimates and effective sample sizes, see
+`pm.sample(..., trace="summary")` and `pymc3.backends.summary.summary`.
 
 Selecting values from a backend
 -------------------------------
@@ -60,9 +66,11 @@ Loading a saved backend
 Saved backends can be loaded using `arviz.from_netcdf`
 
 """
+from pymc3.backends.memmap import MemmapTrace
 from pymc3.backends.ndarray import (
     NDArray,
     load_trace,
     point_list_to_multitrace,
     save_trace,
 )
+from pymc3.backends.summary import SummaryTrace
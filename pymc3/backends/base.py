@@ -65,6 +65,10 @@ class BaseTrace(ABC):
         self.vars = vars
         self.varnames = [var.name for var in vars]
         self.fn = model.fastfn(vars)
+        # The values of free variables can be copied from the point
+        # without calling `fn`.
+        free_names = {var.name for var in model.free_RVs}
+        self._record_from_point = all(name in free_names for name in self.varnames)
 
         # Get variable shapes. Most backends will need this
         # information.
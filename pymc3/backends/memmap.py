@@ -0,0 +1,207 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Memory-mapped trace backend
+
+Store sampling values in `.npy` files on disk, one per chain and variable.
+"""
+import os
+import shutil
+import tempfile
+import weakref
+
+from typing import Any, Dict
+from urllib.parse import quote
+
+import numpy as np
+
+from pymc3.backends import base
+from pymc3.backends.ndarray import NDArray
+
+
+class MemmapTrace(NDArray):
+    """Trace object that writes the draws to memory-mapped files.
+
+    The draws are collected in a buffer of ``chunk_size`` draws, which is
+    written to one `.npy` file per variable when it is full. Reading the
+    values with `get_values` returns views of the memory-mapped files, so
+    the trace can be much larger than the available memory. Sampler
+    statistics are kept in memory.
+
+    Parameters
+    ----------
+    name: str, optional
+        The directory for the files of the chain. By default a new
+        temporary directory is created (see `tempfile.mkdtemp` for how to
+        choose its location) and removed when the trace is deleted.
+    model: Model
+        If None, the model is taken from the `with` context.
+    vars: list of variables
+        Sampling values will be stored for these variables. If None,
+        `model.unobserved_RVs` is used.
+    chunk_size: int
+        The number of draws that are written to the files at once.
+    """
+
+    def __init__(self, name=None, model=None, vars=None, test_point=None, chunk_size=100):
+        super().__init__(name, model, vars, test_point)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive.")
+        if name is None:
+            directory = tempfile.mkdtemp(prefix="pymc3-trace-")
+            self._finalizer = weakref.finalize(self, shutil.rmtree, directory, True)
+        else:
+            directory = name
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self._buffer = {}  # type: Dict[str, np.ndarray]
+        self._buffer_start = 0
+
+    def _path(self, varname):
+        return os.path.join(self.directory, "chain-{}-{}.npy".format(self.chain, quote(varname)))
+
+    def _open(self, varname, draws):
+        shape = (draws,) + self.var_shapes[varname]
+        dtype = self.var_dtypes[varname]
+        if draws == 0:
+            # Empty files can not be memory-mapped
+            return np.zeros(shape, dtype=dtype)
+        return np.lib.format.open_memmap(self._path(varname), mode="w+", dtype=dtype, shape=shape)
+
+    # Sampling methods
+
+    def setup(self, draws, chain, sampler_vars=None) -> None:
+        """Perform chain-specific setup.
+
+        Parameters
+        ----------
+        draws: int
+            Expected number of draws
+        chain: int
+            Chain number
+        sampler_vars: list of dicts
+            Names and dtypes of the variables that are
+            exported by the samplers.
+        """
+        base.BaseTrace.setup(self, draws, chain, sampler_vars)
+
+        self.chain = chain
+        if self.samples:  # Copy the chain to larger files if it is already present.
+            self._flush()
+            old_draws = len(self)
+            self.draws = old_draws + draws
+            self.draw_idx = old_draws
+            for varname in self.var_shapes:
+                old_samples = self.samples.pop(varname)
+                if isinstance(old_samples, np.memmap):
+                    tmp_path = self._path(varname) + ".old"
+                    os.replace(self._path(varname), tmp_path)
+                    self.samples[varname] = self._open(varname, self.draws)
+                    self.samples[varname][:old_draws] = old_samples[:old_draws]
+                    del old_samples
+                    os.remove(tmp_path)
+                else:
+                    self.samples[varname] = self._open(varname, self.draws)
+                    self.samples[varname][:old_draws] = old_samples[:old_draws]
+        else:  # Otherwise, create a file for each variable.
+            self.draws = draws
+            self.samples = {varname: self._open(varname, draws) for varname in self.var_shapes}
+
+        self._setup_stats(draws, sampler_vars)
+
+        self._buffer = {
+            varname: np.empty((self.chunk_size,) + shape, dtype=self.var_dtypes[varname])
+            for varname, shape in self.var_shapes.items()
+        }
+        self._buffer_start = self.draw_idx
+
+    def record(self, point, sampler_stats=None) -> None:
+        """Record results of a sampling iteration.
+
+        Parameters
+        ----------
+        point: dict
+            Values mapped to variable names
+        """
+        idx = self.draw_idx - self._buffer_start
+        for varname, value in zip(self.varnames, self._point_values(point)):
+            self._buffer[varname][idx] = value
+        self._record_stats(sampler_stats)
+        self.draw_idx += 1
+        if idx + 1 == self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        """Write the buffered draws to the files."""
+        n_buffered = self.draw_idx - self._buffer_start
+        if n_buffered == 0:
+            return
+        for varname, buffer in self._buffer.items():
+            self.samples[varname][self._buffer_start : self.draw_idx] = buffer[:n_buffered]
+        self._buffer_start = self.draw_idx
+
+    def close(self):
+        self._flush()
+        for values in self.samples.values():
+            if isinstance(values, np.memmap):
+                values.flush()
+        super().close()
+
+    def _add_samples(self, values):
+        super()._add_samples(values)
+        for var in values:
+            # Deterministics added by `compute_deterministics` also go to disk
+            data = self.samples[var.name]
+            self.samples[var.name] = self._open(var.name, len(data))
+            self.samples[var.name][:] = data
+            self._buffer[var.name] = np.empty((self.chunk_size,) + data.shape[1:], data.dtype)
+
+    # Selection methods
+
+    def get_values(self, varname: str, burn=0, thin=1) -> np.ndarray:
+        """Get values from trace.
+
+        The result is a view of the memory-mapped file and is not copied
+        into memory.
+
+        Parameters
+        ----------
+        varname: str
+        burn: int
+        thin: int
+
+        Returns
+        -------
+        A NumPy array
+        """
+        self._flush()
+        return self.samples[varname][burn : len(self) : thin]
+
+    def _slice(self, idx):
+        self._flush()
+        sliced = super()._slice(idx)
+        trace = MemmapTrace(self.directory, self.model, self.vars, chunk_size=self.chunk_size)
+        trace.chain = sliced.chain
+        trace.samples = sliced.samples
+        trace.sampler_vars = sliced.sampler_vars
+        trace._stats = sliced._stats
+        trace.draw_idx = trace._buffer_start = sliced.draw_idx
+        # The slice reads the files of this trace, which must not be removed before it
+        trace._owner = self
+        return trace
+
+    def point(self, idx) -> Dict[str, Any]:
+        self._flush()
+        return super().point(idx)
@@ -253,6 +253,10 @@ class NDArray(base.BaseTrace):
             for varname, shape in self.var_shapes.items():
                 self.samples[varname] = np.zeros((draws,) + shape, dtype=self.var_dtypes[varname])
 
+        self._setup_stats(draws, sampler_vars)
+
+    def _setup_stats(self, draws, sampler_vars):
+        """Allocate (or extend) the arrays for `draws` more sampler statistics."""
         if sampler_vars is None:
             return
 
@@ -267,7 +271,6 @@ class NDArray(base.BaseTrace):
             for data, vars in zip(self._stats, sampler_vars):
                 if vars.keys() != data.keys():
                     raise ValueError("Sampler vars can't change")
-                old_draws = len(self)
                 for varname, dtype in vars.items():
                     old = data[varname]
                     new = np.zeros(draws, dtype=dtype)
@@ -281,9 +284,20 @@ class NDArray(base.BaseTrace):
         point: dict
             Values mapped to variable names
         """
-        for varname, value in zip(self.varnames, self.fn(point)):
+        for varname, value in zip(self.varnames, self._point_values(point)):
             self.samples[varname][self.draw_idx] = value
+        self._record_stats(sampler_stats)
+        self.draw_idx += 1
+
+    def _point_values(self, point):
+        """Return the values of the trace variables at `point`."""
+        if self._record_from_point:
+            return [point[varname] for varname in self.varnames]
+        if self.fn is None:
+            self.fn = self.model.fastfn(self.vars)
+        return self.fn(point)
 
+    def _record_stats(self, sampler_stats):
         if self._stats is not None and sampler_stats is None:
             raise ValueError("Expected sampler_stats")
         if self._stats is None and sampler_stats is not None:
@@ -292,11 +306,32 @@ class NDArray(base.BaseTrace):
             for data, vars in zip(self._stats, sampler_stats):
                 for key, val in vars.items():
                     data[key][self.draw_idx] = val
-        self.draw_idx += 1
 
     def _get_sampler_stats(self, varname, sampler_idx, burn, thin):
         return self._stats[sampler_idx][varname][burn::thin]
 
+    def _add_samples(self, values):
+        """Store the values of variables that were not recorded during sampling.
+
+        Parameters
+        ----------
+        values: dict
+            Maps the new variables to arrays with their value in each draw.
+        """
+        for var, value in values.items():
+            if len(value) != len(self):
+                raise ValueError(f"Expected {len(self)} values for {var.name}, got {len(value)}.")
+        # The list of variables may be shared with other traces
+        self.vars = self.vars + list(values)
+        self.varnames = self.varnames + [var.name for var in values]
+        # Compiled again when the trace is extended
+        self.fn = None
+        self._record_from_point = False
+        for var, value in values.items():
+            self.var_shapes[var.name] = value.shape[1:]
+            self.var_dtypes[var.name] = value.dtype
+            self.samples[var.name] = value
+
     def close(self):
         if self.draw_idx == self.draws:
             return
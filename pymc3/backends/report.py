@@ -16,12 +16,13 @@ import dataclasses
 import enum
 import logging
 
-from typing import Any, Optional
-
-import arviz
+from typing import TYPE_CHECKING, Any, Optional
 
 from pymc3.util import get_untransformed_name, is_transformed_name
 
+if TYPE_CHECKING:
+    import arviz
+
 logger = logging.getLogger("pymc3")
 
 
@@ -108,7 +109,7 @@ class SamplerReport:
         if errors:
             raise ValueError("Serious convergence issues during sampling.")
 
-    def _run_convergence_checks(self, idata: arviz.InferenceData, model):
+    def _run_convergence_checks(self, idata: "arviz.InferenceData", model):
         if not hasattr(idata, "posterior"):
             msg = "No posterior samples. Unable to run convergence checks"
             warn = SamplerWarning(WarningType.BAD_PARAMS, msg, "info", None, None, None)
@@ -124,6 +125,38 @@ class SamplerReport:
             self._add_warnings([warn])
             return
 
+        import arviz
+
+        varnames = self._convergence_varnames(model, idata.posterior)
+        self._ess = ess = arviz.ess(idata, var_names=varnames)
+        self._rhat = rhat = arviz.rhat(idata, var_names=varnames)
+
+        sizes = idata.posterior.sizes
+        self._add_convergence_warnings(ess, rhat, sizes["chain"] * sizes["draw"])
+
+    def _run_summary_convergence_checks(self, trace, model):
+        """Run the convergence checks on a trace with `SummaryTrace` backends."""
+        from pymc3.backends import summary
+
+        if trace.nchains == 1:
+            msg = (
+                "Only one chain was sampled, this makes it impossible to "
+                "run some convergence checks"
+            )
+            warn = SamplerWarning(WarningType.BAD_PARAMS, msg, "info")
+            self._add_warnings([warn])
+            return
+
+        varnames = self._convergence_varnames(model, trace.varnames)
+        if not varnames:
+            return
+        self._ess = ess = {name: summary.ess(trace, name) for name in varnames}
+        self._rhat = rhat = {name: summary.rhat(trace, name) for name in varnames}
+        n_samples = sum(strace.summaries[varnames[0]].count for strace in trace._straces.values())
+        self._add_convergence_warnings(ess, rhat, n_samples)
+
+    @staticmethod
+    def _convergence_varnames(model, names):
         valid_name = [rv.name for rv in model.free_RVs + model.deterministics]
         varnames = []
         for rv in model.free_RVs:
@@ -131,12 +164,11 @@ class SamplerReport:
             if is_transformed_name(rv_name):
                 rv_name2 = get_untransformed_name(rv_name)
                 rv_name = rv_name2 if rv_name2 in valid_name else rv_name
-            if rv_name in idata.posterior:
+            if rv_name in names:
                 varnames.append(rv_name)
+        return varnames
 
-        self._ess = ess = arviz.ess(idata, var_names=varnames)
-        self._rhat = rhat = arviz.rhat(idata, var_names=varnames)
-
+    def _add_convergence_warnings(self, ess, rhat, n_samples):
         warnings = []
         rhat_max = max(val.max() for val in rhat.values())
         if rhat_max > 1.4:
@@ -160,8 +192,6 @@ class SamplerReport:
             warnings.append(warn)
 
         eff_min = min(val.min() for val in ess.values())
-        sizes = idata.posterior.sizes
-        n_samples = sizes["chain"] * sizes["draw"]
         if eff_min < 200 and n_samples >= 500:
             msg = (
                 "The estimated number of effective samples is smaller than "
@@ -0,0 +1,464 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Online summary trace backend
+
+Keep running summaries of the sampling values instead of the values
+themselves. The memory does not grow with the number of draws.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from pymc3.backends import base
+from pymc3.backends.base import BackendError
+
+__all__ = ["SummaryTrace", "OnlineStats", "summary", "ess", "rhat", "split_rhat"]
+
+DEFAULT_QUANTILES = (0.025, 0.25, 0.5, 0.75, 0.975)
+
+
+def _merge_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """Combine the counts, means and sums of squared deviations of two samples."""
+    count = count_a + count_b
+    if count == 0:
+        return 0, mean_a, m2_a
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / count)
+    m2 = m2_a + m2_b + delta ** 2 * (count_a * count_b / count)
+    return count, mean, m2
+
+
+class _QuantileSketch:
+    """P² estimates of several quantiles of each element of a vector.
+
+    Uses five markers per quantile and element, see Jain and Chlamtac (1985),
+    The P² algorithm for dynamic calculation of quantiles and histograms
+    without storing observations.
+    """
+
+    def __init__(self, quantiles, size):
+        p = np.asarray(quantiles, dtype=float)[:, None]
+        self.quantiles = tuple(quantiles)
+        self._increments = np.hstack([np.zeros_like(p), p / 2, p, (1 + p) / 2, np.ones_like(p)])
+        # Marker heights and positions, shape (n_quantiles, 5, size)
+        self._heights = np.zeros((len(p), 5, size))
+        self._positions = np.tile(np.arange(1.0, 6.0)[None, :, None], (len(p), 1, size))
+        self._first = []
+        self.count = 0
+
+    def update(self, x):
+        self.count += 1
+        if self.count <= 5:
+            self._first.append(x)
+            if self.count == 5:
+                self._heights[:] = np.sort(self._first, axis=0)[None]
+                self._first = []
+            return
+
+        q, n = self._heights, self._positions
+        np.minimum(q[:, 0], x, out=q[:, 0])
+        np.maximum(q[:, 4], x, out=q[:, 4])
+        # The cell of x, between 0 and 3
+        k = (x >= q[:, 1]).astype(int) + (x >= q[:, 2]) + (x >= q[:, 3])
+        n[:, 1:] += np.arange(1, 5)[None, :, None] > k[:, None, :]
+        desired = 1 + (self.count - 1) * self._increments[:, :, None]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i in range(1, 4):
+                d = desired[:, i] - n[:, i]
+                move = ((d >= 1) & (n[:, i + 1] - n[:, i] > 1)) | (
+                    (d <= -1) & (n[:, i - 1] - n[:, i] < -1)
+                )
+                if not move.any():
+                    continue
+                d = np.sign(d)
+                parabolic = q[:, i] + d / (n[:, i + 1] - n[:, i - 1]) * (
+                    (n[:, i] - n[:, i - 1] + d) * (q[:, i + 1] - q[:, i]) / (n[:, i + 1] - n[:, i])
+                    + (n[:, i + 1] - n[:, i] - d)
+                    * (q[:, i] - q[:, i - 1])
+                    / (n[:, i] - n[:, i - 1])
+                )
+                neighbor = np.where(d > 0, i + 1, i - 1)
+                q_neighbor = np.take_along_axis(q, neighbor[:, None], axis=1)[:, 0]
+                n_neighbor = np.take_along_axis(n, neighbor[:, None], axis=1)[:, 0]
+                linear = q[:, i] + d * (q_neighbor - q[:, i]) / (n_neighbor - n[:, i])
+                ok = (q[:, i - 1] < parabolic) & (parabolic < q[:, i + 1])
+                new = np.where(ok, parabolic, linear)
+                q[:, i] = np.where(move, new, q[:, i])
+                n[:, i] = np.where(move, n[:, i] + d, n[:, i])
+
+    def quantile(self, p):
+        idx = self.quantiles.index(p)
+        if self.count == 0:
+            return np.full(self._heights.shape[-1], np.nan)
+        if self.count < 5:
+            return np.quantile(self._first, p, axis=0)
+        return self._heights[idx, 2].copy()
+
+
+class OnlineStats:
+    """Running summaries of an array-valued quantity.
+
+    Keeps the mean and variance (Welford's algorithm), the means of up to
+    ``2 * n_batches`` consecutive batches of draws and P² quantile
+    estimates. Whenever all batches are full, neighboring batches are
+    merged and the batch size doubles, so the memory does not depend on
+    the number of draws.
+
+    Parameters
+    ----------
+    shape: tuple
+        The shape of the quantity.
+    quantiles: tuple of float
+        The quantiles to estimate.
+    n_batches: int
+        The minimal number of batches for the batch means.
+    """
+
+    def __init__(self, shape, quantiles=DEFAULT_QUANTILES, n_batches=32):
+        self.shape = tuple(shape)
+        size = int(np.prod(self.shape, dtype=int))
+        self.count = 0
+        self._mean = np.zeros(size)
+        self._m2 = np.zeros(size)
+
+        self.batch_size = 1
+        self._max_batches = 2 * n_batches
+        self._n_batches = 0
+        self._batch_means = np.zeros((self._max_batches, size))
+        self._batch_m2 = np.zeros((self._max_batches, size))
+        self._current = [0, np.zeros(size), np.zeros(size)]
+
+        self._sketch = _QuantileSketch(quantiles, size)
+
+    def update(self, value):
+        x = np.asarray(value, dtype=float).ravel()
+        self.count += 1
+        delta = x - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (x - self._mean)
+
+        count, mean, m2 = self._current
+        count += 1
+        delta = x - mean
+        mean = mean + delta / count
+        m2 = m2 + delta * (x - mean)
+        self._current = [count, mean, m2]
+        if count == self.batch_size:
+            self._push_batch()
+
+        self._sketch.update(x)
+
+    def _push_batch(self):
+        _, mean, m2 = self._current
+        self._batch_means[self._n_batches] = mean
+        self._batch_m2[self._n_batches] = m2
+        self._n_batches += 1
+        self._current = [0, np.zeros_like(mean), np.zeros_like(mean)]
+        if self._n_batches < self._max_batches:
+            return
+        # Merge neighboring batches of equal size
+        half = self._max_batches // 2
+        n = self.batch_size
+        means_a, means_b = self._batch_means[0::2], self._batch_means[1::2]
+        m2_a, m2_b = self._batch_m2[0::2], self._batch_m2[1::2]
+        _, means, m2s = _merge_moments(n, means_a, m2_a, n, means_b, m2_b)
+        self._batch_means[:half] = means
+        self._batch_m2[:half] = m2s
+        self._n_batches = half
+        self.batch_size *= 2
+
+    def _reshape(self, value):
+        return value.reshape(self.shape)
+
+    @property
+    def mean(self):
+        return self._reshape(self._mean.copy())
+
+    @property
+    def var(self):
+        if self.count < 2:
+            return self._reshape(np.full_like(self._mean, np.nan))
+        return self._reshape(self._m2 / (self.count - 1))
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    def quantile(self, q):
+        """Return the estimated quantile `q`, which must be one of `quantiles`."""
+        if q not in self._sketch.quantiles:
+            raise ValueError(f"Quantile {q} is not tracked, use one of {self._sketch.quantiles}")
+        return self._reshape(self._sketch.quantile(q))
+
+    @property
+    def quantiles(self):
+        return self._sketch.quantiles
+
+    @property
+    def ess(self):
+        """Effective sample size from the variance of the batch means."""
+        n_batches = self._n_batches
+        if n_batches < 2:
+            return self._reshape(np.full_like(self._mean, np.nan))
+        batch_var = self._batch_means[:n_batches].var(axis=0, ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ess = self.count * self._m2 / (self.count - 1) / (self.batch_size * batch_var)
+        return self._reshape(ess)
+
+    def halves(self):
+        """Return the count, mean and variance of the first and second half of the draws."""
+        n_first = self._n_batches // 2
+        result = []
+        batches = [range(n_first), range(n_first, self._n_batches)]
+        for i, idxs in enumerate(batches):
+            count, mean, m2 = 0, np.zeros_like(self._mean), np.zeros_like(self._mean)
+            for idx in idxs:
+                count, mean, m2 = _merge_moments(
+                    count, mean, m2, self.batch_size, self._batch_means[idx], self._batch_m2[idx]
+                )
+            if i == 1:
+                count, mean, m2 = _merge_moments(count, mean, m2, *self._current)
+            result.append((count, mean, m2))
+        return result
+
+
+class SummaryTrace(base.BaseTrace):
+    """Trace object that keeps running summaries instead of the draws.
+
+    For every variable and sampler statistic, the trace keeps the mean,
+    variance, batch means for the effective sample size and P² estimates
+    of ``quantiles`` (see `OnlineStats`). The memory is proportional to
+    the size of the variables, not to the number of draws.
+
+    Tuning draws are counted in `n_tune` and in the length of the trace,
+    but are not part of the summaries. They are the draws with a true
+    ``tune`` sampler statistic or, if the samplers do not report it, the
+    first ``tune`` draws. The draws themselves can not be
+    accessed, use `summary`, `ess` and `rhat` or the `summaries` and
+    `stat_summaries` attributes instead.
+
+    Parameters
+    ----------
+    name: str
+        Name of backend. This has no meaning for the SummaryTrace backend.
+    model: Model
+        If None, the model is taken from the `with` context.
+    vars: list of variables
+        Summaries will be computed for these variables. If None,
+        `model.unobserved_RVs` is used.
+    quantiles: tuple of float
+        The quantiles to estimate.
+    n_batches: int
+        The minimal number of batches for the batch means estimate of the
+        effective sample size.
+    tune: int
+        The number of tuning draws at the start of the chain, for samplers
+        without a ``tune`` statistic.
+    """
+
+    supports_sampler_stats = True
+
+    def __init__(
+        self,
+        name=None,
+        model=None,
+        vars=None,
+        test_point=None,
+        quantiles=DEFAULT_QUANTILES,
+        n_batches=32,
+        tune=0,
+    ):
+        super().__init__(name, model, vars, test_point)
+        self.quantiles = tuple(quantiles)
+        self.n_batches = n_batches
+        self.tune = tune
+        self.summaries = {}  # type: Dict[str, OnlineStats]
+        self.stat_summaries = None  # type: List[Dict[str, OnlineStats]]
+        self.n_tune = 0
+        self.draws = 0
+
+    def _new_stats(self, shape):
+        return OnlineStats(shape, self.quantiles, self.n_batches)
+
+    def setup(self, draws, chain, sampler_vars=None) -> None:
+        super().setup(draws, chain, sampler_vars)
+        self.chain = chain
+        self.draws += draws
+        if not self.summaries:
+            self.summaries = {
+                varname: self._new_stats(shape) for varname, shape in self.var_shapes.items()
+            }
+        if sampler_vars is not None and self.stat_summaries is None:
+            self.stat_summaries = [
+                {
+                    name: self._new_stats(())
+                    for name, dtype in stats.items()
+                    if np.dtype(dtype).kind in "biuf"
+                }
+                for stats in sampler_vars
+            ]
+
+    def record(self, point, sampler_stats=None) -> None:
+        """Update the summaries with the results of a sampling iteration.
+
+        Parameters
+        ----------
+        point: dict
+            Values mapped to variable names
+        sampler_stats: list of dicts
+            The diagnostic values for each sampler
+        """
+        if self.stat_summaries is not None and sampler_stats is None:
+            raise ValueError("Expected sampler_stats")
+        if self.stat_summaries is None and sampler_stats is not None:
+            raise ValueError("Unknown sampler_stats")
+        if sampler_stats is not None and any("tune" in stats for stats in sampler_stats):
+            tuning = any(stats.get("tune", False) for stats in sampler_stats)
+        else:
+            tuning = len(self) < self.tune
+        if tuning:
+            self.n_tune += 1
+            return
+
+        if self._record_from_point:
+            values = [point[varname] for varname in self.varnames]
+        else:
+            values = self.fn(point)
+        for varname, value in zip(self.varnames, values):
+            self.summaries[varname].update(value)
+        if sampler_stats is not None:
+            for summaries, stats in zip(self.stat_summaries, sampler_stats):
+                for key, summary in summaries.items():
+                    summary.update(stats[key])
+
+    def close(self):
+        pass
+
+    def __len__(self):
+        # Includes the tuning draws, like other backends
+        if not self.summaries:
+            return self.n_tune
+        return self.n_tune + next(iter(self.summaries.values())).count
+
+    def _no_draws(self, *args, **kwargs):
+        raise BackendError("The SummaryTrace backend does not store the draws.")
+
+    get_values = _no_draws
+    _get_sampler_stats = _no_draws
+    point = _no_draws
+
+    def _slice(self, idx):
+        if idx == slice(None) or idx.indices(len(self)) == (0, len(self), 1):
+            return self
+        self._no_draws()
+
+
+def _chain_summaries(trace, varname):
+    if varname in trace.varnames:
+        return [strace.summaries[varname] for strace in trace._straces.values()]
+    summaries = []
+    for strace in trace._straces.values():
+        for stats in strace.stat_summaries or []:
+            if varname in stats:
+                summaries.append(stats[varname])
+                break
+        else:
+            raise KeyError("Unknown variable or sampler statistic %s" % varname)
+    return summaries
+
+
+def ess(trace, varname):
+    """Effective sample size of a variable or sampler statistic of a `SummaryTrace`.
+
+    Sum of the batch means estimates of the chains.
+    """
+    return sum(stats.ess for stats in _chain_summaries(trace, varname))
+
+
+def rhat(trace, varname):
+    """Split R-hat of a variable or sampler statistic of a `SummaryTrace`.
+
+    The potential scale reduction factor of Gelman et al. (2013), with
+    every chain split into two halves. The draws are not rank normalized
+    as in ``arviz.rhat``.
+    """
+    return split_rhat(_chain_summaries(trace, varname))
+
+
+def split_rhat(chains):
+    """Split R-hat from the `OnlineStats` of the chains of a quantity."""
+    counts, means, variances = [], [], []
+    for stats in chains:
+        for count, mean, m2 in stats.halves():
+            if count < 2:
+                continue
+            counts.append(count)
+            means.append(mean)
+            variances.append(m2 / (count - 1))
+        shape = stats.shape
+    if len(counts) < 2:
+        return np.full(shape, np.nan)
+    n = np.mean(counts)
+    within = np.mean(variances, axis=0)
+    between_n = np.var(means, axis=0, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_hat = (n - 1) / n * within + between_n
+        return np.sqrt(var_hat / within).reshape(shape)
+
+
+def summary(trace, var_names=None):
+    """Summarize the variables of a trace with `SummaryTrace` backends.
+
+    Parameters
+    ----------
+    trace: MultiTrace
+    var_names: list of str, optional
+        The variables and sampler statistics to summarize. Defaults to all
+        variables of the trace.
+
+    Returns
+    -------
+    A `pandas.DataFrame` with the mean, standard deviation, quantiles,
+    effective sample size and R-hat of each element of the variables.
+    """
+    import pandas as pd
+
+    if var_names is None:
+        var_names = trace.varnames
+    rows = []
+    index = []
+    for varname in var_names:
+        chains = _chain_summaries(trace, varname)
+        count, mean, m2 = 0, 0.0, 0.0
+        for stats in chains:
+            count, mean, m2 = _merge_moments(
+                count, mean, m2, stats.count, stats.mean, stats.var * (stats.count - 1)
+            )
+        columns = {
+            "mean": mean,
+            "sd": np.sqrt(m2 / (count - 1)) if count > 1 else np.full(chains[0].shape, np.nan),
+        }
+        for q in chains[0].quantiles:
+            # Chains are weighted equally
+            columns["q%g" % (100 * q)] = np.mean([stats.quantile(q) for stats in chains], axis=0)
+        columns["ess"] = ess(trace, varname)
+        columns["r_hat"] = rhat(trace, varname)
+
+        shape = chains[0].shape
+        for idx in np.ndindex(*shape):
+            index.append(varname + ("[%s]" % ", ".join(map(str, idx)) if idx else ""))
+            rows.append({key: np.asarray(value)[idx] for key, value in columns.items()})
+    return pd.DataFrame(rows, index=index)
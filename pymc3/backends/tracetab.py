@@ -18,7 +18,6 @@
 import warnings
 
 import numpy as np
-import pandas as pd
 
 from pymc3.util import get_default_varnames
 
@@ -41,6 +40,8 @@ def trace_to_dataframe(trace, chains=None, varnames=None, include_transformed=Fa
         If true transformed variables will be included in the resulting
         DataFrame.
     """
+    import pandas as pd
+
     warnings.warn(
         "The `trace_to_dataframe` function will soon be removed. "
         "Please use ArviZ to save traces. "
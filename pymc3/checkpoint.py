@@ -0,0 +1,261 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Checkpoints of sampling runs.
+
+With ``pm.sample(..., checkpoint=directory)`` the state of every chain is
+written to ``directory`` every ``checkpoint_every`` draws. A checkpoint
+contains the draws of the chain so far, its current point, the pickled
+step method with all its tuning state (for example the accumulators of
+the adaptive mass matrix and the dual averaging state of the step size)
+and the state of the numpy random number generator. Calling ``pm.sample``
+again with the same arguments continues every chain from its latest
+checkpoint, and gives the same draws as a run without interruption::
+
+    with model:
+        trace = pm.sample(10000, random_seed=42, checkpoint="checkpoints")
+
+The draws of an interrupted run can be loaded with `load_trace`.
+"""
+
+import os
+import pickle
+import tempfile
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from pymc3.backends.base import MultiTrace
+from pymc3.backends.ndarray import NDArray
+from pymc3.model import modelcontext
+
+__all__ = ["Checkpointer", "load_trace"]
+
+_FORMAT_VERSION = 1
+
+
+def dump_step(step_method, pickle_backend="pickle") -> bytes:
+    """Pickle a step method with `pickle` or `dill`."""
+    if pickle_backend == "pickle":
+        return pickle.dumps(step_method, protocol=pickle.HIGHEST_PROTOCOL)
+    elif pickle_backend == "dill":
+        try:
+            import dill
+        except ImportError:
+            raise ValueError("dill must be installed for pickle_backend='dill'.")
+        return dill.dumps(step_method, protocol=pickle.HIGHEST_PROTOCOL)
+    raise ValueError("Unknown pickle backend %s" % pickle_backend)
+
+
+def load_step(data: bytes, pickle_backend="pickle"):
+    """Unpickle a step method that was pickled with `dump_step`."""
+    if pickle_backend == "dill":
+        import dill
+
+        return dill.loads(data)
+    return pickle.loads(data)
+
+
+def chain_state(step_method, point, draw, pickle_backend="pickle") -> Dict[str, Any]:
+    """Capture the state of a chain in this process after ``draw`` draws."""
+    return {
+        "draw": draw,
+        "point": {name: np.array(value) for name, value in point.items()},
+        "step": dump_step(step_method, pickle_backend),
+        "rng": np.random.get_state(),
+    }
+
+
+class Checkpointer:
+    """Write and read the checkpoints of the chains of a sampling run.
+
+    Parameters
+    ----------
+    directory: str
+        The directory of the checkpoint files, one per chain. It is
+        created if it does not exist.
+    every: int
+        The number of draws between two checkpoints of a chain.
+    pickle_backend: str
+        One of `'pickle'` or `'dill'`. The library used to pickle the step
+        methods.
+    """
+
+    def __init__(self, directory, every=100, pickle_backend="pickle"):
+        if every < 1:
+            raise ValueError("checkpoint_every must be positive.")
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        os.makedirs(self.directory, exist_ok=True)
+        self.every = every
+        self.pickle_backend = pickle_backend
+
+    def _path(self, chain):
+        return os.path.join(self.directory, "chain-%d.pkl" % chain)
+
+    def is_due(self, draw, draws):
+        """Whether a checkpoint is written after ``draw`` of ``draws`` draws."""
+        return draw % self.every == 0 and 0 < draw < draws
+
+    def state(self, step_method, point, draw):
+        """Capture the state of a chain that is sampled in this process."""
+        return chain_state(step_method, point, draw, self.pickle_backend)
+
+    def save(self, chain, strace, state, draws, tune, complete=False):
+        """Write the checkpoint of a chain.
+
+        Parameters
+        ----------
+        chain: int
+            Chain number
+        strace: NDArray
+            The trace of the chain. Its first ``state["draw"]`` draws are saved.
+        state: dict
+            The state of the chain, see `state`.
+        draws: int
+            The total number of draws of the chain, including tuning.
+        tune: int
+            The number of tuning draws.
+        complete: bool
+            Whether the chain is finished.
+        """
+        n = state["draw"]
+        if len(strace) < n:
+            raise ValueError(f"The trace of chain {chain} has less than {n} draws.")
+        data = dict(state)
+        data.update(
+            version=_FORMAT_VERSION,
+            chain=chain,
+            draws=draws,
+            tune=tune,
+            complete=complete,
+            pickle_backend=self.pickle_backend,
+            values={name: strace.get_values(name)[:n].copy() for name in strace.varnames},
+            stats=_trace_stats(strace, n),
+            warnings=list(strace._warnings) if complete else [],
+        )
+
+        # Write to a temporary file first, so that an interruption never
+        # leaves a broken checkpoint behind.
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(chain))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, chain, draws=None, tune=None) -> Optional[Dict[str, Any]]:
+        """Read the checkpoint of a chain, or None if there is none.
+
+        Raises a ValueError if the checkpoint is for a different number of
+        ``draws`` or ``tune`` draws.
+        """
+        path = self._path(chain)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("version") != _FORMAT_VERSION:
+            raise ValueError("Unknown checkpoint format in %s." % path)
+        if (draws is not None and data["draws"] != draws) or (
+            tune is not None and data["tune"] != tune
+        ):
+            raise ValueError(
+                "The checkpoint %s is for %s draws with %s tuning draws, but %s and %s were requested."
+                % (path, data["draws"], data["tune"], draws, tune)
+            )
+        return data
+
+    def load_step(self, data):
+        """Unpickle the step method of a checkpoint, or None if it has none."""
+        if data.get("step") is None:
+            return None
+        return load_step(data["step"], data["pickle_backend"])
+
+
+def _trace_stats(strace, n):
+    if strace.sampler_vars is None:
+        return None
+    return [
+        {name: strace._get_sampler_stats(name, i, 0, 1)[:n].copy() for name in stats}
+        for i, stats in enumerate(strace.sampler_vars)
+    ]
+
+
+def check_backend(strace):
+    """Raise a ValueError if the draws of a trace can not be checkpointed."""
+    if not isinstance(strace, NDArray):
+        raise ValueError(
+            "Checkpoints need a trace backend that stores the draws, like 'ndarray' or "
+            "'memmap', not %s." % type(strace).__name__
+        )
+
+
+def restore_trace(strace, data):
+    """Record the draws of a checkpoint in a trace after its `setup`."""
+    record_from_point = strace._record_from_point
+    # The checkpoint has the values of all trace variables
+    strace._record_from_point = True
+    try:
+        for i in range(data["draw"]):
+            point = {name: values[i] for name, values in data["values"].items()}
+            if data["stats"] is None:
+                strace.record(point)
+            else:
+                strace.record(point, [{k: v[i] for k, v in s.items()} for s in data["stats"]])
+    finally:
+        strace._record_from_point = record_from_point
+    if data["complete"]:
+        strace.close()
+        strace._add_warnings(data["warnings"])
+
+
+def load_trace(directory, model=None) -> MultiTrace:
+    """Load the draws of all chains in the checkpoints of ``directory``.
+
+    Parameters
+    ----------
+    directory: str
+        The ``checkpoint`` directory of a sampling run.
+    model: Model (optional if in ``with`` context)
+
+    Returns
+    -------
+    A `MultiTrace` with the draws, including the tuning draws, that every
+    chain made up to its latest checkpoint.
+    """
+    model = modelcontext(model)
+    checkpointer = Checkpointer(directory)
+    chains = sorted(
+        int(name[len("chain-") : -len(".pkl")])
+        for name in os.listdir(checkpointer.directory)
+        if name.startswith("chain-") and name.endswith(".pkl")
+    )
+    if not chains:
+        raise ValueError("No checkpoints in %s." % directory)
+    straces = []
+    for chain in chains:
+        data = checkpointer.load(chain)
+        vars = [model[name] for name in data["values"]]
+        strace = NDArray(model=model, vars=vars)
+        sampler_vars = None
+        if data["stats"] is not None:
+            sampler_vars = [{k: v.dtype for k, v in s.items()} for s in data["stats"]]
+        strace.setup(data["draw"], chain, sampler_vars)
+        restore_trace(strace, dict(data, complete=True))
+        straces.append(strace)
+    return MultiTrace(straces)
@@ -0,0 +1,563 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Persistent on-disk cache for compiled theano functions.
+
+Optimizing the graph of a large model takes much longer than evaluating
+it, and it has to be done again in every new python process. If the
+cache is enabled, the compiled functions of the model (its logp and
+gradient, ``Model.fn`` and the functions of ``draw_values``) are stored
+in a directory, keyed by a fingerprint of their graph, and loaded from
+there whenever the same graph is compiled again::
+
+    import pymc3 as pm
+
+    pm.compile_cache.enable("~/.cache/pymc3-functions")
+
+The cache can also be enabled by setting the environment variable
+``PYMC3_COMPILE_CACHE_DIR`` before pymc3 is imported.
+
+The fingerprint contains the structure of the graph, the values of its
+constants, the types (but not the values) of its shared variables, the
+compilation arguments and the relevant theano flags and versions. A
+cached function is linked to the shared variables of the graph it is
+loaded for, so changing e.g. the value of a ``pm.Data`` container does
+not invalidate the cache entry.
+"""
+
+import collections
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import types
+import weakref
+
+import numpy as np
+import theano
+
+from theano.compile import SharedVariable
+from theano.graph.basic import Constant, Variable
+from theano.graph.op import Op
+from theano.graph.type import Type
+
+__all__ = ["CompileCache", "FunctionLRU", "enable", "disable", "get_cache", "function"]
+
+_log = logging.getLogger("pymc3")
+
+# Theano flags that change the compiled function for the same graph
+_CONFIG_FLAGS = [
+    "floatX",
+    "mode",
+    "linker",
+    "optimizer",
+    "optimizer_excluding",
+    "optimizer_including",
+    "optimizer_requiring",
+    "device",
+    "cxx",
+    "cast_policy",
+    "allow_gc",
+    "blas__ldflags",
+    "gcc__cxxflags",
+    "tensor__cmp_sloppy",
+    "scan__allow_gc",
+]
+
+# Arguments of `theano.function` that can be part of a fingerprint
+_KEY_KWARGS = {
+    "mode",
+    "name",
+    "rebuild_strict",
+    "allow_input_downcast",
+    "on_unused_input",
+    "accept_inplace",
+}
+
+_SUFFIX = ".pkl"
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _qualname(obj):
+    name = f"{obj.__module__}.{obj.__qualname__}"
+    if "<" in name:
+        # Lambdas and local functions can not be identified by their name
+        raise _Uncacheable(name)
+    return name
+
+
+def _array_digest(value):
+    value = np.asarray(value)
+    if value.dtype.hasobject:
+        raise _Uncacheable("object array")
+    digest = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+    return f"array({value.dtype.str},{value.shape},{digest})"
+
+
+def _describe(value):
+    """Return a string that identifies an op parameter or type across processes."""
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return repr(value)
+    if isinstance(value, (np.dtype, np.generic)):
+        return repr(value)
+    if isinstance(value, np.ndarray):
+        return _array_digest(value)
+    if isinstance(value, (list, tuple)):
+        return "{}({})".format(type(value).__name__, ",".join(map(_describe, value)))
+    if isinstance(value, slice):
+        return "slice({})".format(_describe((value.start, value.stop, value.step)))
+    if isinstance(value, (set, frozenset)):
+        return "set({})".format(",".join(sorted(map(_describe, value))))
+    if isinstance(value, dict):
+        items = sorted("{}:{}".format(_describe(k), _describe(v)) for k, v in value.items())
+        return "dict({})".format(",".join(items))
+    if isinstance(value, (type, types.FunctionType, types.BuiltinFunctionType)):
+        return _qualname(value)
+    props = getattr(type(value), "__props__", None)
+    if props is not None:
+        params = ",".join(_describe(getattr(value, prop)) for prop in props)
+        return "{}{{{}}}".format(_qualname(type(value)), params)
+    if isinstance(value, (Op, Type)) or type(value).__module__.startswith("theano."):
+        # Objects without __props__ are described by their attributes
+        params = _describe({k: v for k, v in vars(value).items() if not k.startswith("_")})
+        return "{}{}".format(_qualname(type(value)), params)
+    raise _Uncacheable(type(value))
+
+
+def _fingerprint(inputs, outputs, givens, kwargs):
+    """Compute the cache key of a call to `theano.function`.
+
+    Returns the key and the shared variables of the graph, in the order
+    in which they appear in the fingerprint.
+    """
+    lines = [
+        "python {}".format(sys.version_info[:3]),
+        f"numpy {np.__version__}",
+        f"theano {theano.__version__}",
+    ]
+    for flag in _CONFIG_FLAGS:
+        lines.append("{}={}".format(flag, getattr(theano.config, flag, None)))
+    for name in sorted(kwargs):
+        lines.append("{}={}".format(name, _describe(kwargs[name])))
+
+    if givens is None:
+        givens = []
+    elif isinstance(givens, dict):
+        givens = list(givens.items())
+    replace = {var: new for var, new in givens}
+
+    tokens = {}
+    shared = []
+    for i, var in enumerate(inputs):
+        tokens[var] = f"i{i}"
+        lines.append("input {} {}".format(i, _describe(var.type)))
+
+    # Iterative post-order traversal, the graphs can be deeper
+    # than the recursion limit.
+    n_nodes = 0
+    stack = [(var, False) for var in reversed(outputs)]
+    while stack:
+        var, expanded = stack.pop()
+        while var in replace and var not in tokens:
+            var = replace[var]
+        if var in tokens:
+            continue
+        if isinstance(var, SharedVariable):
+            tokens[var] = "s{}".format(len(shared))
+            lines.append("shared {}".format(_describe(var.type)))
+            shared.append(var)
+        elif isinstance(var, Constant):
+            tokens[var] = "c{}".format(len(tokens))
+            lines.append("constant {} {}".format(_describe(var.type), _describe(var.data)))
+        elif var.owner is None:
+            raise _Uncacheable("missing input")
+        elif not expanded:
+            stack.append((var, True))
+            stack.extend((inp, False) for inp in reversed(var.owner.inputs))
+        else:
+            node = var.owner
+            node_inputs = []
+            for inp in node.inputs:
+                while inp in replace and inp not in tokens:
+                    inp = replace[inp]
+                node_inputs.append(tokens[inp])
+            for j, out in enumerate(node.outputs):
+                tokens[out] = f"n{n_nodes}.{j}"
+            lines.append(
+                "node {} {} -> {}".format(
+                    _describe(node.op),
+                    " ".join(node_inputs),
+                    " ".join(_describe(out.type) for out in node.outputs),
+                )
+            )
+            n_nodes += 1
+
+    lines.append("outputs {}".format(" ".join(tokens[replace.get(out, out)] for out in outputs)))
+    key = hashlib.sha256("\n".join(lines).encode()).hexdigest()
+    return key, shared
+
+
+def _shared_indices(fn, shared):
+    """Find the positions of the shared inputs of ``fn`` in ``shared``.
+
+    Returns None if some shared inputs do not appear in the fingerprint.
+    """
+    storage = {id(var.container.storage): i for i, var in enumerate(shared)}
+    shared_idxs = [storage.get(id(container.storage)) for container in fn.input_storage]
+    implicit = [inp.implicit for inp in fn.maker.inputs]
+    if any(is_implicit != (i is not None) for is_implicit, i in zip(implicit, shared_idxs)):
+        return None
+    return shared_idxs
+
+
+def _link(maker, shared_idxs, shared):
+    """Create a function of ``maker`` that uses the shared variables ``shared``."""
+    input_storage = [None if i is None else shared[i].container for i in shared_idxs]
+    with theano.config.change_flags(compute_test_value="off"):
+        return maker.create(input_storage)
+
+
+class CompileCache:
+    """A directory with compiled theano functions.
+
+    Parameters
+    ----------
+    directory: str
+        The directory for the cache files. It is created if it does not exist.
+    max_bytes: int, optional
+        The maximal size of all cache files. If storing a function exceeds it,
+        the least recently used functions are removed. Defaults to 1 GiB.
+
+    Attributes
+    ----------
+    stats: dict
+        The number of cache ``hits`` and ``misses``, of ``stores`` and
+        ``evictions``, of functions that were ``skipped`` because their graph
+        can not be fingerprinted, and of cache files that could not be loaded
+        (``errors``).
+    """
+
+    def __init__(self, directory, max_bytes=2 ** 30):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self.stats = dict(hits=0, misses=0, stores=0, evictions=0, skipped=0, errors=0)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def function(self, inputs, outputs=None, givens=None, **kwargs):
+        """Compile a theano function, or load it from the cache.
+
+        Takes the same arguments as `theano.function`. Functions with
+        updates, profiling or graphs that can not be fingerprinted are
+        compiled without the cache.
+        """
+        compile_kwargs = dict(kwargs, givens=givens)
+        try:
+            if kwargs.get("updates") or kwargs.get("profile"):
+                raise _Uncacheable("updates or profile")
+            if set(kwargs) - _KEY_KWARGS:
+                raise _Uncacheable("arguments")
+            if not all(isinstance(var, Variable) for var in inputs):
+                raise _Uncacheable("inputs")
+            if isinstance(outputs, (list, tuple)):
+                output_list = list(outputs)
+            else:
+                output_list = [outputs]
+            if not all(isinstance(var, Variable) for var in output_list):
+                raise _Uncacheable("outputs")
+            key, shared = _fingerprint(inputs, output_list, givens, kwargs)
+        except _Uncacheable:
+            self.stats["skipped"] += 1
+            return theano.function(inputs, outputs, **compile_kwargs)
+
+        fn = self._load(key, shared)
+        if fn is not None:
+            self.stats["hits"] += 1
+            return fn
+
+        self.stats["misses"] += 1
+        fn = theano.function(inputs, outputs, **compile_kwargs)
+        self._store(key, fn, shared)
+        return fn
+
+    def _load(self, key, shared):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                maker, shared_idxs = pickle.load(f)
+            fn = _link(maker, shared_idxs, shared)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            _log.debug("Could not load cached function %s", path, exc_info=True)
+            self.stats["errors"] += 1
+            self._remove(path)
+            return None
+        try:
+            # Keep track of the last use for the eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return fn
+
+    def _store(self, key, fn, shared):
+        shared_idxs = _shared_indices(fn, shared)
+        if shared_idxs is None:
+            self.stats["skipped"] += 1
+            return
+        try:
+            data = pickle.dumps((fn.maker, shared_idxs), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            _log.debug("Could not pickle compiled function", exc_info=True)
+            self.stats["skipped"] += 1
+            return
+
+        # Write to a temporary file first, so that other processes never
+        # see incomplete cache files.
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            _log.debug("Could not store compiled function", exc_info=True)
+            self._remove(tmp_path)
+            return
+        self.stats["stores"] += 1
+        self._evict(keep=self._path(key))
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self, keep=None):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            if self._remove(path):
+                self.stats["evictions"] += 1
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+        return True
+
+    @property
+    def size(self):
+        """The total size of the cache files in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def __len__(self):
+        return len(self._entries())
+
+    def clear(self):
+        """Remove all functions from the cache."""
+        for _, _, path in self._entries():
+            self._remove(path)
+
+
+class FunctionLRU:
+    """An in-memory cache of compiled theano functions with LRU eviction.
+
+    Compiling the same variables again is a dictionary lookup by their ids,
+    which are checked with weak references. Other variables are looked up by
+    the fingerprint of their graph, so structurally identical graphs (for
+    example of a model that is created again) share one compiled function,
+    linked to their own shared variables. Misses are compiled with `function`
+    and go through the on-disk cache if it is enabled.
+
+    Parameters
+    ----------
+    maxsize: int
+        The maximal number of compiled functions. If it is exceeded, the least
+        recently used function is removed.
+
+    Attributes
+    ----------
+    stats: dict
+        The number of cache ``hits`` and ``misses``, of ``evictions`` and of
+        functions that were compiled without the cache (``skipped``) because
+        their graph can not be fingerprinted.
+    """
+
+    def __init__(self, maxsize=512):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive, not %s" % maxsize)
+        self.maxsize = maxsize
+        # fingerprint -> (function, shared variables, shared input positions)
+        self._graphs = collections.OrderedDict()
+        # ids of the arguments -> (weak references to the variables, fingerprint, function)
+        self._calls = collections.OrderedDict()
+        self.stats = dict(hits=0, misses=0, evictions=0, skipped=0)
+
+    @staticmethod
+    def _variables(inputs, outputs, givens):
+        if isinstance(outputs, (list, tuple)):
+            output_list = list(outputs)
+        else:
+            output_list = [outputs]
+        if givens is None:
+            givens = []
+        elif isinstance(givens, dict):
+            givens = list(givens.items())
+        return list(inputs) + output_list + [var for pair in givens for var in pair], output_list
+
+    def function(self, inputs, outputs=None, givens=None, **kwargs):
+        """Compile a theano function, or take it from the cache.
+
+        Takes the same arguments as `theano.function`.
+        """
+        variables, output_list = self._variables(inputs, outputs, givens)
+        try:
+            call_key = (
+                tuple(map(id, variables)),
+                len(inputs),
+                isinstance(outputs, (list, tuple)),
+                tuple(sorted(kwargs.items())),
+            )
+            hash(call_key)
+        except TypeError:
+            call_key = None
+
+        entry = self._calls.get(call_key)
+        if entry is not None:
+            refs, key, fn = entry
+            # The ids are only valid while the variables are alive
+            if key in self._graphs and all(ref() is not None for ref in refs):
+                self._calls.move_to_end(call_key)
+                self._graphs.move_to_end(key)
+                self.stats["hits"] += 1
+                return fn
+            del self._calls[call_key]
+
+        try:
+            if kwargs.get("updates") or kwargs.get("profile") or set(kwargs) - _KEY_KWARGS:
+                raise _Uncacheable("arguments")
+            if not all(isinstance(var, Variable) for var in variables):
+                raise _Uncacheable("variables")
+            key, shared = _fingerprint(inputs, output_list, givens, kwargs)
+        except _Uncacheable:
+            self.stats["skipped"] += 1
+            return function(inputs, outputs, givens=givens, **kwargs)
+
+        if key in self._graphs:
+            fn, cached_shared, shared_idxs = self._graphs[key]
+            if any(a is not b for a, b in zip(shared, cached_shared)):
+                fn = _link(fn.maker, shared_idxs, shared)
+                self._graphs[key] = (fn, shared, shared_idxs)
+            self._graphs.move_to_end(key)
+            self.stats["hits"] += 1
+        else:
+            fn = function(inputs, outputs, givens=givens, **kwargs)
+            self.stats["misses"] += 1
+            shared_idxs = _shared_indices(fn, shared)
+            if shared_idxs is None:
+                self.stats["skipped"] += 1
+                return fn
+            self._graphs[key] = (fn, shared, shared_idxs)
+            self._evict()
+
+        if call_key is not None:
+            self._calls[call_key] = ([weakref.ref(var) for var in variables], key, fn)
+            while len(self._calls) > self.maxsize:
+                self._calls.popitem(last=False)
+        return fn
+
+    def _evict(self):
+        while len(self._graphs) > self.maxsize:
+            self._graphs.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def __len__(self):
+        return len(self._graphs)
+
+    def clear(self):
+        """Remove all functions from the cache."""
+        self._graphs.clear()
+        self._calls.clear()
+
+
+_active_cache = None
+
+
+def enable(directory=None, max_bytes=2 ** 30):
+    """Cache the compiled functions of pymc3 models in a directory.
+
+    Parameters
+    ----------
+    directory: str, optional
+        The cache directory. Defaults to a ``pymc3_functions`` directory
+        in the theano compiledir.
+    max_bytes: int, optional
+        The maximal size of the cache, defaults to 1 GiB.
+
+    Returns
+    -------
+    The `CompileCache`.
+    """
+    # pylint: disable=global-statement
+    global _active_cache
+    # pylint: enable=global-statement
+    if directory is None:
+        directory = os.path.join(theano.config.compiledir, "pymc3_functions")
+    _active_cache = CompileCache(directory, max_bytes)
+    return _active_cache
+
+
+def disable():
+    """Compile all functions again."""
+    # pylint: disable=global-statement
+    global _active_cache
+    # pylint: enable=global-statement
+    _active_cache = None
+
+
+def get_cache():
+    """Return the active `CompileCache` or None."""
+    return _active_cache
+
+
+def function(inputs, outputs=None, *args, **kwargs):
+    """Drop-in replacement for `theano.function` that uses the active cache."""
+    if _active_cache is None or args:
+        return theano.function(inputs, outputs, *args, **kwargs)
+    return _active_cache.function(inputs, outputs, **kwargs)
+
+
+if os.environ.get("PYMC3_COMPILE_CACHE_DIR"):
+    enable(os.environ["PYMC3_COMPILE_CACHE_DIR"])
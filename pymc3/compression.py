@@ -0,0 +1,199 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Compression of the observed data of a random variable.
+
+Observed data often has many identical rows, for example when the outcomes are
+counts or binary and the covariates are categorical. The summed logp of such
+data only needs to be evaluated once per unique row, weighted by the number of
+times the row occurs. For distributions with sufficient statistics it only
+needs to be evaluated once per group of rows with the same parameters.
+"""
+
+import copy
+
+import numpy as np
+import theano.tensor as tt
+
+from theano.graph.basic import Variable, graph_inputs, io_toposort
+from theano.tensor.basic import Dot
+from theano.tensor.elemwise import DimShuffle, Elemwise
+from theano.tensor.subtensor import AdvancedSubtensor1
+
+from pymc3.theanof import floatX
+
+__all__ = ["compress_logp"]
+
+
+def _row_variables(outputs, n_rows):
+    """Find the variables in the graph of ``outputs`` whose first axis runs over the rows.
+
+    Constants with ``n_rows`` entries along their first axis are taken to hold one
+    entry per row of the observed data. Those rows may only pass through operations
+    that keep them on the first axis, so that selecting rows of the constants selects
+    the same rows of the outputs.
+    """
+    inputs = list(graph_inputs(outputs))
+    rows = {
+        var
+        for var in inputs
+        if isinstance(var, tt.TensorConstant)
+        and var.ndim > 0
+        and not var.broadcastable[0]
+        and var.data.shape[0] == n_rows
+    }
+    for node in io_toposort(inputs, outputs):
+        row_inputs = [var in rows for var in node.inputs]
+        if not any(row_inputs):
+            continue
+        op = node.op
+        if isinstance(op, Elemwise):
+            keeps_rows = all(
+                is_row or var.broadcastable[0] for var, is_row in zip(node.inputs, row_inputs)
+            )
+        elif isinstance(op, DimShuffle):
+            keeps_rows = tuple(op.new_order[:1]) == (0,)
+        elif isinstance(op, AdvancedSubtensor1):
+            keeps_rows = row_inputs == [False, True]
+        elif isinstance(op, Dot):
+            keeps_rows = row_inputs == [True, False] and node.inputs[0].ndim == 2
+        else:
+            keeps_rows = False
+        if not keeps_rows:
+            raise ValueError(
+                "The observed data can not be compressed, because %s combines "
+                "the rows of the data." % op
+            )
+        rows.update(node.outputs)
+    return rows
+
+
+def _unique_rows(arrays, n_rows):
+    """Group the rows that are identical in all ``arrays``.
+
+    Returns the index of the first row of every group, the group of every row and
+    the number of rows in every group.
+    """
+    keys = [
+        np.ascontiguousarray(np.reshape(array, (n_rows, -1))).view(np.uint8) for array in arrays
+    ]
+    if not any(key.shape[1] for key in keys):
+        # All rows are identical
+        groups = np.zeros(n_rows, "int64")
+        return groups[:1], groups, np.bincount(groups)
+    _, first, groups, count = np.unique(
+        np.concatenate(keys, axis=1),
+        axis=0,
+        return_index=True,
+        return_inverse=True,
+        return_counts=True,
+    )
+    return first, groups.reshape(-1), count
+
+
+def compress_logp(distribution, value, method=True):
+    """Return the summed logp of ``distribution`` at ``value``, evaluated on the unique rows.
+
+    The parameters of the distribution may depend on the rows of the data through
+    constants with one entry per row, like the covariates of a regression or the
+    group index of a hierarchical model. They are selected at the unique rows too.
+
+    Parameters
+    ----------
+    distribution: Distribution
+        The distribution of the observed variable. Its logp must be elementwise.
+    value: array
+        The observed data, with the rows along the first axis.
+    method: bool or str
+        "rows" evaluates the logp once per unique row of the data and the parameters,
+        weighted by the number of times the row occurs. "sufficient" evaluates it once
+        per unique row of the parameters, from the ``sufficient_statistics`` of the
+        data in the rows. True uses "sufficient" if the distribution has sufficient
+        statistics and "rows" otherwise.
+
+    Returns
+    -------
+    logp: TensorVariable
+        The summed logp.
+    logp_nojac: TensorVariable
+        The summed logp without jacobian terms.
+    """
+    if method not in (True, "rows", "sufficient"):
+        raise ValueError(
+            "Unknown compression method %s, use True, 'rows' or 'sufficient'." % method
+        )
+    if np.ndim(value) == 0:
+        raise ValueError("Only observed data with at least one dimension can be compressed.")
+    if distribution.logp(tt.as_tensor_variable(value[:1])).ndim != value.ndim:
+        raise ValueError(
+            "The observed data can not be compressed, because the logp of the %s "
+            "distribution is not elementwise." % type(distribution).__name__
+        )
+    n_rows = value.shape[0]
+    params = {name: var for name, var in vars(distribution).items() if isinstance(var, Variable)}
+    rows = _row_variables(list(params.values()), n_rows)
+    for name, var in params.items():
+        if var in rows:
+            aligned = var.ndim == value.ndim
+        else:
+            aligned = var.ndim < value.ndim or var.broadcastable[0]
+        if not aligned:
+            raise ValueError(
+                "The observed data can not be compressed, because the parameter %s of "
+                "the %s distribution varies along the rows of the data with something "
+                "other than constants." % (name, type(distribution).__name__)
+            )
+    constants = [var for var in graph_inputs(list(params.values())) if var in rows]
+    broadcast = (-1,) + (1,) * (value.ndim - 1)
+
+    if method in (True, "sufficient"):
+        first, groups, count = _unique_rows([const.data for const in constants], n_rows)
+        count = count.reshape(broadcast)
+        stats = distribution.sufficient_statistics(value, groups, count)
+        if stats is None and method == "sufficient":
+            raise ValueError(
+                "The %s distribution has no sufficient statistics." % type(distribution).__name__
+            )
+        if stats is not None:
+            compressed = _select_rows(distribution, params, constants, first)
+            stats = {name: tt.as_tensor_variable(stat) for name, stat in stats.items()}
+            logp = tt.sum(compressed.logp_sufficient(floatX(count), **stats))
+            return logp, logp
+
+    first, groups, count = _unique_rows([value] + [const.data for const in constants], n_rows)
+    compressed = _select_rows(distribution, params, constants, first)
+    count = floatX(count.reshape(broadcast))
+    unique_value = tt.as_tensor_variable(value[first])
+    logp = compressed.logp(unique_value)
+    logp_nojac = compressed.logp_nojac(unique_value)
+    return tt.sum(count * logp), tt.sum(count * logp_nojac)
+
+
+def _select_rows(distribution, params, constants, rows):
+    """Copy ``distribution`` with its parameters selected at ``rows``."""
+    # theano.clone would keep the test values of the full parameters, so the
+    # graph is rebuilt by calling the ops again
+    selected = {
+        const: tt.TensorConstant(const.type, const.data[rows], name=const.name)
+        for const in constants
+    }
+    for node in io_toposort(constants, list(params.values())):
+        inputs = [selected.get(var, var) for var in node.inputs]
+        if any(new is not old for new, old in zip(inputs, node.inputs)):
+            outputs = node.op(*inputs, return_list=True)
+            selected.update(zip(node.outputs, outputs))
+    compressed = copy.copy(distribution)
+    for name, var in params.items():
+        setattr(compressed, name, selected.get(var, var))
+    return compressed
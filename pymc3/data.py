@@ -22,7 +22,6 @@ from copy import copy
 from typing import Any, Dict, List
 
 import numpy as np
-import pandas as pd
 import theano
 import theano.tensor as tt
 
@@ -558,6 +557,8 @@ class Data:
 
     @staticmethod
     def set_coords(model, value, dims=None):
+        import pandas as pd
+
         coords = {}
 
         # If value is a df or a series, we interpret the index as coords:
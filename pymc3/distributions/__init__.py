@@ -92,7 +92,11 @@ from pymc3.distributions.multivariate import (
     Wishart,
     WishartBartlett,
 )
-from pymc3.distributions.posterior_predictive import fast_sample_posterior_predictive
+from pymc3.distributions.posterior_predictive import (
+    PredictiveEngine,
+    PredictiveSummary,
+    fast_sample_posterior_predictive,
+)
 from pymc3.distributions.simulator import Simulator
 from pymc3.distributions.timeseries import (
     AR,
@@ -183,5 +187,7 @@ __all__ = [
     "Moyal",
     "Simulator",
     "fast_sample_posterior_predictive",
+    "PredictiveSummary",
+    "PredictiveEngine",
     "BART",
 ]
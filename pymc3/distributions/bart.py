@@ -14,8 +14,6 @@
 
 import numpy as np
 
-from pandas import DataFrame, Series
-
 from pymc3.distributions.distribution import NoDistribution
 from pymc3.distributions.tree import LeafNode, SplitNode, Tree
 
@@ -61,6 +59,8 @@ class BaseBART(NoDistribution):
         self.prior_prob_leaf_node = compute_prior_probability(alpha)
 
     def preprocess_XY(self, X, Y):
+        from pandas import DataFrame, Series
+
         if isinstance(Y, (Series, DataFrame)):
             Y = Y.to_numpy()
         if isinstance(X, (Series, DataFrame)):
@@ -33,6 +33,7 @@ from pymc3.distributions.dist_math import (
     bound,
     clipped_beta_rvs,
     gammaln,
+    group_sum,
     i0e,
     incomplete_beta,
     log_normal,
@@ -534,6 +535,29 @@ class Normal(Continuous):
 
         return bound((-tau * (value - mu) ** 2 + tt.log(tau / np.pi / 2.0)) / 2.0, sigma > 0)
 
+    def sufficient_statistics(self, value, groups, count):
+        """The mean and the sum of the squared deviations of every group of observations."""
+        mean = group_sum(value, groups, len(count)) / count
+        squares = group_sum((value - mean[groups]) ** 2, groups, len(count))
+        return {"mean": floatX(mean), "squares": floatX(squares)}
+
+    def logp_sufficient(self, count, mean, squares):
+        """
+        Calculate the summed log-probability of groups of observations of the Normal
+        distribution from their `sufficient_statistics`.
+
+        Returns
+        -------
+        TensorVariable
+        """
+        tau = self.tau
+        sigma = self.sigma
+        mu = self.mu
+
+        # The squared deviations from mu, decomposed around the mean of the group
+        deviations = squares + count * (mean - mu) ** 2
+        return bound((-tau * deviations + count * tt.log(tau / np.pi / 2.0)) / 2.0, sigma > 0)
+
     def _distr_parameters_for_repr(self):
         return ["mu", "sigma"]
 
@@ -18,12 +18,14 @@ import numpy as np
 import theano.tensor as tt
 
 from scipy import stats
+from scipy.special import gammaln
 
 from pymc3.distributions.dist_math import (
     betaln,
     binomln,
     bound,
     factln,
+    group_sum,
     incomplete_beta,
     log_diff_normal_cdf,
     logpow,
@@ -453,6 +455,30 @@ class Bernoulli(Discrete):
                 tt.switch(value, tt.log(p), tt.log(1 - p)), value >= 0, value <= 1, p >= 0, p <= 1
             )
 
+    def sufficient_statistics(self, value, groups, count):
+        """The number of ones in every group of observations, and whether all are 0 or 1."""
+        n_groups = len(count)
+        return {
+            "ones": floatX(group_sum(value != 0, groups, n_groups)),
+            "valid": group_sum((value < 0) | (value > 1), groups, n_groups) == 0,
+        }
+
+    def logp_sufficient(self, count, ones, valid):
+        """
+        Calculate the summed log-probability of groups of observations of the Bernoulli
+        distribution from their `sufficient_statistics`.
+
+        Returns
+        -------
+        TensorVariable
+        """
+        zeros = count - ones
+        if self._is_logit:
+            return -(ones * log1pexp(-self._logit_p) + zeros * log1pexp(self._logit_p))
+        else:
+            p = self.p
+            return bound(logpow(p, ones) + logpow(1 - p, zeros), valid, p >= 0, p <= 1)
+
     def logcdf(self, value):
         """
         Compute the log of the cumulative distribution function for Bernoulli distribution
@@ -707,6 +733,29 @@ class Poisson(Discrete):
         # Return zero when mu and value are both zero
         return tt.switch(tt.eq(mu, 0) * tt.eq(value, 0), 0, log_prob)
 
+    def sufficient_statistics(self, value, groups, count):
+        """The sum and the summed log factorials of every group of observations."""
+        n_groups = len(count)
+        return {
+            "total": floatX(group_sum(value, groups, n_groups)),
+            "log_factorials": floatX(group_sum(gammaln(value + 1.0), groups, n_groups)),
+            "valid": group_sum(value < 0, groups, n_groups) == 0,
+        }
+
+    def logp_sufficient(self, count, total, log_factorials, valid):
+        """
+        Calculate the summed log-probability of groups of observations of the Poisson
+        distribution from their `sufficient_statistics`.
+
+        Returns
+        -------
+        TensorVariable
+        """
+        mu = self.mu
+        log_prob = bound(logpow(mu, total) - log_factorials - count * mu, mu >= 0, valid)
+        # Return zero when mu and all values are zero
+        return tt.switch(tt.eq(mu, 0) * tt.eq(total, 0) * valid, 0, log_prob)
+
     def logcdf(self, value):
         """
         Compute the log of the cumulative distribution function for Poisson distribution
@@ -116,6 +116,27 @@ def binomln(n, k):
     return factln(n) - factln(k) - factln(n - k)
 
 
+def group_sum(x, groups, n_groups):
+    """Sum the rows of the array ``x`` within groups.
+
+    Parameters
+    ----------
+    x: array
+        The values, with the rows along the first axis.
+    groups: array of int
+        The group of every row of ``x``, between 0 and ``n_groups - 1``.
+    n_groups: int
+
+    Returns
+    -------
+    array of shape ``(n_groups,) + x.shape[1:]``
+    """
+    x = np.asarray(x)
+    total = np.zeros((n_groups,) + x.shape[1:], np.result_type(x.dtype, "int64"))
+    np.add.at(total, groups, x)
+    return total
+
+
 def betaln(x, y):
     return gammaln(x) + gammaln(y) - gammaln(x + y)
 
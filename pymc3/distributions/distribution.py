@@ -32,14 +32,13 @@ import theano
 import theano.graph.basic
 import theano.tensor as tt
 
-from theano import function
-
+from pymc3.compile_cache import FunctionLRU
 from pymc3.distributions.shape_utils import (
     broadcast_dist_samples_shape,
     get_broadcastable_dist_samples,
     to_tuple,
 )
-from pymc3.memoize import memoize
+from pymc3.memoize import CACHE_REGISTRY
 from pymc3.model import (
     ContextMeta,
     FreeRV,
@@ -97,6 +96,7 @@ class Distribution:
         if isinstance(data, ObservedRV) or isinstance(data, FreeRV):
             raise TypeError("observed needs to be data but got: {}".format(type(data)))
         total_size = kwargs.pop("total_size", None)
+        compress = kwargs.pop("compress", False)
 
         dims = kwargs.pop("dims", None)
         has_shape = "shape" in kwargs
@@ -119,7 +119,7 @@ class Distribution:
             dist = cls.dist(*args, **kwargs, shape=shape)
         else:
             dist = cls.dist(*args, **kwargs)
-        return model.Var(name, dist, data, total_size, dims=dims)
+        return model.Var(name, dist, data, total_size, dims=dims, compress=compress)
 
     def __getnewargs__(self):
         return (_Unpickling,)
@@ -266,6 +266,46 @@ class Distribution:
         """
         return tt.sum(self.logp(*args, **kwargs))
 
+    def sufficient_statistics(self, value, groups, count):
+        """Return the sufficient statistics of groups of observations.
+
+        Observed variables with ``compress=True`` use them to evaluate the logp
+        once per group of observations with the same parameters, with
+        `logp_sufficient`. Subclasses that return them must implement it.
+
+        Parameters
+        ----------
+        value: array
+            The observations, with the rows along the first axis.
+        groups: array of int
+            The group of every row of ``value``.
+        count: array of int
+            The number of rows in every group, broadcastable against the
+            groups of ``value``.
+
+        Returns
+        -------
+        dict of arrays with the statistics of every group, or None if the
+        distribution has no sufficient statistics.
+        """
+        return None
+
+    def logp_sufficient(self, count, **stats):
+        """Return the sum of the logp values of every group of observations.
+
+        Parameters
+        ----------
+        count: TensorVariable
+            The number of observations in every group.
+        stats: TensorVariable
+            The statistics returned by `sufficient_statistics`.
+
+        Returns
+        -------
+        TensorVariable
+        """
+        raise NotImplementedError
+
     __latex__ = _repr_latex_
 
 
@@ -840,13 +880,17 @@ def draw_values(params, point=None, size=None):
     return [evaluated[j] for j in params]  # set the order back
 
 
-@memoize
+#: The compiled functions of `draw_values`, see `pymc3.compile_cache.FunctionLRU`
+draw_values_cache = FunctionLRU(maxsize=512)
+CACHE_REGISTRY.append(draw_values_cache)
+
+
 def _compile_theano_function(param, vars, givens=None):
     """Compile theano function for a given parameter and input variables.
 
-    This function is memoized to avoid repeating costly theano compilations
-    when repeatedly drawing values, which is done when generating posterior
-    predictive samples.
+    The functions are kept in `draw_values_cache` to avoid repeating costly
+    theano compilations when repeatedly drawing values, which is done when
+    generating posterior predictive samples.
 
     Parameters
     ----------
@@ -859,7 +903,7 @@ def _compile_theano_function(param, vars, givens=None):
     A compiled theano function that takes the values of `vars` as input
         positional args
     """
-    f = function(
+    f = draw_values_cache.function(
         vars,
         param,
         givens=givens,
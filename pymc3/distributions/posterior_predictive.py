@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 import contextvars
+import itertools
 import logging
 import numbers
+import os
+import queue
+import tempfile
+import threading
+import time
 import warnings
 
 from collections import UserDict
-from contextlib import AbstractContextManager
+from concurrent.futures import Future
+from contextlib import AbstractContextManager, ExitStack
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, cast, overload
 
 import numpy as np
@@ -14,11 +21,11 @@ import theano.graph.basic
 import theano.graph.fg
 import theano.tensor as tt
 
-from arviz import InferenceData
+from fastprogress.fastprogress import progress_bar
 from typing_extensions import Literal, Protocol
-from xarray import Dataset
 
 from pymc3.backends.base import MultiTrace
+from pymc3.backends.summary import _merge_moments
 from pymc3.distributions.distribution import (
     _compile_theano_function,
     _DrawValuesContext,
@@ -33,10 +40,21 @@ from pymc3.model import (
     ObservedRV,
     get_named_nodes_and_relations,
     modelcontext,
+    set_data,
+)
+from pymc3.util import (
+    chains_and_samples,
+    dataset_to_point_list,
+    get_var_name,
+    is_dataset,
+    is_inference_data,
 )
-from pymc3.util import chains_and_samples, dataset_to_point_list, get_var_name
 from pymc3.vartypes import theano_constant
 
+if TYPE_CHECKING:
+    from arviz import InferenceData
+    from xarray import Dataset
+
 # Failing tests:
 #    test_mixture_random_shape::test_mixture_random_shape
 #
@@ -149,7 +167,12 @@ def fast_sample_posterior_predictive(
     var_names: list[str] | None = None,
     keep_size: bool = False,
     random_seed=None,
-) -> dict[str, np.ndarray]:
+    chunk_size: int | None = None,
+    progressbar: bool = False,
+    cores: int | None = None,
+    out_dir: str | None = None,
+    summary: PredictiveSummary | None = None,
+) -> dict[str, Any]:
     """Generate posterior predictive samples from a model given a trace.
 
     This is a vectorized alternative to the standard ``sample_posterior_predictive`` function.
@@ -176,12 +199,32 @@ def fast_sample_posterior_predictive(
         data: ``(nchains, ndraws, ...)``.
     random_seed: int
         Seed for the random number generator.
+    chunk_size: int, optional
+        The maximum number of posterior draws that are evaluated in one call. Each chunk is
+        evaluated at once, with the draws along the leading dimension, so the memory needed
+        for the intermediate values grows with ``chunk_size``. Defaults to all draws, or to
+        1000 draws with ``cores``, ``out_dir`` or ``summary``.
+    progressbar: bool
+        Whether or not to display a progress bar over the chunks.
+    cores: int, optional
+        The number of processes that sample the chunks in parallel. The chunks are written
+        into shared memory, and each chunk is sampled with its own seed that is derived from
+        ``random_seed``, so the samples are the same for any number of cores. By default all
+        chunks are sampled in this process with the global random state.
+    out_dir: str, optional
+        A directory to write the samples of every variable to, as ``<name>.npy``. The chunks
+        are written one after the other, so the samples do not need to fit in memory. The
+        returned arrays are memory-mapped to these files.
+    summary: PredictiveSummary, optional
+        Reduce the samples to summary statistics instead of returning them, see
+        `PredictiveSummary`.
 
     Returns
     -------
     samples: dict
         Dictionary with the variable names as keys, and values numpy arrays containing
-        posterior predictive samples.
+        posterior predictive samples. If ``summary`` is given, the values are dictionaries
+        with the summary statistics instead.
     """
 
     ### Implementation note: primarily this function canonicalizes the arguments:
@@ -193,10 +236,10 @@ def fast_sample_posterior_predictive(
     ### greater than the number of samples in the trace parameter, we sample repeatedly.  This
     ### makes the shape issues just a little easier to deal with.
 
-    if isinstance(trace, InferenceData):
+    if is_inference_data(trace):
         nchains, ndraws = chains_and_samples(trace)
         trace = dataset_to_point_list(trace.posterior)
-    elif isinstance(trace, Dataset):
+    elif is_dataset(trace):
         nchains, ndraws = chains_and_samples(trace)
         trace = dataset_to_point_list(trace)
     elif isinstance(trace, MultiTrace):
@@ -212,27 +255,14 @@ def fast_sample_posterior_predictive(
     model = modelcontext(model)
     assert model is not None
 
-    if model.potentials:
-        warnings.warn(
-            "The effect of Potentials on other parameters is ignored during posterior predictive sampling. "
-            "This is likely to lead to invalid or biased predictive samples.",
-            UserWarning,
-        )
+    _warn_potentials(model)
 
     with model:
 
         if keep_size and samples is not None:
             raise IncorrectArgumentsError("Should not specify both keep_size and samples arguments")
 
-        if isinstance(trace, list) and all(isinstance(x, dict) for x in trace):
-            _trace = _TraceDict(point_list=trace)
-        elif isinstance(trace, MultiTrace):
-            _trace = _TraceDict(multi_trace=trace)
-        else:
-            raise TypeError(
-                "Unable to generate posterior predictive samples from argument of type %s"
-                % type(trace)
-            )
+        _trace = _as_trace_dict(trace)
 
         len_trace = len(_trace)
 
@@ -267,37 +297,585 @@ def fast_sample_posterior_predictive(
         else:
             vars = [model[x] for x in var_names]
 
+        if chunk_size is not None and chunk_size < 1:
+            raise IncorrectArgumentsError("chunk_size must be positive, not %s" % chunk_size)
+        if keep_size and summary is not None:
+            raise IncorrectArgumentsError("Should not specify both keep_size and summary arguments")
+        if cores is not None:
+            if cores < 1:
+                raise IncorrectArgumentsError("cores must be positive, not %s" % cores)
+        elif random_seed is not None:
+            np.random.seed(random_seed)
+        if chunk_size is None and (cores is not None or out_dir is not None or summary is not None):
+            chunk_size = _DEFAULT_CHUNK_SIZE
+
+        chunks = [
+            (start, min(start + chunk_size, n) if chunk_size else n)
+            for n in _samples
+            for start in range(0, n, chunk_size or n)
+        ]
+        with ExitStack() as stack:
+            sample_dir = out_dir
+            if summary is not None and out_dir is None:
+                if summary.hdi_prob is not None or cores is not None:
+                    # The HDIs need all samples of an observation, and the workers of a pool
+                    # write their samples to disk.
+                    sample_dir = stack.enter_context(tempfile.TemporaryDirectory())
+            if sample_dir is not None:
+                os.makedirs(sample_dir, exist_ok=True)
+
+            if cores is None:
+                ppc_trace = _sample_chunks(vars, _trace, chunks, progressbar, sample_dir, summary)
+            else:
+                ppc_trace = _sample_shards(
+                    vars, _trace, chunks, cores, random_seed, progressbar, model, sample_dir
+                )
+                if summary is not None:
+                    summary._start()
+                    for name, samples in ppc_trace.items():
+                        for start, stop in _chunk_offsets(chunks):
+                            summary._update(name, samples[start:stop])
+            if summary is not None:
+                max_chunk = max(stop - start for start, stop in chunks)
+                return summary._finish(ppc_trace, max_chunk)
+
+    if keep_size:
+        return {k: ary.reshape((nchains, ndraws, *ary.shape[1:])) for k, ary in ppc_trace.items()}
+    return ppc_trace
+
+
+def _warn_potentials(model: Model) -> None:
+    if model.potentials:
+        warnings.warn(
+            "The effect of Potentials on other parameters is ignored during posterior predictive sampling. "
+            "This is likely to lead to invalid or biased predictive samples.",
+            UserWarning,
+        )
+
+
+def _as_trace_dict(trace) -> _TraceDict:
+    if is_inference_data(trace):
+        trace = dataset_to_point_list(trace.posterior)
+    elif is_dataset(trace):
+        trace = dataset_to_point_list(trace)
+    if isinstance(trace, list) and all(isinstance(x, dict) for x in trace):
+        return _TraceDict(point_list=trace)
+    elif isinstance(trace, MultiTrace):
+        return _TraceDict(multi_trace=trace)
+    raise TypeError(
+        "Unable to generate posterior predictive samples from argument of type %s" % type(trace)
+    )
+
+
+_DEFAULT_CHUNK_SIZE = 1000
+
+# The model, trace and output arrays of a posterior predictive worker process
+_shard_worker: dict[str, Any] = {}
+
+
+class PredictiveSummary:
+    """Reduce posterior predictive samples to summary statistics chunk by chunk.
+
+    Pass an instance to ``fast_sample_posterior_predictive(..., summary=...)`` to get the
+    summary statistics of every observation instead of the samples. The means, standard
+    deviations and exceedance probabilities are updated with every chunk of samples, so
+    only one chunk is in memory at a time. The HDIs need all samples of an observation:
+    they are computed from the samples on disk (in ``out_dir`` or a temporary directory),
+    for a block of observations at a time.
+
+    Parameters
+    ----------
+    hdi_prob: float, optional
+        The probability of the highest density intervals. No HDIs are computed by default.
+    thresholds: float or dict, optional
+        The thresholds of the exceedance probabilities ``P(y > threshold)``, either one for
+        all variables or a dictionary from the variable names. Every threshold must broadcast
+        to the shape of the samples of the variable.
+
+    The statistics of a variable are a dictionary with the keys ``"mean"``, ``"sd"``,
+    ``"hdi"`` (with the lower and upper bounds along the last axis) and ``"exceedance"``,
+    the latter two only if ``hdi_prob`` or a threshold is given.
+    """
+
+    def __init__(self, hdi_prob: float | None = None, thresholds=None):
+        if hdi_prob is not None and not 0 < hdi_prob < 1:
+            raise ValueError("hdi_prob must be between 0 and 1, not %s" % hdi_prob)
+        self.hdi_prob = hdi_prob
+        self.thresholds = thresholds
+
+    def _threshold(self, name):
+        if isinstance(self.thresholds, dict):
+            return self.thresholds.get(name)
+        return self.thresholds
+
+    def _start(self):
+        self._moments: dict[str, tuple[int, np.ndarray, np.ndarray]] = {}
+        self._exceed: dict[str, np.ndarray] = {}
+
+    def _update(self, name: str, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        mean = values.mean(axis=0)
+        m2 = np.square(values - mean).sum(axis=0)
+        if name in self._moments:
+            self._moments[name] = _merge_moments(*self._moments[name], len(values), mean, m2)
+        else:
+            self._moments[name] = (len(values), mean, m2)
+        threshold = self._threshold(name)
+        if threshold is not None:
+            exceed = (values > np.asarray(threshold)).sum(axis=0)
+            self._exceed[name] = self._exceed.get(name, 0) + exceed
+
+    def _finish(self, samples: dict[str, np.ndarray], max_chunk: int) -> dict[str, dict]:
+        result = {}
+        for name, (count, mean, m2) in self._moments.items():
+            stats = {"mean": mean, "sd": np.sqrt(m2 / max(count - 1, 1))}
+            if name in self._exceed:
+                stats["exceedance"] = self._exceed[name] / count
+            if self.hdi_prob is not None:
+                stats["hdi"] = _blocked_hdi(samples[name], self.hdi_prob, max_chunk)
+            result[name] = stats
+        return result
+
+
+def _hdi(values: np.ndarray, hdi_prob: float) -> np.ndarray:
+    """The highest density intervals of the columns of ``values``, like ``arviz.hdi``."""
+    n = len(values)
+    values = np.sort(values, axis=0)
+    interval = int(np.floor(hdi_prob * n))
+    widths = values[interval:] - values[: n - interval]
+    low = np.argmin(widths, axis=0)[None]
+    return np.stack(
+        [
+            np.take_along_axis(values, low, axis=0)[0],
+            np.take_along_axis(values, low + interval, axis=0)[0],
+        ],
+        axis=-1,
+    )
+
+
+def _blocked_hdi(samples: np.ndarray, hdi_prob: float, max_chunk: int) -> np.ndarray:
+    """Compute the HDIs for blocks of observations with about as many values as a chunk."""
+    n, shape = len(samples), samples.shape[1:]
+    flat = samples.reshape(n, -1)
+    block = max(1, max_chunk * flat.shape[1] // n)
+    hdi = np.empty((flat.shape[1], 2), dtype=float)
+    for start in range(0, flat.shape[1], block):
+        hdi[start : start + block] = _hdi(flat[:, start : start + block], hdi_prob)
+    return hdi.reshape(shape + (2,))
+
+
+def _chunk_offsets(chunks) -> list[tuple[int, int]]:
+    """The positions of the chunks in the output arrays."""
+    offsets = np.cumsum([0] + [stop - start for start, stop in chunks])
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def _open_samples(out_dir: str, shapes_dtypes) -> dict[str, np.ndarray]:
+    return {
+        name: np.lib.format.open_memmap(
+            os.path.join(out_dir, "%s.npy" % name), mode="w+", dtype=dtype, shape=shape
+        )
+        for name, (shape, dtype) in shapes_dtypes.items()
+    }
+
+
+def _shard_seeds(random_seed, n_shards: int) -> list[np.ndarray]:
+    """Derive an independent seed for every shard from ``random_seed``."""
+    if random_seed is None:
+        random_seed = np.random.randint(2 ** 30)
+    return [seq.generate_state(4) for seq in np.random.SeedSequence(random_seed).spawn(n_shards)]
+
+
+def _sample_shard(vars, trace: _TraceDict, start: int, stop: int, seed) -> list[np.ndarray]:
+    np.random.seed(seed)
+    strace = trace if stop - start == len(trace) else trace[slice(start, stop)]
+    return posterior_predictive_draw_values(vars, strace, stop - start)
+
+
+def _output_views(buffers, shapes_dtypes) -> dict[str, np.ndarray]:
+    """Numpy arrays of the shared memory buffers or ``.npy`` files of the samples."""
+    views = {}
+    for name, (shape, dtype) in shapes_dtypes.items():
+        if isinstance(buffers[name], str):
+            views[name] = np.load(buffers[name], mmap_mode="r+")
+        else:
+            views[name] = np.frombuffer(buffers[name], dtype).reshape(shape)
+    return views
+
+
+def _init_shard_worker(model, var_names, trace_data, buffers, shapes_dtypes):
+    _shard_worker.update(
+        model=model,
+        vars=[model[name] for name in var_names],
+        trace=_TraceDict(dict_=trace_data),
+        out=_output_views(buffers, shapes_dtypes),
+    )
+
+
+def _run_shard(args) -> int:
+    shard, start, stop, offset, seed = args
+    with _shard_worker["model"]:
+        values = _sample_shard(_shard_worker["vars"], _shard_worker["trace"], start, stop, seed)
+    for var, value in zip(_shard_worker["vars"], values):
+        _shard_worker["out"][var.name][offset : offset + stop - start] = value
+    return shard
+
+
+def _sample_chunks(
+    vars, trace: _TraceDict, chunks, progressbar, out_dir=None, summary=None
+) -> dict[str, np.ndarray]:
+    """Sample the chunks of the trace one after the other in this process.
+
+    The samples are collected in memory, written to ``.npy`` files in ``out_dir``
+    and/or reduced by ``summary``.
+    """
+    if summary is not None:
+        summary._start()
+    offsets = _chunk_offsets(chunks)
+    total = offsets[-1][1] if offsets else 0
+    if progressbar:
+        chunks = progress_bar(chunks, total=len(chunks), display=progressbar)
+    ppc_chunks: dict[str, list[np.ndarray]] = {var.name: [] for var in vars}
+    samples: dict[str, np.ndarray] | None = None
+    offset = stop = 0
+    try:
+        for (start, end), (offset, stop) in zip(chunks, offsets):
+            strace = trace if end - start == len(trace) else trace[slice(start, end)]
+            values = posterior_predictive_draw_values(cast(List[Any], vars), strace, end - start)
+            if out_dir is not None and samples is None:
+                shapes_dtypes = {
+                    var.name: ((total,) + value.shape[1:], value.dtype)
+                    for var, value in zip(vars, values)
+                }
+                samples = _open_samples(out_dir, shapes_dtypes)
+            for var, value in zip(vars, values):
+                if summary is not None:
+                    summary._update(var.name, value)
+                if samples is not None:
+                    samples[var.name][offset:stop] = value
+                elif summary is None:
+                    ppc_chunks[var.name].append(value)
+    except KeyboardInterrupt:
+        stop = offset
+    if samples is not None:
+        return {name: values[:stop] for name, values in samples.items()}
+    return {
+        name: np.concatenate(values) if len(values) > 1 else values[0]
+        for name, values in ppc_chunks.items()
+        if values
+    }
+
+
+def _sample_shards(
+    vars, trace: _TraceDict, chunks, cores, random_seed, progressbar, model, out_dir=None
+) -> dict[str, np.ndarray]:
+    """Sample the chunks of the trace in a pool of ``cores`` processes.
+
+    The first chunk is sampled in this process to find the shapes and dtypes of the
+    samples. The workers write the other chunks into shared memory, or into the
+    ``.npy`` files in ``out_dir``.
+    """
+    from pymc3.parallel_sampling import _get_mp_ctx
+
+    if not vars:
+        return {}
+    offsets = _chunk_offsets(chunks)
+    seeds = _shard_seeds(random_seed, len(chunks))
+    shards = [
+        (i, start, stop, offset, seed)
+        for i, ((start, stop), (offset, _), seed) in enumerate(zip(chunks, offsets, seeds))
+    ]
+
+    state = np.random.get_state()
+    try:
+        first = _sample_shard(vars, trace, chunks[0][0], chunks[0][1], seeds[0])
+    finally:
+        np.random.set_state(state)
+
+    mp_ctx = _get_mp_ctx(None)
+    shapes_dtypes = {
+        var.name: ((offsets[-1][1],) + value.shape[1:], value.dtype)
+        for var, value in zip(vars, first)
+    }
+    if out_dir is None:
+        buffers = {
+            name: mp_ctx.RawArray("c", int(np.prod(shape, dtype=int)) * dtype.itemsize)
+            for name, (shape, dtype) in shapes_dtypes.items()
+        }
+        out = _output_views(buffers, shapes_dtypes)
+    else:
+        out = _open_samples(out_dir, shapes_dtypes)
+        buffers = {name: samples.filename for name, samples in out.items()}
+    for var, value in zip(vars, first):
+        out[var.name][: len(value)] = value
+
+    initargs = (model, [var.name for var in vars], trace.data, buffers, shapes_dtypes)
+    state = np.random.get_state()
+    with ExitStack() as stack:
+        if cores == 1 or len(shards) <= 2:
+            # The draws of at most one worker are sampled in this process
+            stack.callback(np.random.set_state, state)
+            stack.callback(_shard_worker.clear)
+            _init_shard_worker(*initargs)
+            done = map(_run_shard, shards[1:])
+        else:
+            processes = min(cores, len(shards) - 1)
+            pool = stack.enter_context(mp_ctx.Pool(processes, _init_shard_worker, initargs))
+            done = pool.imap_unordered(_run_shard, shards[1:])
+        done = itertools.chain([0], done)
+        if progressbar:
+            done = progress_bar(done, total=len(shards), display=progressbar)
+        for _ in done:
+            pass
+    return out
+
+
+class PredictiveEngine:
+    """Serve posterior predictive samples of a fitted model for new data.
+
+    Every call to ``sample_posterior_predictive`` converts the trace, looks up the
+    model and the variables and compiles or looks up the Theano functions of the
+    graph again. A ``PredictiveEngine`` does this once, when it is created, and
+    then draws the samples of all posterior draws at once for each request.
+
+    Requests are evaluated by a background thread. With ``batch=True``, requests
+    that arrive while the thread is busy, or within ``max_delay`` seconds of each
+    other, are micro-batched: requests that set the same ``pm.Data`` containers are
+    concatenated along the first axis of the data and sampled in a single
+    evaluation, and each request gets its rows of the samples back. If the samples
+    of a variable are not aligned with the rows of the data, the requests are
+    sampled one by one instead.
+
+    Micro-batching is only correct if the rows of the data are independent given
+    the posterior draws, like the observations of a regression. It gives wrong
+    samples for models in which rows interact, for example through the mean or the
+    length of the data, a time series or a Gaussian process over the rows, because
+    then the samples of a request depend on the other requests of its batch. It is
+    therefore off by default.
+
+    Parameters
+    ----------
+    trace : MultiTrace, xarray.Dataset, InferenceData, or list of points (dictionary)
+        The posterior draws.
+    model : Model (optional if in ``with`` context)
+    var_names : list of str, optional
+        The variables to sample. Defaults to the observed variables.
+    samples : int, optional
+        The number of samples per request. Defaults to one sample per posterior
+        draw. Fewer samples use evenly spaced posterior draws, which lowers the
+        latency.
+    batch : bool
+        Micro-batch concurrent requests. Only use it if the rows of the data are
+        independent given the posterior draws. Defaults to False.
+    max_batch : int
+        The maximum number of requests that are evaluated together.
+    max_delay : float
+        The number of seconds to wait for more requests to batch with a request. By
+        default only the requests that queued up during the previous evaluation are
+        batched, which adds no latency.
+    random_seed : int, optional
+        Seed for the random number generator.
+
+    Examples
+    --------
+    .. code:: ipython
+
+        >>> with pm.Model() as model:
+        ...     x = pm.Data("x", x_train)
+        ...     y = pm.Data("y", y_train)
+        ...     beta = pm.Normal("beta", 0, 1)
+        ...     obs = pm.Normal("obs", beta * x, 1, observed=y)
+        ...     trace = pm.sample()
+        >>> with pm.PredictiveEngine(trace, model) as engine:
+        ...     ppc = engine.predict({"x": x_new, "y": np.zeros_like(x_new)})
+        >>> ppc["obs"].shape
+        (4000, len(x_new))
+
+    Like with ``pm.set_data``, every data container whose length changes must be
+    given a new value, including the observed data. The engine sets the values only
+    while it evaluates a request, but the model must not be used by other threads
+    while the engine is open.
+    """
+
+    def __init__(
+        self,
+        trace,
+        model: Model | None = None,
+        var_names: list[str] | None = None,
+        samples: int | None = None,
+        batch: bool = False,
+        max_batch: int = 64,
+        max_delay: float = 0.0,
+        random_seed=None,
+    ):
+        model = modelcontext(model)
+        _warn_potentials(model)
+        if max_batch < 1:
+            raise IncorrectArgumentsError("max_batch must be positive, not %s" % max_batch)
+
+        _trace = _as_trace_dict(trace)
+        if samples is not None:
+            if not 0 < samples <= len(_trace):
+                raise IncorrectArgumentsError(
+                    "samples must be between 1 and the number of posterior draws (%d), not %s"
+                    % (len(_trace), samples)
+                )
+            idx = np.linspace(0, len(_trace) - 1, samples).round().astype(int)
+            _trace = _TraceDict(dict_={name: values[idx] for name, values in _trace.items()})
         if random_seed is not None:
             np.random.seed(random_seed)
 
-        if TYPE_CHECKING:
-            _ETPParent = UserDict[str, np.ndarray]  # this is only processed by mypy
+        self._model = model
+        if var_names is None:
+            self._vars = model.observed_RVs
         else:
-            # this is not seen by mypy but will be executed at runtime.
-            _ETPParent = UserDict
-
-        class _ExtendableTrace(_ETPParent):
-            def extend_trace(self, trace: dict[str, np.ndarray]) -> None:
-                for k, v in trace.items():
-                    if k in self.data:
-                        self.data[k] = np.concatenate((self.data[k], v))
-                    else:
-                        self.data[k] = v
+            self._vars = [model[name] for name in var_names]
+        self._trace = _trace
+        self.batch = batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._stats = dict(requests=0, batches=0, evaluations=0)
+        # Key sets of requests whose samples can not be split by rows
+        self._unbatchable: set[tuple[str, ...]] = set()
+
+        # Compile the functions of the graph before the first request
+        self._draw({})
+        self._stats["evaluations"] = 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._serve, name="PredictiveEngine", daemon=True)
+        self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """The number of requests, of batches of requests and of evaluations."""
+        return dict(self._stats)
+
+    def submit(self, data: dict[str, Any] | None = None) -> Future:
+        """Queue a request and return a ``concurrent.futures.Future`` of its samples.
+
+        Parameters
+        ----------
+        data : dict, optional
+            New values for data containers of the model, as in ``pm.set_data``.
+
+        Returns
+        -------
+        future : Future
+            Resolves to a dictionary with the variable names as keys and the samples
+            as values.
+        """
+        if self._closed:
+            raise RuntimeError("The PredictiveEngine is closed.")
+        future: Future = Future()
+        data = {name: np.asarray(value) for name, value in (data or {}).items()}
+        self._queue.put((data, future))
+        return future
+
+    def predict(self, data: dict[str, Any] | None = None) -> dict[str, np.ndarray]:
+        """Draw posterior predictive samples for new data, see `submit`."""
+        return self.submit(data).result()
+
+    async def apredict(self, data: dict[str, Any] | None = None) -> dict[str, np.ndarray]:
+        """Draw posterior predictive samples for new data in an asyncio event loop."""
+        import asyncio
+
+        return await asyncio.wrap_future(self.submit(data))
+
+    def close(self) -> None:
+        """Evaluate the queued requests and stop the background thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def __enter__(self) -> PredictiveEngine:
+        return self
 
-        ppc_trace = _ExtendableTrace()
-        for s in _samples:
-            strace = _trace if s == len_trace else _trace[slice(0, s)]
+    def __exit__(self, exc_type, exc_val, exc_tb) -> Literal[False]:
+        self.close()
+        return False
+
+    def _serve(self) -> None:
+        closing = False
+        while not closing:
+            request = self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    request = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if request is None:
+                    closing = True
+                    break
+                batch.append(request)
+            self._stats["requests"] += len(batch)
+            self._stats["batches"] += 1
+            self._evaluate([(data, f) for data, f in batch if f.set_running_or_notify_cancel()])
+
+    def _evaluate(self, requests) -> None:
+        groups: dict[tuple[str, ...], list] = {}
+        for data, future in requests:
+            groups.setdefault(tuple(sorted(data)), []).append((data, future))
+        for names, group in groups.items():
+            try:
+                if self.batch and len(group) > 1 and names and names not in self._unbatchable:
+                    group = self._evaluate_batched(names, group)
+                for data, future in group:
+                    future.set_result(self._draw(data))
+            except Exception as e:
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _evaluate_batched(self, names, group) -> list:
+        """Sample the requests of ``group`` in one evaluation and return the requests
+        that could not be batched."""
+        rows = [_data_rows(data) for data, _ in group]
+        batch = [request for request, n in zip(group, rows) if n is not None]
+        if len(batch) < 2:
+            return group
+        offsets = np.cumsum([0] + [n for n in rows if n is not None])
+        data = {name: np.concatenate([d[name] for d, _ in batch]) for name in names}
+        values = self._draw(data)
+        if not all(v.ndim > 1 and v.shape[1] == offsets[-1] for v in values.values()):
+            self._unbatchable.add(names)
+            return group
+        for (_, future), start, stop in zip(batch, offsets[:-1], offsets[1:]):
+            future.set_result({name: v[:, start:stop] for name, v in values.items()})
+        return [request for request, n in zip(group, rows) if n is None]
+
+    def _draw(self, data: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        model = self._model
+        with model:
+            saved = {
+                name: model[name].get_value(borrow=True)
+                for name in data
+                if isinstance(model[name], tt.sharedvar.SharedVariable)
+            }
             try:
-                values = posterior_predictive_draw_values(cast(List[Any], vars), strace, s)
-                new_trace: dict[str, np.ndarray] = {k.name: v for (k, v) in zip(vars, values)}
-                ppc_trace.extend_trace(new_trace)
-            except KeyboardInterrupt:
-                pass
+                set_data(data, model=model)
+                values = posterior_predictive_draw_values(self._vars, self._trace, len(self._trace))
+            finally:
+                for name, value in saved.items():
+                    model[name].set_value(value, borrow=True)
+        self._stats["evaluations"] += 1
+        return {var.name: value for var, value in zip(self._vars, values)}
 
-    if keep_size:
-        return {k: ary.reshape((nchains, ndraws, *ary.shape[1:])) for k, ary in ppc_trace.items()}
-    # this gets us a Dict[str, np.ndarray] instead of my wrapped equiv.
-    return ppc_trace.data
+
+def _data_rows(data: dict[str, np.ndarray]) -> int | None:
+    """The common length of the values of ``data``, or None if they differ."""
+    rows = {value.shape[0] if value.ndim else None for value in data.values()}
+    return rows.pop() if len(rows) == 1 else None
 
 
 def posterior_predictive_draw_values(
@@ -589,10 +1167,7 @@ class _PosteriorPredictiveSampler(AbstractContextManager):
                 if hasattr(param, "observations"):
                     # shape inspection for ObservedRV
                     dist_tmp = param.distribution
-                    try:
-                        distshape: tuple[int, ...] = tuple(param.observations.shape.eval())
-                    except AttributeError:
-                        distshape = tuple(param.observations.shape)
+                    distshape: tuple[int, ...] = _observed_shape(param.observations)
 
                     dist_tmp.shape = distshape
                     try:
@@ -683,12 +1258,7 @@ def _param_shape(var_desig, model: Model) -> tuple[int, ...]:
     else:
         v = var_desig
     if hasattr(v, "observations"):
-        try:
-            # To get shape of _observed_ data container `pm.Data`
-            # (wrapper for theano.SharedVariable) we evaluate it.
-            shape = tuple(v.observations.shape.eval())
-        except AttributeError:
-            shape = v.observations.shape
+        shape = _observed_shape(v.observations)
     elif hasattr(v, "dshape"):
         shape = v.dshape
     else:
@@ -696,3 +1266,17 @@ def _param_shape(var_desig, model: Model) -> tuple[int, ...]:
     if shape == (1,):
         shape = tuple()
     return shape
+
+
+def _observed_shape(observations) -> tuple[int, ...]:
+    """The shape of the observed data of a variable.
+
+    The shape of a data container `pm.Data` is read from its value, instead of
+    compiling a function that evaluates it.
+    """
+    if isinstance(observations, tt.sharedvar.SharedVariable):
+        return tuple(observations.get_value(borrow=True).shape)
+    try:
+        return tuple(observations.shape.eval())
+    except AttributeError:
+        return tuple(observations.shape)
@@ -12,18 +12,109 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-import collections
 import functools
+import hashlib
+import weakref
 
 import dill
+import numpy as np
 
 from pymc3.util import biwrap
 
 CACHE_REGISTRY = []
 
+_NO_ARGS = (hash(()), hash(()))
+
+
+class Cache(dict):
+    """A memoization cache with hit and miss statistics.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        If given, the least recently used entry is removed whenever the cache
+        has more than ``maxsize`` entries. By default the cache is unbounded.
+    """
+
+    def __init__(self, maxsize=None):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be positive, not %s" % maxsize)
+        super().__init__()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key, func, args=(), kwargs=None):
+        """Return the value of ``key``, computing it as ``func(*args, **kwargs)`` if it is missing."""
+        try:
+            value = self[key]
+        except KeyError:
+            self.misses += 1
+            value = self[key] = func(*args, **(kwargs or {}))
+            if self.maxsize and len(self) > self.maxsize:
+                # dicts keep the insertion order, the first key is the least recently used
+                del self[next(iter(self))]
+                self.evictions += 1
+        else:
+            self.hits += 1
+            if self.maxsize:
+                del self[key]
+                self[key] = value
+        return value
+
+    @property
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions, size=len(self))
+
+
+class WeakCache:
+    """Memoization caches that live as long as the first argument of the calls.
+
+    Calls whose first argument can not be weakly referenced are cached as if
+    the first argument was part of the key.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self._caches = weakref.WeakKeyDictionary()
+        self._strong = Cache(maxsize)
+
+    def cache_for(self, obj):
+        """The `Cache` of the calls with first argument ``obj``, or None."""
+        try:
+            cache = self._caches.get(obj)
+            if cache is None:
+                cache = self._caches[obj] = Cache(self.maxsize)
+        except TypeError:
+            return None
+        return cache
+
+    def _caches_list(self):
+        return list(self._caches.values()) + [self._strong]
+
+    @property
+    def stats(self):
+        return _sum_stats(self._caches_list())
+
+    def __len__(self):
+        return sum(len(cache) for cache in self._caches_list())
+
+    def clear(self):
+        self._caches.clear()
+        self._strong.clear()
+
+
+def _sum_stats(caches):
+    stats = dict(hits=0, misses=0, evictions=0, size=0)
+    for cache in caches:
+        for k, v in cache.stats.items():
+            stats[k] = stats.get(k, 0) + v
+    return stats
+
 
 @biwrap
-def memoize(obj, bound=False):
+def memoize(obj, bound=False, maxsize=None, weak=False):
     """
     Decorator to apply memoization to expensive functions.
     It uses a custom `hashable` helper function to hash typically unhashable Python objects.
@@ -35,28 +126,44 @@ def memoize(obj, bound=False):
     bound : bool
         indicates if the [obj] is a bound method (self as first argument)
         For bound methods, the cache is kept in a `_cache` attribute on [self].
+    maxsize : int, optional
+        The maximal number of cached results (per object for bound methods).
+        The least recently used results are removed first. Unbounded by default.
+    weak : bool
+        If True, the results of a call are kept only as long as its first argument
+        is alive. Not needed for bound methods, whose caches live on [self].
     """
     # this is declared not to be a bound method, so just attach new attr to obj
     if not bound:
-        obj.cache = {}
+        obj.cache = WeakCache(maxsize) if weak else Cache(maxsize)
         CACHE_REGISTRY.append(obj.cache)
+    name = obj.__name__
 
     @functools.wraps(obj)
     def memoizer(*args, **kwargs):
-        if not bound:
-            key = (hashable(args), hashable(kwargs))
-            cache = obj.cache
-        else:
+        if bound:
             # bound methods have self as first argument, remove it to compute key
-            key = (hashable(args[1:]), hashable(kwargs))
-            if not hasattr(args[0], "_cache"):
-                setattr(args[0], "_cache", collections.defaultdict(dict))
+            self = args[0]
+            try:
+                caches = self._cache
+            except AttributeError:
                 # do not add to cache registry
-            cache = getattr(args[0], "_cache")[obj.__name__]
-        if key not in cache:
-            cache[key] = obj(*args, **kwargs)
-
-        return cache[key]
+                caches = self._cache = {}
+            cache = caches.get(name)
+            if cache is None:
+                cache = caches[name] = Cache(maxsize)
+            key = (hashable(args[1:]), hashable(kwargs)) if len(args) > 1 or kwargs else _NO_ARGS
+        elif weak:
+            cache = obj.cache.cache_for(args[0]) if args else None
+            if cache is None:
+                cache = obj.cache._strong
+                key = (hashable(args), hashable(kwargs))
+            else:
+                key = (hashable(args[1:]), hashable(kwargs))
+        else:
+            cache = obj.cache
+            key = (hashable(args), hashable(kwargs))
+        return cache.lookup(key, obj, args, kwargs)
 
     return memoizer
 
@@ -73,6 +180,27 @@ def clear_cache(obj=None):
             obj.cache.clear()
 
 
+def cache_stats(obj=None):
+    """Return the numbers of hits, misses and evictions and the size of memoization caches.
+
+    Parameters
+    ----------
+    obj : optional
+        A memoized function or an object with memoized methods. By default the
+        statistics of all memoized functions are summed up.
+
+    Returns
+    -------
+    A dictionary with the keys ``hits``, ``misses``, ``evictions`` and ``size``,
+    plus any further counters kept by the summed up caches.
+    """
+    if obj is None:
+        return _sum_stats(CACHE_REGISTRY)
+    if isinstance(obj, WithMemoization):
+        return _sum_stats(getattr(obj, "_cache", {}).values())
+    return obj.cache.stats
+
+
 class WithMemoization:
     def __hash__(self):
         return hash(id(self))
@@ -90,6 +218,7 @@ def hashable(a) -> int:
     """
     Hashes many kinds of objects, including some that are unhashable through the builtin `hash` function.
     Lists and tuples are hashed based on their elements.
+    Numpy arrays are hashed based on their dtype, shape and a digest of their data.
     """
     if isinstance(a, dict):
         # first hash the keys and values with hashable
@@ -99,6 +228,9 @@ def hashable(a) -> int:
         # lists are mutable and not hashable by default
         # for memoization, we need the hash to depend on the items
         return hash(tuple(hashable(i) for i in a))
+    if isinstance(a, np.ndarray) and not a.dtype.hasobject:
+        digest = hashlib.blake2b(np.ascontiguousarray(a).data, digest_size=16).digest()
+        return hash((a.dtype.str, a.shape, digest))
     try:
         return hash(a)
     except TypeError:
@@ -27,18 +27,19 @@ import theano.graph.basic
 import theano.sparse as sparse
 import theano.tensor as tt
 
-from pandas import Series
 from theano.compile import SharedVariable
 from theano.graph.basic import Apply
 from theano.tensor.var import TensorVariable
 
 import pymc3 as pm
 
+from pymc3 import compile_cache
 from pymc3.blocking import ArrayOrdering, DictToArrayBijection
+from pymc3.compression import compress_logp
 from pymc3.exceptions import ImputationWarning
 from pymc3.math import flatten_list
 from pymc3.memoize import WithMemoization, memoize
-from pymc3.theanof import floatX, generator, gradient, hessian, inputvars
+from pymc3.theanof import batched, floatX, generator, gradient, hessian, inputvars
 from pymc3.util import get_transformed_name, get_var_name
 from pymc3.vartypes import continuous_types, discrete_types, isgenerator, typefilter
 
@@ -611,6 +612,14 @@ class ValueGradFunction:
         The profiling object of the theano function that computes value and
         gradient. This is None unless `profile=True` was set in the
         kwargs.
+
+    Notes
+    -----
+    `batch` and `batch_logp` evaluate the function at many points in one
+    call. The theano functions for this are compiled on first use.
+
+    If `pymc3.compile_cache` is enabled, the compiled functions are loaded
+    from the cache when possible.
     """
 
     def __init__(
@@ -697,7 +706,12 @@ class ValueGradFunction:
 
         inputs = [self._vars_joined]
 
-        self._theano_function = theano.function(inputs, outputs, givens=givens, **kwargs)
+        self._theano_function = compile_cache.function(inputs, outputs, givens=givens, **kwargs)
+
+        self._compute_grads = compute_grads
+        self._givens = givens
+        self._theano_kwargs = kwargs
+        self._batch_functions = {}
 
     def set_weights(self, values):
         if values.shape != (self._n_costs - 1,):
@@ -739,6 +753,75 @@ class ValueGradFunction:
             np.copyto(out, output[1])
             return output[0]
 
+    def batch(self, array):
+        """Compute the values and gradients at the points in the rows of `array`.
+
+        Parameters
+        ----------
+        array: array of shape (n, size)
+            The points, one per row.
+
+        Returns
+        -------
+        logp, dlogp
+        logp: array of shape (n,)
+        dlogp: array of shape (n, size)
+        """
+        if not self._compute_grads:
+            raise ValueError("The function does not compute gradients.")
+        self._check_batch(array)
+        if len(array) == 0:
+            return np.empty(0, dtype=self.dtype), np.empty((0, self.size), dtype=self.dtype)
+        return self._batch_function(True)(array)
+
+    def batch_logp(self, array):
+        """Compute the values at the points in the rows of `array`.
+
+        Returns an array of shape (n,).
+        """
+        self._check_batch(array)
+        if len(array) == 0:
+            return np.empty(0, dtype=self.dtype)
+        return self._batch_function(False)(array)[0]
+
+    def _check_batch(self, array):
+        if not self._extra_are_set:
+            raise ValueError("Extra values are not set.")
+
+        if array.ndim != 2 or array.shape[1] != self.size:
+            raise ValueError(
+                "Invalid shape for array. Must be {} but is {}.".format(
+                    ("n", self.size), array.shape
+                )
+            )
+
+    def _batch_function(self, compute_grads):
+        """Return the compiled batched function, building it on first use.
+
+        A failure to build it is raised again on later calls instead of
+        building it again.
+        """
+        if compute_grads not in self._batch_functions:
+            try:
+                with theano.config.change_flags(compute_test_value="ignore"):
+                    (cost,), (inputs,) = batched(
+                        [self._cost_joined], [self._vars_joined], name="batch_logp"
+                    )
+                    outputs = [cost]
+                    if compute_grads:
+                        # The rows are independent, so this is the gradient of every row
+                        outputs.append(tt.grad(cost.sum(), inputs))
+                self._batch_functions[compute_grads] = compile_cache.function(
+                    [inputs], outputs, givens=self._givens, **self._theano_kwargs
+                )
+            except Exception as err:
+                self._batch_functions[compute_grads] = err
+                raise
+        function = self._batch_functions[compute_grads]
+        if isinstance(function, Exception):
+            raise function
+        return function
+
     @property
     def profile(self):
         """Profiling information of the underlying theano function."""
@@ -1109,7 +1192,7 @@ class Model(Factor, WithMemoization, metaclass=ContextMeta):
             else:
                 self.coords[name] = coords[name]
 
-    def Var(self, name, dist, data=None, total_size=None, dims=None):
+    def Var(self, name, dist, data=None, total_size=None, dims=None, compress=False):
         """Create and add (un)observed random variable to the model with an
         appropriate prior distribution.
 
@@ -1124,12 +1207,22 @@ class Model(Factor, WithMemoization, metaclass=ContextMeta):
             upscales logp of variable with ``coef = total_size/var.shape[0]``
         dims : tuple
             Dimension names for the variable.
+        compress: bool or str
+            Evaluate the logp of observed data over its unique rows only, weighted
+            by the number of times they occur. With "sufficient", or True for
+            distributions with sufficient statistics, it is evaluated once per
+            unique row of the parameters from the sufficient statistics of the data.
+            With "rows" it is always evaluated per unique row of the data and the
+            parameters. The data must be a numpy array without missing values, and
+            the parameters may only vary along its rows with constants.
 
         Returns
         -------
         FreeRV or ObservedRV
         """
         name = self.name_for(name)
+        if compress and (data is None or isinstance(data, dict)):
+            raise ValueError("Only observed variables with one data array can be compressed.")
 
         if data is None:
             if getattr(dist, "transform", None) is None:
@@ -1179,6 +1272,7 @@ class Model(Factor, WithMemoization, metaclass=ContextMeta):
                     distribution=dist,
                     total_size=total_size,
                     model=self,
+                    compress=compress,
                 )
             self.observed_RVs.append(var)
             if var.missing_values:
@@ -1250,7 +1344,7 @@ class Model(Factor, WithMemoization, metaclass=ContextMeta):
         Compiled Theano function
         """
         with self:
-            return theano.function(
+            return compile_cache.function(
                 self.vars,
                 outs,
                 allow_input_downcast=True,
@@ -1376,6 +1470,8 @@ class Model(Factor, WithMemoization, metaclass=ContextMeta):
         -------
         Pandas Series
         """
+        from pandas import Series
+
         if test_point is None:
             test_point = self.test_point
 
@@ -1792,6 +1888,7 @@ class ObservedRV(Factor, PyMC3Variable):
         distribution=None,
         total_size=None,
         model=None,
+        compress=False,
     ):
         """
         Parameters
@@ -1803,6 +1900,8 @@ class ObservedRV(Factor, PyMC3Variable):
         model: Model
         total_size: scalar Tensor (optional)
             needed for upscaling logp
+        compress: bool or str
+            compress the logp over the unique rows of the data, see `Model.Var`
         """
         from pymc3.distributions import TensorType
 
@@ -1827,8 +1926,18 @@ class ObservedRV(Factor, PyMC3Variable):
             self.logp_elemwiset = distribution.logp(data)
             # The logp might need scaling in minibatches.
             # This is done in `Factor`.
-            self.logp_sum_unscaledt = distribution.logp_sum(data)
-            self.logp_nojac_unscaledt = distribution.logp_nojac(data)
+            if compress:
+                if self.missing_values is not None or not isinstance(self.observations, np.ndarray):
+                    raise ValueError(
+                        "Only observed data in numpy arrays without missing values "
+                        "can be compressed."
+                    )
+                self.logp_sum_unscaledt, self.logp_nojac_unscaledt = compress_logp(
+                    distribution, self.observations.astype(distribution.dtype), compress
+                )
+            else:
+                self.logp_sum_unscaledt = distribution.logp_sum(data)
+                self.logp_nojac_unscaledt = distribution.logp_nojac(data)
             self.total_size = total_size
             self.model = model
             self.distribution = distribution
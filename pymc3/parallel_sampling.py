@@ -28,6 +28,7 @@ import numpy as np
 from fastprogress.fastprogress import progress_bar
 
 from pymc3 import theanof
+from pymc3.checkpoint import chain_state
 from pymc3.exceptions import SamplingError
 
 logger = logging.getLogger("pymc3")
@@ -69,17 +70,71 @@ def rebuild_exc(exc, tb):
 
 # Messages
 # ('writing_done', is_last, sample_idx, tuning, stats, warns)
+# ('draws_done', is_last, first_sample_idx, tunings, stats, warns)
+# ('checkpoint', state)
 # ('error', warnings, *exception_info)
 
 # ('abort', reason)
 # ('write_next',)
+# ('consumed', num_draws)
 # ('start',)
+# ('job', draws, tune, seed, data)
+
+
+class _SharedEstimates:
+    """The estimates of the mass matrix of all chains in shared memory.
+
+    Each chain publishes its estimate into its own row, and reads the rows
+    of the other chains, see `quadpotential._PoolMixin`. Rows of chains that
+    did not publish yet contain zeros, which means no samples.
+    """
+
+    def __init__(self, array, lock, chain, chains):
+        self._values = np.frombuffer(array, "d").reshape(chains, -1)
+        self._lock = lock
+        self._chain = chain
+
+    def publish(self, values):
+        with self._lock:
+            self._values[self._chain] = values
+
+    def others(self):
+        with self._lock:
+            values = self._values.copy()
+        return np.delete(values, self._chain, axis=0)
+
+
+def _pooled_potentials(step_method):
+    """The adaptive mass matrices of a step method that support pooling across chains."""
+    methods = getattr(step_method, "methods", [step_method])
+    potentials = [getattr(method, "potential", None) for method in methods]
+    return [potential for potential in potentials if hasattr(potential, "pool_size")]
+
+
+# Upper limit for the memory used by the ring buffer of a single chain
+# if the `ring` transport is used and no explicit `ring_size` was given.
+_RING_BUFFER_BYTES = 2 ** 25
+_MAX_RING_SIZE = 256
 
 
 class _Process:
     """Seperate process for each chain.
     We communicate with the main process using a pipe,
     and send finished samples using shared memory.
+
+    If `ring_size` is set, the shared memory holds a ring buffer with
+    `ring_size` draws for each variable. The process writes draws into
+    the ring as long as there are free slots and only sends one
+    message for each batch of draws. Otherwise each draw is written to a
+    single shared point after the main process asked for it.
+
+    If `checkpoint_every` is set, the process sends the state of the chain
+    (see `pymc3.checkpoint.chain_state`) after every `checkpoint_every`
+    draws. A chain continues from such a state if it is passed as `resume`.
+
+    If `adaptation_pool` is set, it is a tuple `(arrays, lock, chain, chains)`
+    with one shared array for each adaptive mass matrix of the step method,
+    through which the chains pool their estimates of the mass matrices.
     """
 
     def __init__(
@@ -93,6 +148,10 @@ class _Process:
         tune: int,
         seed,
         pickle_backend,
+        ring_size=None,
+        checkpoint_every=None,
+        resume=None,
+        adaptation_pool=None,
     ):
         self._msg_pipe = msg_pipe
         self._step_method = step_method
@@ -103,6 +162,10 @@ class _Process:
         self._draws = draws
         self._tune = tune
         self._pickle_backend = pickle_backend
+        self._ring_size = ring_size
+        self._checkpoint_every = checkpoint_every
+        self._resume = resume
+        self._adaptation_pool = adaptation_pool
 
     def _unpickle_step_method(self):
         unpickle_error = (
@@ -133,6 +196,7 @@ class _Process:
             # We do not create this in __init__, as pickling this
             # would destroy the shared memory.
             self._unpickle_step_method()
+            self._connect_adaptation_pool()
             self._point = self._make_numpy_refs()
             self._start_loop()
         except KeyboardInterrupt:
@@ -146,6 +210,13 @@ class _Process:
         finally:
             self._msg_pipe.close()
 
+    def _connect_adaptation_pool(self):
+        if self._adaptation_pool is None:
+            return
+        arrays, lock, chain, chains = self._adaptation_pool
+        for potential, array in zip(_pooled_potentials(self._step_method), arrays):
+            potential.set_pool(_SharedEstimates(array, lock, chain, chains))
+
     def _wait_for_abortion(self):
         while True:
             msg = self._recv_msg()
@@ -158,7 +229,14 @@ class _Process:
         for name, (shape, dtype) in shape_dtypes.items():
             array = self._shared_point[name]
             self._shared_point[name] = array
-            point[name] = np.frombuffer(array, dtype).reshape(shape)
+            if self._ring_size is None:
+                point[name] = np.frombuffer(array, dtype).reshape(shape)
+            else:
+                point[name] = np.frombuffer(array, dtype).reshape((self._ring_size,) + shape)
+        if self._ring_size is not None:
+            self._ring = point
+            # The main process stores the start point in the first slot
+            point = {name: ring[0].copy() for name, ring in self._ring.items()}
         return point
 
     def _write_point(self, point):
@@ -172,15 +250,34 @@ class _Process:
         np.random.seed(self._seed)
         theanof.set_tt_rng(self._tt_seed)
 
-        draw = 0
-        tuning = True
-
         msg = self._recv_msg()
         if msg[0] == "abort":
             raise KeyboardInterrupt()
         if msg[0] != "start":
             raise ValueError("Unexpected msg " + msg[0])
 
+        first_draw = 0
+        if self._resume is not None:
+            np.random.set_state(self._resume["rng"])
+            first_draw = self._resume["draw"]
+
+        if self._ring_size is None:
+            self._pipe_loop(first_draw)
+        else:
+            self._ring_loop(first_draw)
+
+    def _checkpoint_due(self, draw):
+        every = self._checkpoint_every
+        return every is not None and draw % every == 0 and draw < self._draws + self._tune
+
+    def _send_checkpoint(self, draw):
+        state = chain_state(self._step_method, self._point, draw, self._pickle_backend)
+        self._msg_pipe.send(("checkpoint", state))
+
+    def _pipe_loop(self, first_draw=0):
+        draw = first_draw
+        tuning = first_draw < self._tune
+
         while True:
             if draw == self._tune:
                 self._step_method.stop_tuning()
@@ -208,9 +305,81 @@ class _Process:
                     warns = None
                 self._msg_pipe.send(("writing_done", is_last, draw, tuning, stats, warns))
                 draw += 1
+                if self._checkpoint_due(draw):
+                    self._send_checkpoint(draw)
             else:
                 raise ValueError("Unknown message " + msg[0])
 
+    def _ring_loop(self, first_draw=0):
+        ring_size = self._ring_size
+        batch_size = max(1, ring_size // 2)
+        n_total = self._draws + self._tune
+        self._free_slots = ring_size
+
+        draw = first_draw
+        first = first_draw
+        last_batch_size = 0
+        tuning = first_draw < self._tune
+        tunings = []
+        stats_batch = []
+
+        while draw < n_total:
+            if draw == self._tune:
+                self._step_method.stop_tuning()
+                tuning = False
+
+            try:
+                point, stats = self._compute_point()
+            except SamplingError as e:
+                warns = self._collect_warnings()
+                e = ExceptionWithTraceback(e, e.__traceback__)
+                self._msg_pipe.send(("error", warns, e))
+                self._wait_for_abortion()
+                raise KeyboardInterrupt()
+
+            # Wait until the main process copied enough draws out of the ring
+            while self._free_slots == 0:
+                self._handle_ring_msg(self._recv_msg())
+            while self._msg_pipe.poll():
+                self._handle_ring_msg(self._recv_msg())
+
+            slot = draw % ring_size
+            for name, vals in point.items():
+                self._ring[name][slot] = vals
+            self._point = point
+            self._free_slots -= 1
+            tunings.append(tuning)
+            stats_batch.append(stats)
+            draw += 1
+
+            is_last = draw == n_total
+            checkpoint = self._checkpoint_due(draw)
+            if is_last or checkpoint or len(tunings) >= batch_size or self._free_slots == 0:
+                if is_last:
+                    warns = self._collect_warnings()
+                else:
+                    warns = None
+                self._msg_pipe.send(("draws_done", is_last, first, tunings, stats_batch, warns))
+                last_batch_size = len(tunings)
+                first = draw
+                tunings = []
+                stats_batch = []
+            if checkpoint:
+                self._send_checkpoint(draw)
+
+        # The main process still releases the slots of the earlier batches,
+        # so we must not close the pipe before it is done with them.
+        while ring_size - self._free_slots > last_batch_size:
+            self._handle_ring_msg(self._recv_msg())
+
+    def _handle_ring_msg(self, msg):
+        if msg[0] == "abort":
+            raise KeyboardInterrupt()
+        elif msg[0] == "consumed":
+            self._free_slots += msg[1]
+        else:
+            raise ValueError("Unknown message " + msg[0])
+
     def _compute_point(self):
         if self._step_method.generates_stats:
             point, stats = self._step_method.step(self._point)
@@ -226,12 +395,71 @@ class _Process:
             return []
 
 
+class _PoolProcess(_Process):
+    """Chain process that keeps its step method between sampling jobs.
+
+    The step method is sent together with its model, so that new values
+    for `pm.Data` containers can be set in the process. After each job the
+    process waits for the next `job` message instead of shutting down.
+    """
+
+    def _unpickle_step_method(self):
+        super()._unpickle_step_method()
+        self._step_method, self._model = self._step_method
+        # `stop_tuning` switches the tuning flags off, so we keep the
+        # initial values around for the next job.
+        self._tune_flags = [getattr(method, "tune", None) for method in self._methods()]
+
+    def _methods(self):
+        return getattr(self._step_method, "methods", [self._step_method])
+
+    def _reset_step_method(self):
+        for method, tune in zip(self._methods(), self._tune_flags):
+            if hasattr(method, "reset_tuning"):
+                method.reset_tuning()
+            if tune is not None:
+                method.tune = tune
+
+    def _start_loop(self):
+        from pymc3.model import set_data
+
+        while True:
+            msg = self._recv_msg()
+            if msg[0] == "abort":
+                raise KeyboardInterrupt()
+            if msg[0] != "job":
+                raise ValueError("Unexpected msg " + msg[0])
+
+            self._draws, self._tune, self._seed, data = msg[1:]
+            self._tt_seed = self._seed + 1
+            if data:
+                set_data(data, model=self._model)
+            if self._ring_size is not None:
+                self._point = {name: ring[0].copy() for name, ring in self._ring.items()}
+            self._reset_step_method()
+
+            super()._start_loop()
+
+
 def _run_process(*args):
     _Process(*args).run()
 
 
+def _run_pool_process(*args):
+    _PoolProcess(*args).run()
+
+
 class ProcessAdapter:
-    """Control a Chain process from the main thread."""
+    """Control a Chain process from the main thread.
+
+    With a checkpoint ``resume``, the process unpickles the step method
+    of the checkpoint and continues the chain from its point and random
+    state.
+
+    ``adaptation_pool`` is passed on to the process, see `_Process`.
+    """
+
+    _target = staticmethod(_run_process)
 
     def __init__(
         self,
@@ -244,26 +472,46 @@ class ProcessAdapter:
         start,
         mp_ctx,
         pickle_backend,
+        ring_size=None,
+        checkpoint_every=None,
+        resume=None,
+        adaptation_pool=None,
     ):
+        if resume is not None:
+            step_method_pickled = resume["step"]
+            pickle_backend = resume["pickle_backend"]
+            start = resume["point"]
+            resume = {"draw": resume["draw"], "rng": resume["rng"]}
         self.chain = chain
+        # The shared memory and lock must live until the process got them
+        self._adaptation_pool = adaptation_pool
         process_name = "worker_chain_%s" % chain
         self._msg_pipe, remote_conn = multiprocessing.Pipe()
+        self._ring_size = ring_size
 
         self._shared_point = {}
         self._point = {}
+        self._ring = {}
         for name, (shape, dtype) in step_method.vars_shape_dtype.items():
             size = 1
             for dim in shape:
                 size *= int(dim)
             size *= dtype.itemsize
+            if ring_size is not None:
+                size *= ring_size
             if size != ctypes.c_size_t(size).value:
                 raise ValueError("Variable %s is too large" % name)
 
             array = mp_ctx.RawArray("c", size)
             self._shared_point[name] = array
-            array_np = np.frombuffer(array, dtype).reshape(shape)
-            array_np[...] = start[name]
-            self._point[name] = array_np
+            if ring_size is None:
+                array_np = np.frombuffer(array, dtype).reshape(shape)
+                array_np[...] = start[name]
+                self._point[name] = array_np
+            else:
+                array_np = np.frombuffer(array, dtype).reshape((ring_size,) + shape)
+                array_np[0] = start[name]
+                self._ring[name] = array_np
 
         self._readable = True
         self._num_samples = 0
@@ -271,12 +519,12 @@ class ProcessAdapter:
         if step_method_pickled is not None:
             step_method_send = step_method_pickled
         else:
-            step_method_send = step_method
+            step_method_send = self._step_method_payload(step_method)
 
         self._process = mp_ctx.Process(
             daemon=True,
             name=process_name,
-            target=_run_process,
+            target=self._target,
             args=(
                 process_name,
                 remote_conn,
@@ -287,6 +535,10 @@ class ProcessAdapter:
                 tune,
                 seed,
                 pickle_backend,
+                ring_size,
+                checkpoint_every,
+                resume,
+                adaptation_pool,
             ),
         )
         self._process.start()
@@ -294,6 +546,9 @@ class ProcessAdapter:
         # end is closed.
         remote_conn.close()
 
+    def _step_method_payload(self, step_method):
+        return step_method
+
     @property
     def shared_point_view(self):
         """May only be written to or read between a `recv_draw`
@@ -303,6 +558,18 @@ class ProcessAdapter:
             raise RuntimeError()
         return self._point
 
+    def read_ring(self, first, num_draws):
+        """Copy `num_draws` draws starting at `first` out of the ring buffer.
+
+        Returns a dictionary with an array of shape `(num_draws, *shape)`
+        for each variable. The slots can be released with `consume`
+        after this call.
+        """
+        if not self._readable:
+            raise RuntimeError()
+        idxs = np.arange(first, first + num_draws) % self._ring_size
+        return {name: ring[idxs] for name, ring in self._ring.items()}
+
     def _send(self, msg, *args):
         try:
             self._msg_pipe.send((msg, *args))
@@ -329,6 +596,10 @@ class ProcessAdapter:
         self._readable = False
         self._send("write_next")
 
+    def consume(self, num_draws):
+        self._readable = False
+        self._send("consumed", num_draws)
+
     def abort(self):
         self._send("abort")
 
@@ -339,16 +610,26 @@ class ProcessAdapter:
         self._process.terminate()
 
     @staticmethod
-    def recv_draw(processes, timeout=3600):
+    def recv_draw(processes, timeout=3600, on_checkpoint=None):
+        """Wait for the next draws of one of the processes.
+
+        Checkpoint states that arrive in the meantime are passed to
+        ``on_checkpoint(chain, state)``.
+        """
         if not processes:
             raise ValueError("No processes.")
         pipes = [proc._msg_pipe for proc in processes]
-        ready = multiprocessing.connection.wait(pipes)
-        if not ready:
-            raise multiprocessing.TimeoutError("No message from samplers.")
         idxs = {id(proc._msg_pipe): proc for proc in processes}
-        proc = idxs[id(ready[0])]
-        msg = ready[0].recv()
+        while True:
+            ready = multiprocessing.connection.wait(pipes)
+            if not ready:
+                raise multiprocessing.TimeoutError("No message from samplers.")
+            proc = idxs[id(ready[0])]
+            msg = ready[0].recv()
+            if msg[0] != "checkpoint":
+                break
+            if on_checkpoint is not None:
+                on_checkpoint(proc.chain, msg[1])
 
         if msg[0] == "error":
             warns, old_error = msg[1:]
@@ -361,6 +642,10 @@ class ProcessAdapter:
             proc._readable = True
             proc._num_samples += 1
             return (proc,) + msg[1:]
+        elif msg[0] == "draws_done":
+            proc._readable = True
+            proc._num_samples += len(msg[3])
+            return (proc,) + msg[1:]
         else:
             raise ValueError("Sampler sent bad message.")
 
@@ -389,10 +674,78 @@ class ProcessAdapter:
                 process.join()
 
 
+class PoolProcessAdapter(ProcessAdapter):
+    """Control a chain process of a `SamplerPool` from the main thread.
+
+    The process gets the step method together with its model, so
+    `step_method_pickled` must contain the tuple `(step_method, model)`.
+    Sampling jobs are sent with `submit`.
+    """
+
+    _target = staticmethod(_run_pool_process)
+
+    def __init__(
+        self,
+        step_method,
+        model,
+        step_method_pickled,
+        chain: int,
+        start,
+        mp_ctx,
+        pickle_backend,
+        ring_size=None,
+    ):
+        self._model = model
+        super().__init__(
+            0,
+            0,
+            step_method,
+            step_method_pickled,
+            chain,
+            0,
+            start,
+            mp_ctx,
+            pickle_backend,
+            ring_size,
+        )
+
+    def _step_method_payload(self, step_method):
+        return step_method, self._model
+
+    def is_alive(self):
+        return self._process.is_alive()
+
+    def submit(self, draws: int, tune: int, seed, start, data=None):
+        """Start a new sampling job in the process.
+
+        The process begins to sample after a call to `start`.
+        """
+        for name, value in start.items():
+            if name not in self._shared_point:
+                continue
+            if self._ring_size is None:
+                self._point[name][...] = value
+            else:
+                self._ring[name][0] = value
+        self._num_samples = 0
+        self._send("job", draws, tune, seed, data)
+
+
 Draw = namedtuple("Draw", ["chain", "is_last", "draw_idx", "tuning", "stats", "point", "warnings"])
 
 
 class ParallelSampler:
+    """Sample chains in parallel processes.
+
+    With `pool_adaptation`, the chains share the estimates of their adaptive
+    mass matrices through shared memory. Each chain adapts its mass matrix to
+    the estimate of all chains together, so the chains need fewer tuning
+    draws. The chains read the latest estimates of the other chains whenever
+    they update their mass matrix, without waiting for them. The draws thus
+    depend on the timing of the processes, and are not reproducible with a
+    fixed seed.
+    """
+
     def __init__(
         self,
         draws: int,
@@ -406,42 +759,56 @@ class ParallelSampler:
         progressbar: bool = True,
         mp_ctx=None,
         pickle_backend: str = "pickle",
+        transport: str = "pipe",
+        ring_size: int = None,
+        processes: list = None,
+        checkpoint_every: int = None,
+        resume: list = None,
+        on_checkpoint=None,
+        pool_adaptation: bool = False,
     ):
 
         if any(len(arg) != chains for arg in [seeds, start_points]):
             raise ValueError("Number of seeds and start_points must be %s." % chains)
 
-        if mp_ctx is None or isinstance(mp_ctx, str):
-            # Closes issue https://github.com/pymc-devs/pymc3/issues/3849
-            if platform.system() == "Darwin":
-                mp_ctx = "forkserver"
-            mp_ctx = multiprocessing.get_context(mp_ctx)
-
-        step_method_pickled = None
-        if mp_ctx.get_start_method() != "fork":
-            if pickle_backend == "pickle":
-                step_method_pickled = pickle.dumps(step_method, protocol=-1)
-            elif pickle_backend == "dill":
-                try:
-                    import dill
-                except ImportError:
-                    raise ValueError("dill must be installed for pickle_backend='dill'.")
-                step_method_pickled = dill.dumps(step_method, protocol=-1)
-
-        self._samplers = [
-            ProcessAdapter(
+        if transport == "pipe":
+            ring_size = None
+        elif transport == "ring":
+            if ring_size is None:
+                ring_size = _default_ring_size(step_method.vars_shape_dtype)
+            if ring_size < 1:
+                raise ValueError("ring_size must be at least 1.")
+        else:
+            raise ValueError("Unknown transport '%s'. Must be 'pipe' or 'ring'." % transport)
+        self._ring_size = ring_size
+
+        if processes is not None:
+            # Running processes of a `SamplerPool` that already got their job
+            if len(processes) != chains:
+                raise ValueError("Number of processes must be %s." % chains)
+            if pool_adaptation:
+                raise ValueError("Pooled adaptation is not supported in a SamplerPool.")
+            self._samplers = list(processes)
+            self._ring_size = processes[0]._ring_size
+            self._keep_alive = True
+        else:
+            self._samplers = self._start_processes(
                 draws,
                 tune,
+                chains,
+                seeds,
+                start_points,
                 step_method,
-                step_method_pickled,
-                chain + start_chain_num,
-                seed,
-                start,
+                start_chain_num,
                 mp_ctx,
                 pickle_backend,
+                ring_size,
+                checkpoint_every,
+                resume,
+                pool_adaptation,
             )
-            for chain, seed, start in zip(range(chains), seeds, start_points)
-        ]
+            self._keep_alive = False
+        self._on_checkpoint = on_checkpoint
 
         self._inactive = self._samplers.copy()
         self._finished = []
@@ -453,20 +820,90 @@ class ParallelSampler:
 
         self._progress = None
         self._divergences = 0
-        self._total_draws = 0
+        # Draws of resumed chains that were made before the checkpoint
+        self._total_draws = sum(state["draw"] for state in resume or [] if state is not None)
         self._desc = "Sampling {0._chains:d} chains, {0._divergences:,d} divergences"
         self._chains = chains
         if progressbar:
             self._progress = progress_bar(range(chains * (draws + tune)), display=progressbar)
             self._progress.comment = self._desc.format(self)
 
+    @staticmethod
+    def _start_processes(
+        draws,
+        tune,
+        chains,
+        seeds,
+        start_points,
+        step_method,
+        start_chain_num,
+        mp_ctx,
+        pickle_backend,
+        ring_size,
+        checkpoint_every=None,
+        resume=None,
+        pool_adaptation=False,
+    ):
+        mp_ctx = _get_mp_ctx(mp_ctx)
+        step_method_pickled = _pickle_step_method(step_method, mp_ctx, pickle_backend)
+        if resume is None:
+            resume = [None] * chains
+        pools = [None] * chains
+        if pool_adaptation:
+            potentials = _pooled_potentials(step_method)
+            if not potentials:
+                raise ValueError(
+                    "Pooled adaptation needs a step method with an adaptive mass matrix "
+                    "that supports pooling, like QuadPotentialDiagAdapt."
+                )
+            arrays = [mp_ctx.RawArray("d", chains * pot.pool_size) for pot in potentials]
+            lock = mp_ctx.Lock()
+            pools = [(arrays, lock, chain, chains) for chain in range(chains)]
+        return [
+            ProcessAdapter(
+                draws,
+                tune,
+                step_method,
+                step_method_pickled,
+                chain + start_chain_num,
+                seed,
+                start,
+                mp_ctx,
+                pickle_backend,
+                ring_size,
+                checkpoint_every,
+                state,
+                pool,
+            )
+            for chain, seed, start, state, pool in zip(
+                range(chains), seeds, start_points, resume, pools
+            )
+            # Finished chains need no process
+            if state is None or not state["complete"]
+        ]
+
     def _make_active(self):
         while self._inactive and len(self._active) < self._max_active:
             proc = self._inactive.pop(0)
             proc.start()
-            proc.write_next()
+            if self._ring_size is None:
+                proc.write_next()
             self._active.append(proc)
 
+    def _count_draw(self, tuning, stats):
+        self._total_draws += 1
+        if not tuning and stats and stats[0].get("diverging"):
+            self._divergences += 1
+            if self._progress:
+                self._progress.comment = self._desc.format(self)
+
+    def _finish(self, proc):
+        if not self._keep_alive:
+            proc.join()
+        self._active.remove(proc)
+        self._finished.append(proc)
+        self._make_active()
+
     def __iter__(self):
         if not self._in_context:
             raise ValueError("Use ParallelSampler as context manager.")
@@ -475,22 +912,21 @@ class ParallelSampler:
         if self._active and self._progress:
             self._progress.update(self._total_draws)
 
+        if self._ring_size is None:
+            yield from self._iter_pipe()
+        else:
+            yield from self._iter_ring()
+
+    def _iter_pipe(self):
         while self._active:
-            draw = ProcessAdapter.recv_draw(self._active)
+            draw = ProcessAdapter.recv_draw(self._active, on_checkpoint=self._on_checkpoint)
             proc, is_last, draw, tuning, stats, warns = draw
-            self._total_draws += 1
-            if not tuning and stats and stats[0].get("diverging"):
-                self._divergences += 1
-                if self._progress:
-                    self._progress.comment = self._desc.format(self)
+            self._count_draw(tuning, stats)
             if self._progress:
                 self._progress.update(self._total_draws)
 
             if is_last:
-                proc.join()
-                self._active.remove(proc)
-                self._finished.append(proc)
-                self._make_active()
+                self._finish(proc)
 
             # We could also yield proc.shared_point_view directly,
             # and only call proc.write_next() after the yield returns.
@@ -504,14 +940,83 @@ class ParallelSampler:
 
             yield Draw(proc.chain, is_last, draw, tuning, stats, point, warns)
 
+    def _iter_ring(self):
+        while self._active:
+            batch = ProcessAdapter.recv_draw(self._active, on_checkpoint=self._on_checkpoint)
+            proc, is_last, first, tunings, stats, warns = batch
+            num_draws = len(tunings)
+            for tuning, draw_stats in zip(tunings, stats):
+                self._count_draw(tuning, draw_stats)
+            if self._progress:
+                self._progress.update(self._total_draws)
+
+            # Copy the whole batch at once, so that the worker can
+            # reuse the slots while we hand out the draws.
+            values = proc.read_ring(first, num_draws)
+
+            if is_last:
+                self._finish(proc)
+            else:
+                proc.consume(num_draws)
+
+            for i in range(num_draws):
+                point = {name: vals[i] for name, vals in values.items()}
+                last = is_last and i == num_draws - 1
+                yield Draw(
+                    proc.chain,
+                    last,
+                    first + i,
+                    tunings[i],
+                    stats[i],
+                    point,
+                    warns if last else None,
+                )
+
     def __enter__(self):
         self._in_context = True
         return self
 
-    def __exit__(self, *args):
+    def __exit__(self, exc_type, *args):
+        # Processes of a pool survive the job, unless it failed half way
+        if self._keep_alive and exc_type is None and not self._inactive and not self._active:
+            return
         ProcessAdapter.terminate_all(self._samplers)
 
 
+def _get_mp_ctx(mp_ctx):
+    if mp_ctx is None or isinstance(mp_ctx, str):
+        # Closes issue https://github.com/pymc-devs/pymc3/issues/3849
+        if platform.system() == "Darwin":
+            mp_ctx = "forkserver"
+        mp_ctx = multiprocessing.get_context(mp_ctx)
+    return mp_ctx
+
+
+def _pickle_step_method(step_method, mp_ctx, pickle_backend):
+    """Pickle the step method if the processes do not inherit it through fork."""
+    if mp_ctx.get_start_method() == "fork":
+        return None
+    if pickle_backend == "pickle":
+        return pickle.dumps(step_method, protocol=-1)
+    elif pickle_backend == "dill":
+        try:
+            import dill
+        except ImportError:
+            raise ValueError("dill must be installed for pickle_backend='dill'.")
+        return dill.dumps(step_method, protocol=-1)
+    return None
+
+
+def _default_ring_size(vars_shape_dtype):
+    """Choose the number of draws in the ring buffer of a chain."""
+    point_size = 0
+    for shape, dtype in vars_shape_dtype.values():
+        point_size += int(np.prod(shape, dtype=int)) * dtype.itemsize
+    if point_size == 0:
+        return _MAX_RING_SIZE
+    return int(np.clip(_RING_BUFFER_BYTES // point_size, 1, _MAX_RING_SIZE))
+
+
 def _cpu_count():
     """Try to guess the number of CPUs in the system.
 
@@ -16,6 +16,7 @@
 
 import collections.abc as abc
 import logging
+import os
 import pickle
 import sys
 import time
@@ -25,27 +26,33 @@ from collections import defaultdict
 from copy import copy, deepcopy
 from typing import Any, Dict, Iterable, List, Optional, Set, Union, cast
 
-import arviz
 import numpy as np
-import packaging
+import packaging.version
 import theano.gradient as tg
-import xarray
 
-from arviz import InferenceData
 from fastprogress.fastprogress import progress_bar
 
 import pymc3 as pm
 
+from pymc3 import checkpoint as checkpoints
+from pymc3 import compile_cache
 from pymc3.backends.base import BaseTrace, MultiTrace
+from pymc3.backends.memmap import MemmapTrace
 from pymc3.backends.ndarray import NDArray
+from pymc3.backends.summary import OnlineStats, SummaryTrace, split_rhat
 from pymc3.distributions.distribution import draw_values
-from pymc3.distributions.posterior_predictive import fast_sample_posterior_predictive
+from pymc3.distributions.posterior_predictive import (
+    PredictiveSummary,
+    _open_samples,
+    fast_sample_posterior_predictive,
+)
 from pymc3.exceptions import IncorrectArgumentsError, SamplingError
-from pymc3.model import Model, Point, all_continuous, modelcontext
+from pymc3.model import Model, Point, TransformedRV, all_continuous, modelcontext
 from pymc3.parallel_sampling import Draw, _cpu_count
 from pymc3.step_methods import (
     NUTS,
     PGBART,
+    BatchedNUTS,
     BinaryGibbsMetropolis,
     BinaryMetropolis,
     CategoricalGibbsMetropolis,
@@ -57,12 +64,15 @@ from pymc3.step_methods import (
 )
 from pymc3.step_methods.arraystep import BlockedStep, PopulationArrayStepShared
 from pymc3.step_methods.hmc import quadpotential
+from pymc3.theanof import batched
 from pymc3.util import (
     chains_and_samples,
     check_start_vals,
     dataset_to_point_list,
     get_default_varnames,
     get_untransformed_name,
+    is_dataset,
+    is_inference_data,
     is_transformed_name,
     update_start_vals,
 )
@@ -78,6 +88,10 @@ __all__ = [
     "init_nuts",
     "sample_prior_predictive",
     "fast_sample_posterior_predictive",
+    "SamplerPool",
+    "compute_deterministics",
+    "compute_log_likelihood",
+    "EarlyStopping",
 ]
 
 STEP_METHODS = (
@@ -97,6 +111,8 @@ PointType = Dict[str, np.ndarray]
 PointList = List[PointType]
 Backend = Union[BaseTrace, MultiTrace, NDArray]
 
+BACKENDS = {"ndarray": NDArray, "memmap": MemmapTrace, "summary": SummaryTrace}
+
 _log = logging.getLogger("pymc3")
 
 
@@ -255,6 +271,12 @@ def sample(
     idata_kwargs: dict = None,
     mp_ctx=None,
     pickle_backend: str = "pickle",
+    transport: str = "pipe",
+    deterministics: str = "record",
+    early_stopping: Optional["EarlyStopping"] = None,
+    checkpoint: Optional[str] = None,
+    checkpoint_every: int = 100,
+    pool_adaptation: bool = False,
     **kwargs,
 ):
     r"""Draw samples from the posterior using the given step methods.
@@ -286,6 +308,8 @@ def sample(
         * advi_map: Initialize ADVI with MAP and use MAP as starting point.
         * map: Use the MAP as starting point. This is discouraged.
         * adapt_full: Adapt a dense mass matrix using the sample covariances
+        * adapt_lowrank: Adapt a diagonal plus low rank mass matrix from the samples and
+          gradients of the tuning samples. This scales to models with many parameters.
 
     step : function or iterable of functions
         A step function or collection of functions. If there are variables without step methods,
@@ -299,10 +323,15 @@ def sample(
         Defaults to ``trace.point(-1))`` if there is a trace provided and model.test_point if not
         (defaults to empty dict). Initialization methods for NUTS (see ``init`` keyword) can
         overwrite the default.
-    trace : backend, list, or MultiTrace
+    trace : backend, list, MultiTrace or str
         This should be a backend instance, a list of variables to track, or a MultiTrace object
         with past values. If a MultiTrace object is given, it must contain samples for the chain
         number ``chain``. If None or a list of variables, the NDArray backend is used.
+        The name of a backend (`'ndarray'`, `'memmap'` or `'summary'`) creates that backend for
+        each chain. `'memmap'` writes the draws to memory-mapped files in a temporary directory
+        instead of keeping them in memory (see :class:`pymc3.backends.MemmapTrace`).
+        `'summary'` keeps only running summaries of the draws after tuning (see
+        :class:`pymc3.backends.SummaryTrace`) and can not be returned as ``InferenceData``.
     chain_idx : int
         Chain number used to store sample in backend. If ``chains`` is greater than one, chain
         numbers will start here.
@@ -337,8 +366,8 @@ def sample(
         Sampling can be interrupted by throwing a ``KeyboardInterrupt`` in the callback.
     jitter_max_retries : int
         Maximum number of repeated attempts (per chain) at creating an initial matrix with uniform jitter
-        that yields a finite probability. This applies to ``jitter+adapt_diag`` and ``jitter+adapt_full``
-        init methods.
+        that yields a finite probability. This applies to ``jitter+adapt_diag``, ``jitter+adapt_full``
+        and ``jitter+adapt_lowrank`` init methods.
     return_inferencedata : bool, default=False
         Whether to return the trace as an :class:`arviz:arviz.InferenceData` (True) object or a `MultiTrace` (False)
         Defaults to `False`, but we'll switch to `True` in an upcoming release.
@@ -351,6 +380,41 @@ def sample(
         One of `'pickle'` or `'dill'`. The library used to pickle models
         in parallel sampling if the multiprocessing context is not of type
         `fork`.
+    transport : str
+        One of `'pipe'` or `'ring'`. How draws are sent from the chain processes
+        in parallel sampling. With `'pipe'` the main process asks for every single
+        draw. With `'ring'` each process writes its draws into a shared memory ring
+        buffer and the main process copies them out in batches, which is much faster
+        for models with cheap gradients.
+    deterministics : str
+        One of `'record'`, `'after'` or `'skip'`. With `'record'` the deterministic
+        variables and the untransformed values of transformed variables are computed
+        and stored at every draw. With `'after'` only the free variables are recorded
+        during sampling, and the others are computed afterwards for all draws at once
+        (see :func:`compute_deterministics`). `'skip'` computes only the untransformed
+        values afterwards, but not the ``Deterministic`` variables of the model. The
+        trace passed to ``callback`` contains only the free variables unless this is
+        `'record'`. Traces given by ``trace`` always record all of their variables, so
+        they need `'record'`.
+    early_stopping : EarlyStopping, optional
+        Stop sampling before ``draws`` once the R-hat and the effective sample size of
+        the free variables reach the targets of this :class:`EarlyStopping`. Not
+        available with population samplers like ``DEMetropolis``.
+    checkpoint : str, optional
+        A directory for checkpoints of the chains. Every ``checkpoint_every`` draws, the
+        draws, the current point, the step method with its tuning state and the random
+        state of each chain are written to this directory. If it already contains
+        checkpoints of the same chains, sampling continues from them and gives the same
+        draws as a run without interruption. Chains that were not started yet only get the
+        same draws if ``random_seed`` is set. The model must be picklable, and the trace
+        backend must store the draws. See :mod:`pymc3.checkpoint`.
+    checkpoint_every : int
+        The number of draws between two checkpoints of a chain.
+    pool_adaptation : bool
+        In parallel sampling, let the chains share the estimates of their adaptive mass
+        matrices (``adapt_diag`` and ``adapt_full``) through shared memory, so that every chain
+        adapts to the draws of all chains. This needs fewer tuning draws, but the draws
+        depend on the timing of the chains and are not reproducible with ``random_seed``.
 
     Returns
     -------
@@ -371,6 +435,9 @@ def sample(
         * max_treedepth : The maximum depth of the trajectory tree
         * step_scale : float, default 0.25
           The initial guess for the step size scaled down by :math:`1/n**(1/4)`
+        * warmup : WarmupSchedule. Windowed schedule of the step size and mass matrix
+          adaptation during tuning, see ``pm.WarmupSchedule``. Its number of tuning draws
+          is set to ``tune``.
 
     If your model uses multiple step methods, aka a Compound Step, then you have
     two ways to address arguments to each step method:
@@ -475,6 +542,24 @@ def sample(
         for start_vals in start:
             _check_start_shape(model, start_vals)
 
+    if isinstance(trace, str) and issubclass(BACKENDS.get(trace, NDArray), SummaryTrace):
+        if return_inferencedata:
+            raise ValueError("Summary traces can not be converted to InferenceData.")
+        if deterministics != "record":
+            raise ValueError("Summary traces can only be used with deterministics='record'.")
+
+    if deterministics not in ("record", "after", "skip"):
+        raise ValueError("Unknown value for `deterministics`: %s" % deterministics)
+    if deterministics != "record":
+        if isinstance(trace, str):
+            raise ValueError(
+                f"`deterministics={deterministics!r}` can not be used with the {trace!r} trace "
+                "backend, whose traces record all variables. Use `deterministics='record'`."
+            )
+        if trace is not None:
+            raise ValueError("`deterministics=%r` can not be used with a `trace`." % deterministics)
+        trace = list(model.free_RVs)
+
     # small trace warning
     if draws == 0:
         msg = "Tuning was enabled throughout the whole trace."
@@ -488,6 +573,9 @@ def sample(
     if model.ndim == 0:
         raise ValueError("The model does not contain any free variables.")
 
+    if kwargs.get("warmup") is not None:
+        kwargs["warmup"] = kwargs["warmup"].for_tune(tune)
+
     if step is None and init is not None and all_continuous(model.vars):
         try:
             # By default, try to use NUTS
@@ -534,10 +622,13 @@ def sample(
         "cores": cores,
         "callback": callback,
         "discard_tuned_samples": discard_tuned_samples,
+        "early_stopping": early_stopping,
     }
     parallel_args = {
         "pickle_backend": pickle_backend,
         "mp_ctx": mp_ctx,
+        "transport": transport,
+        "pool_adaptation": pool_adaptation,
     }
 
     sample_args.update(kwargs)
@@ -549,7 +640,20 @@ def sample(
         ]
     )
 
-    parallel = cores > 1 and chains > 1 and not has_population_samplers
+    # BatchedNUTS runs all chains in lockstep in this process
+    has_batched_sampler = isinstance(step, BatchedNUTS) and step.batchable
+
+    if early_stopping is not None and has_population_samplers:
+        raise ValueError("Early stopping is not supported with population samplers.")
+
+    checkpointer = None
+    if checkpoint is not None:
+        if has_population_samplers or has_batched_sampler:
+            raise ValueError("Checkpoints are not supported with population or batched samplers.")
+        checkpointer = checkpoints.Checkpointer(checkpoint, checkpoint_every, pickle_backend)
+    sample_args["checkpoint"] = checkpointer
+
+    parallel = cores > 1 and chains > 1 and not has_population_samplers and not has_batched_sampler
     t_start = time.time()
     if parallel:
         _log.info(f"Multiprocess sampling ({chains} chains in {cores} jobs)")
@@ -567,6 +671,8 @@ def sample(
             _log.debug("Pickling error:", exec_info=True)
             parallel = False
     if not parallel:
+        if pool_adaptation:
+            _log.warning("Pooled adaptation is only available in parallel sampling.")
         if has_population_samplers:
             has_demcmc = np.any(
                 [
@@ -590,15 +696,62 @@ def sample(
                 )
             _print_step_hierarchy(step)
             trace = _sample_population(parallelize=cores > 1, **sample_args)
+        elif has_batched_sampler:
+            _log.info(f"Batched sampling ({chains} chains in 1 job)")
+            _print_step_hierarchy(step)
+            trace = _sample_batched(**sample_args)
         else:
             _log.info(f"Sequential sampling ({chains} chains in 1 job)")
             _print_step_hierarchy(step)
             trace = _sample_many(**sample_args)
 
     t_sampling = time.time() - t_start
+    if early_stopping is not None and early_stopping.stopped:
+        _log.info(
+            f"Convergence targets reached after {early_stopping.n_draws:_d} draws per chain "
+            f"(ESS >= {early_stopping.ess:g}, R-hat <= {early_stopping.rhat:g})."
+        )
+    return _postprocess_trace(
+        trace,
+        model,
+        draws - tune,
+        tune,
+        t_sampling,
+        discard_tuned_samples,
+        compute_convergence_checks,
+        return_inferencedata,
+        idata_kwargs,
+        deterministics,
+    )
+
+
+def _postprocess_trace(
+    trace,
+    model,
+    draws,
+    tune,
+    t_sampling,
+    discard_tuned_samples,
+    compute_convergence_checks,
+    return_inferencedata,
+    idata_kwargs,
+    deterministics="record",
+):
+    """Discard the tuning samples of a new trace, fill its report and run convergence checks.
+
+    ``draws`` is the number of draws after tuning. Unless ``deterministics``
+    is `'record'`, the trace contains only the free variables and the others
+    are computed here.
+    """
+    summary_only = any(isinstance(strace, SummaryTrace) for strace in trace._straces.values())
+
     # count the number of tune/draw iterations that happened
     # ideally via the "tune" statistic, but not all samplers record it!
-    if "tune" in trace.stat_names:
+    if summary_only:
+        # Summary traces leave out tuning draws
+        n_tune = min(strace.n_tune for strace in trace._straces.values())
+        n_draws = len(trace) - n_tune
+    elif "tune" in trace.stat_names:
         stat = trace.get_sampler_stats("tune", chains=0)
         # when CompoundStep is used, the stat is 2 dimensional!
         if len(stat.shape) == 2:
@@ -611,15 +764,21 @@ def sample(
         n_tune = min(tune, len(trace))
         n_draws = max(0, len(trace) - n_tune)
 
-    if discard_tuned_samples:
+    if discard_tuned_samples and not summary_only:
         trace = trace[n_tune:]
 
+    if deterministics == "after":
+        compute_deterministics(trace, model=model)
+    elif deterministics == "skip":
+        untransformed = [var.name for var in model.deterministics if isinstance(var, TransformedRV)]
+        compute_deterministics(trace, var_names=untransformed, model=model)
+
     # save metadata in SamplerReport
     trace.report._n_tune = n_tune
     trace.report._n_draws = n_draws
     trace.report._t_sampling = t_sampling
 
-    if "variable_inclusion" in trace.stat_names:
+    if "variable_inclusion" in trace.stat_names and not summary_only:
         variable_inclusion = np.stack(trace.get_sampler_stats("variable_inclusion")).mean(0)
         trace.report.variable_importance = variable_inclusion / variable_inclusion.sum()
 
@@ -631,15 +790,19 @@ def sample(
     )
 
     idata = None
-    if compute_convergence_checks or return_inferencedata:
+    if (compute_convergence_checks or return_inferencedata) and not summary_only:
         ikwargs = dict(model=model, save_warmup=not discard_tuned_samples)
         if idata_kwargs:
             ikwargs.update(idata_kwargs)
+        import arviz
+
         idata = arviz.from_pymc3(trace, **ikwargs)
 
     if compute_convergence_checks:
-        if draws - tune < 100:
+        if draws < 100:
             warnings.warn("The number of samples is too small to check convergence reliably.")
+        elif summary_only:
+            trace.report._run_summary_convergence_checks(trace, model)
         else:
             trace.report._run_convergence_checks(idata, model)
     trace.report._log_summary()
@@ -650,6 +813,202 @@ def sample(
         return trace
 
 
+def compute_deterministics(trace, var_names=None, model=None, batch_size=1000):
+    """Compute deterministic variables of a trace from the values of its free variables.
+
+    The graph of the variables is vectorized over the draws with
+    ``pm.theanof.batched``, and the values of ``batch_size`` draws are computed
+    with a single call of the resulting theano function. This avoids the
+    overhead of a function call at every draw during sampling.
+
+    Parameters
+    ----------
+    trace : MultiTrace
+        A trace with the values of all free variables of the model. The new
+        variables are added to it.
+    var_names : list of str, optional
+        The names of the variables to compute. Defaults to all ``Deterministic``
+        variables and untransformed values of transformed variables of the model.
+        Variables that are already in the trace are not computed again.
+    model : Model (optional if in ``with`` context)
+    batch_size : int
+        The number of draws per function call.
+
+    Returns
+    -------
+    trace : MultiTrace
+        The trace with the new variables.
+
+    Examples
+    --------
+    .. code:: ipython
+
+        >>> with model:
+        ...     trace = pm.sample(deterministics="skip", return_inferencedata=False)
+        ...     pm.compute_deterministics(trace, var_names=["mu"])
+    """
+    model = modelcontext(model)
+    missing = [var.name for var in model.free_RVs if var.name not in trace.varnames]
+    if missing:
+        raise ValueError("The trace does not contain the free variables %s." % missing)
+    if var_names is None:
+        new_vars = model.deterministics
+    else:
+        new_vars = [model[name] for name in var_names]
+    new_vars = [var for var in new_vars if var.name not in trace.varnames]
+    if not new_vars:
+        return trace
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive.")
+
+    free_vars = model.free_RVs
+    outputs, inputs = batched(new_vars, free_vars, name="compute_deterministics")
+    fn = compile_cache.function(
+        inputs, outputs, allow_input_downcast=True, on_unused_input="ignore"
+    )
+
+    for strace in trace._straces.values():
+        free_values = [strace.get_values(var.name) for var in free_vars]
+        n_draws = len(strace)
+        results = [
+            [np.empty((0,) + np.shape(var.tag.test_value), dtype=var.dtype)] for var in new_vars
+        ]
+        for start in range(0, n_draws, batch_size):
+            batch = fn(*[values[start : start + batch_size] for values in free_values])
+            for result, values in zip(results, batch):
+                result.append(values)
+        strace._add_samples({var: np.concatenate(result) for var, result in zip(new_vars, results)})
+    return trace
+
+
+def compute_log_likelihood(trace, var_names=None, model=None, batch_size=1000, out_dir=None):
+    """Compute the elementwise log-likelihood of the observed variables at every draw.
+
+    The graph of the log-likelihood is vectorized over the draws with
+    ``pm.theanof.batched``. The log-likelihood of ``batch_size`` draws is computed
+    with a single call of the resulting theano function and written into one
+    preallocated array per variable, instead of evaluating ``logp_elemwise`` at
+    every point of the trace, which is what ``arviz.from_pymc3`` does.
+
+    Parameters
+    ----------
+    trace : MultiTrace, xarray.Dataset or arviz.InferenceData
+        The posterior draws. All chains must have the same number of draws.
+    var_names : list of str, optional
+        The names of the observed variables. Defaults to all observed variables.
+    model : Model (optional if in ``with`` context)
+    batch_size : int
+        The number of draws per function call.
+    out_dir : str, optional
+        A directory to write the log-likelihood of every variable to, as
+        ``<name>.npy``. The returned arrays are memory-mapped to these files, so
+        the log-likelihood does not need to fit in memory.
+
+    Returns
+    -------
+    log_likelihood : dict
+        The log-likelihood of every variable, in arrays of shape
+        ``(chain, draw, *observed_shape)``. Missing observations are ``nan``.
+
+    Examples
+    --------
+    .. code:: ipython
+
+        >>> with model:
+        ...     idata = pm.sample(idata_kwargs={"log_likelihood": False})
+        ...     log_likelihood = pm.compute_log_likelihood(idata)
+        >>> idata.add_groups(log_likelihood=log_likelihood)
+        >>> az.loo(idata)
+    """
+    model = modelcontext(model)
+    if is_inference_data(trace):
+        trace = trace.posterior
+    if isinstance(trace, MultiTrace):
+        varnames = trace.varnames
+        chains = trace.chains
+        lengths = {len(trace._straces[chain]) for chain in chains}
+        if len(lengths) > 1:
+            raise ValueError("All chains of the trace must have the same number of draws.")
+        n_draws = lengths.pop()
+
+        def chain_values(i, name):
+            return trace.get_values(name, chains=chains[i])
+
+    elif is_dataset(trace):
+        varnames = list(trace.data_vars)
+        chains = range(trace.sizes["chain"])
+        n_draws = trace.sizes["draw"]
+
+        def chain_values(i, name):
+            return trace[name].values[i]
+
+    else:
+        raise TypeError("Unable to compute the log-likelihood of a %s." % type(trace))
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive.")
+
+    if var_names is None:
+        observed = model.observed_RVs
+    else:
+        observed = [model[name] for name in var_names]
+        for var in observed:
+            if var not in model.observed_RVs:
+                raise ValueError("The variable %s is not observed." % var.name)
+    # Prefer the untransformed values, which are the only ones in a posterior Dataset
+    inputs = []
+    for var in model.free_RVs:
+        name = get_untransformed_name(var.name) if is_transformed_name(var.name) else var.name
+        if name in varnames:
+            inputs.append(model[name])
+        elif var.name in varnames:
+            inputs.append(var)
+        else:
+            raise ValueError("The trace does not contain the free variable %s." % name)
+    if not observed or not n_draws:
+        return {}
+
+    logps = []
+    for var in observed:
+        logp = var.logp_elemwiset
+        logps.append(logp.dimshuffle("x") if logp.ndim == 0 else logp)
+    outputs, batch_inputs = batched(logps, inputs, name="compute_log_likelihood")
+    fn = compile_cache.function(
+        batch_inputs, outputs, allow_input_downcast=True, on_unused_input="ignore"
+    )
+
+    masks = {}
+    for var in observed:
+        if getattr(var, "missing_values", None):
+            masks[var.name] = np.ma.getmaskarray(var.observations)
+
+    log_likelihood = None
+    for i in range(len(chains)):
+        values = [chain_values(i, var.name) for var in inputs]
+        for start in range(0, n_draws, batch_size):
+            stop = min(start + batch_size, n_draws)
+            batch = fn(*[value[start:stop] for value in values])
+            if log_likelihood is None:
+                shapes_dtypes = {
+                    var.name: ((len(chains), n_draws) + logp.shape[1:], logp.dtype)
+                    for var, logp in zip(observed, batch)
+                }
+                if out_dir is None:
+                    log_likelihood = {
+                        name: np.empty(shape, dtype)
+                        for name, (shape, dtype) in shapes_dtypes.items()
+                    }
+                else:
+                    os.makedirs(out_dir, exist_ok=True)
+                    log_likelihood = _open_samples(out_dir, shapes_dtypes)
+            for var, logp in zip(observed, batch):
+                log_likelihood[var.name][i, start:stop] = logp
+    for name, mask in masks.items():
+        if mask.ndim > log_likelihood[name].ndim - 2:
+            mask = np.any(mask, axis=-1)
+        log_likelihood[name][:, :, mask] = np.nan
+    return log_likelihood
+
+
 def _check_start_shape(model, start):
     if not isinstance(start, dict):
         raise TypeError("start argument must be a dict or an array-like of dicts")
@@ -683,6 +1042,8 @@ def _sample_many(
     random_seed: list,
     step,
     callback=None,
+    early_stopping=None,
+    checkpoint=None,
     **kwargs,
 ):
     """Samples all chains sequentially.
@@ -701,14 +1062,33 @@ def _sample_many(
         A list of seeds, one for each chain
     step: function
         Step function
+    early_stopping: EarlyStopping, optional
+        Stops the first chain once it reaches the convergence targets. The
+        other chains are sampled for as many draws.
+    checkpoint: Checkpointer, optional
+        Writes checkpoints of the chains and continues from existing ones.
+        The chains share the step method, so the step method of a checkpoint
+        is also used for the chains after it.
 
     Returns
     -------
     trace: MultiTrace
         Contains samples of all chains
     """
+    if early_stopping is not None:
+        early_stopping._setup(kwargs.get("model"), 1, chains)
     traces: List[Backend] = []
     for i in range(chains):
+        resume = None
+        if checkpoint is not None:
+            resume = checkpoint.load(chain + i, draws, kwargs.get("tune"))
+            if resume is not None:
+                step = checkpoint.load_step(resume) or step
+        if resume is not None and resume["complete"]:
+            traces.append(
+                _restore_chain(resume, kwargs.get("trace"), chain + i, step, kwargs.get("model"))
+            )
+            continue
         trace = _sample(
             draws=draws,
             chain=chain + i,
@@ -716,8 +1096,13 @@ def _sample_many(
             step=step,
             random_seed=random_seed[i],
             callback=callback,
+            early_stopping=early_stopping if i == 0 else None,
+            checkpoint=checkpoint,
+            resume=resume,
             **kwargs,
         )
+        if i == 0 and early_stopping is not None and early_stopping.stopped:
+            draws = len(trace)
         if trace is None:
             if len(traces) == 0:
                 raise ValueError("Sampling stopped before a sample was created.")
@@ -795,6 +1180,127 @@ def _sample_population(
     return MultiTrace(latest_traces)
 
 
+def _sample_batched(
+    draws: int,
+    chain: int,
+    chains: int,
+    start: list,
+    random_seed,
+    step,
+    trace=None,
+    tune=None,
+    model=None,
+    progressbar: bool = True,
+    callback=None,
+    early_stopping=None,
+    **kwargs,
+):
+    """Samples all chains in lockstep with a ``BatchedNUTS`` step method.
+
+    Parameters
+    ----------
+    draws : int
+        The number of samples to draw
+    chain : int
+        The number of the first chain
+    chains : int
+        The total number of chains
+    start : list
+        Start points for each chain
+    random_seed : int or list of ints, optional
+        A list is accepted if more if ``cores`` is greater than one.
+    step : BatchedNUTS
+        Step function
+    trace : backend, list, or MultiTrace
+        This should be a backend instance, a list of variables to track, or a MultiTrace object
+        with past values. If None or a list of variables, the NDArray backend is used.
+    tune : int, optional
+        Number of iterations to tune, if applicable (defaults to None)
+    model : Model (optional if in ``with`` context)
+    progressbar : bool
+        Whether or not to display a progress bar in the command line.
+    callback : Callable
+        A function which gets called for every sample from the trace of a chain.
+    early_stopping : EarlyStopping, optional
+        Stops all chains once they reach the convergence targets.
+
+    Returns
+    -------
+    trace : MultiTrace
+        Contains samples of all chains
+    """
+    model = modelcontext(model)
+    draws = int(draws)
+    if random_seed is not None:
+        np.random.seed(random_seed)
+    if draws < 1:
+        raise ValueError("Argument `draws` must be greater than 0.")
+
+    traces = []
+    points = []
+    for c in range(chains):
+        if trace is not None:
+            strace = _choose_backend(copy(trace), chain + c, tune=tune or 0, model=model)
+        else:
+            strace = _choose_backend(None, chain + c, model=model)
+        if len(strace) > 0:
+            update_start_vals(start[c], strace.point(-1), model)
+        else:
+            update_start_vals(start[c], model.test_point, model)
+        if strace.supports_sampler_stats:
+            strace.setup(draws, chain + c, step.stats_dtypes)
+        else:
+            strace.setup(draws, chain + c)
+        traces.append(strace)
+        points.append(Point(start[c], model=model))
+
+    step.tune = bool(tune)
+    step.reset_tuning()
+    if early_stopping is not None:
+        early_stopping._setup(model, chains)
+
+    sampling = range(draws)
+    _pbar_data = {"chains": chains, "divergences": 0}
+    _desc = "Sampling {chains:d} chains, {divergences:,d} divergences"
+    if progressbar:
+        sampling = progress_bar(sampling, total=draws, display=progressbar)
+        sampling.comment = _desc.format(**_pbar_data)
+
+    try:
+        for i in sampling:
+            if i == tune:
+                step = stop_tuning(step)
+            updates = step.step_batch(points)
+            for c, (strace, (point, stats)) in enumerate(zip(traces, updates)):
+                points[c] = point
+                if strace.supports_sampler_stats:
+                    strace.record(point, stats)
+                else:
+                    strace.record(point)
+                if i >= tune and stats[0].get("diverging"):
+                    _pbar_data["divergences"] += 1
+                    if progressbar:
+                        sampling.comment = _desc.format(**_pbar_data)
+                if callback is not None:
+                    callback(
+                        trace=strace,
+                        draw=Draw(chain + c, i == draws - 1, i, i < tune, stats, point, None),
+                    )
+            if early_stopping is not None and i >= tune:
+                for c, point in enumerate(points):
+                    early_stopping.record(c, point)
+                if early_stopping.stopped:
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for strace in traces:
+            strace.close()
+        for strace, warns in zip(traces, step.chain_warnings()):
+            strace._add_warnings(warns)
+    return MultiTrace(traces)
+
+
 def _sample(
     chain: int,
     progressbar: bool,
@@ -806,6 +1312,9 @@ def _sample(
     tune=None,
     model: Optional[Model] = None,
     callback=None,
+    early_stopping=None,
+    checkpoint=None,
+    resume=None,
     **kwargs,
 ):
     """Main iteration for singleprocess sampling.
@@ -835,6 +1344,12 @@ def _sample(
     tune : int, optional
         Number of iterations to tune, if applicable (defaults to None)
     model : Model (optional if in ``with`` context)
+    early_stopping : EarlyStopping, optional
+        Stops the chain once it reaches the convergence targets.
+    checkpoint : Checkpointer, optional
+        Writes checkpoints of the chain.
+    resume : dict, optional
+        A checkpoint of the chain to continue from. ``step`` must be its step method.
 
     Returns
     -------
@@ -843,7 +1358,20 @@ def _sample(
     """
     skip_first = kwargs.get("skip_first", 0)
 
-    sampling = _iter_sample(draws, step, start, trace, chain, tune, model, random_seed, callback)
+    sampling = _iter_sample(
+        draws,
+        step,
+        start,
+        trace,
+        chain,
+        tune,
+        model,
+        random_seed,
+        callback,
+        early_stopping,
+        checkpoint,
+        resume,
+    )
     _pbar_data = {"chain": chain, "divergences": 0}
     _desc = "Sampling chain {chain:d}, {divergences:,d} divergences"
     if progressbar:
@@ -932,6 +1460,9 @@ def _iter_sample(
     model=None,
     random_seed=None,
     callback=None,
+    early_stopping=None,
+    checkpoint=None,
+    resume=None,
 ):
     """Generator for sampling one chain. (Used in singleprocess sampling.)
 
@@ -956,6 +1487,13 @@ def _iter_sample(
     model : Model (optional if in ``with`` context)
     random_seed : int or list of ints, optional
         A list is accepted if more if ``cores`` is greater than one.
+    early_stopping : EarlyStopping, optional
+        Set up for a single chain. The iteration ends once its targets are reached.
+    checkpoint : Checkpointer, optional
+        Writes checkpoints of the chain.
+    resume : dict, optional
+        A checkpoint of the chain to continue from. The draws of the checkpoint
+        are recorded in the trace, but not yielded. ``step`` must be its step method.
 
     Yields
     ------
@@ -974,7 +1512,9 @@ def _iter_sample(
     if start is None:
         start = {}
 
-    strace = _choose_backend(trace, chain, model=model)
+    strace = _choose_backend(trace, chain, tune=tune or 0, model=model)
+    if checkpoint is not None:
+        checkpoints.check_backend(strace)
 
     if len(strace) > 0:
         update_start_vals(start, strace.point(-1), model)
@@ -993,11 +1533,20 @@ def _iter_sample(
     else:
         strace.setup(draws, chain)
 
+    first_draw = 0
+    if resume is not None:
+        checkpoints.restore_trace(strace, resume)
+        point = Point(resume["point"], model=model)
+        np.random.set_state(resume["rng"])
+        first_draw = resume["draw"]
+
     try:
-        step.tune = bool(tune)
-        if hasattr(step, "reset_tuning"):
-            step.reset_tuning()
-        for i in range(draws):
+        # The step method of a checkpoint keeps its tuning state
+        if resume is None:
+            step.tune = bool(tune)
+            if hasattr(step, "reset_tuning"):
+                step.reset_tuning()
+        for i in range(first_draw, draws):
             stats = None
             diverging = False
 
@@ -1015,6 +1564,8 @@ def _iter_sample(
             else:
                 point = step.step(point)
                 strace.record(point)
+            if checkpoint is not None and checkpoint.is_due(i + 1, draws):
+                checkpoint.save(chain, strace, checkpoint.state(step, point, i + 1), draws, tune)
             if callback is not None:
                 warns = getattr(step, "warnings", None)
                 callback(
@@ -1023,6 +1574,8 @@ def _iter_sample(
                 )
 
             yield strace, diverging
+            if early_stopping is not None and i >= tune and early_stopping.record(0, point):
+                break
     except KeyboardInterrupt:
         strace.close()
         if hasattr(step, "warnings"):
@@ -1037,6 +1590,21 @@ def _iter_sample(
         if hasattr(step, "warnings"):
             warns = step.warnings()
             strace._add_warnings(warns)
+        if checkpoint is not None:
+            state = checkpoint.state(step, point, len(strace))
+            checkpoint.save(chain, strace, state, draws, tune, complete=True)
+
+
+def _restore_chain(data, trace, chain, step, model):
+    """Create the trace of a finished chain from its checkpoint."""
+    strace = _choose_backend(trace, chain, model=model)
+    checkpoints.check_backend(strace)
+    if step.generates_stats and strace.supports_sampler_stats:
+        strace.setup(data["draws"], chain, step.stats_dtypes)
+    else:
+        strace.setup(data["draws"], chain)
+    checkpoints.restore_trace(strace, data)
+    return strace
 
 
 class PopulationStepper:
@@ -1350,18 +1918,21 @@ def _iter_population(draws, tune, popstep, steppers, traces, points):
                 steppers[c].report._finalize(strace)
 
 
-def _choose_backend(trace, chain, **kwds) -> Backend:
+def _choose_backend(trace, chain, tune=0, **kwds) -> Backend:
     """Selects or creates a NDArray trace backend for a particular chain.
 
     Parameters
     ----------
-    trace : BaseTrace, list, MultiTrace, or None
+    trace : BaseTrace, list, MultiTrace, str or None
         This should be a BaseTrace, list of variables to track,
         or a MultiTrace object with past values.
         If a MultiTrace object is given, it must contain samples for the chain number ``chain``.
         If None or a list of variables, the NDArray backend is used.
+        If a string, a new backend of that name (see ``BACKENDS``) is created.
     chain : int
         Number of the chain of interest.
+    tune : int
+        Number of tuning draws, for summary backends created by name.
     **kwds :
         keyword arguments to forward to the backend creation
 
@@ -1376,6 +1947,13 @@ def _choose_backend(trace, chain, **kwds) -> Backend:
         return trace._straces[chain]
     if trace is None:
         return NDArray(**kwds)
+    if isinstance(trace, str):
+        if trace not in BACKENDS:
+            raise ValueError("Unknown trace backend: %s" % trace)
+        if issubclass(BACKENDS[trace], SummaryTrace):
+            # Not all samplers report which draws are tuning draws
+            kwds["tune"] = tune
+        return BACKENDS[trace](**kwds)
 
     return NDArray(vars=trace, **kwds)
 
@@ -1396,6 +1974,10 @@ def _mp_sample(
     discard_tuned_samples=True,
     mp_ctx=None,
     pickle_backend="pickle",
+    transport="pipe",
+    early_stopping=None,
+    checkpoint=None,
+    pool_adaptation=False,
     **kwargs,
 ):
     """Main iteration for multiprocess sampling.
@@ -1431,6 +2013,18 @@ def _mp_sample(
         the ``draw.chain`` argument can be used to determine which of the active chains the sample
         is drawn from.
         Sampling can be interrupted by throwing a ``KeyboardInterrupt`` in the callback.
+    mp_ctx : multiprocessing.context.BaseContent
+        A multiprocessing context for parallel sampling.
+    pickle_backend : str
+        One of `'pickle'` or `'dill'`. The library used to pickle models.
+    transport : str
+        One of `'pipe'` or `'ring'`. How draws are sent from the chain processes.
+    early_stopping : EarlyStopping, optional
+        Stops all chains once they reach the convergence targets.
+    checkpoint : Checkpointer, optional
+        Writes checkpoints of the chains and continues from existing ones.
+    pool_adaptation : bool
+        Pool the estimates of the adaptive mass matrices of the chains.
 
     Returns
     -------
@@ -1443,9 +2037,12 @@ def _mp_sample(
     draws -= tune
 
     traces = []
+    resume = None
+    if checkpoint is not None:
+        resume = [checkpoint.load(idx, draws + tune, tune) for idx in range(chain, chain + chains)]
     for idx in range(chain, chain + chains):
         if trace is not None:
-            strace = _choose_backend(copy(trace), idx, model=model)
+            strace = _choose_backend(copy(trace), idx, tune=tune, model=model)
         else:
             strace = _choose_backend(None, idx, model=model)
         # for user supply start value, fill-in missing value if the supplied
@@ -1455,8 +2052,19 @@ def _mp_sample(
             strace.setup(draws + tune, idx + chain, step.stats_dtypes)
         else:
             strace.setup(draws + tune, idx + chain)
+        if checkpoint is not None:
+            checkpoints.check_backend(strace)
+            if resume[idx - chain] is not None:
+                checkpoints.restore_trace(strace, resume[idx - chain])
         traces.append(strace)
 
+    on_checkpoint = None
+    if checkpoint is not None:
+
+        def on_checkpoint(chain_num, state):
+            strace = traces[chain_num - chain]
+            checkpoint.save(chain_num, strace, state, draws + tune, tune)
+
     sampler = ps.ParallelSampler(
         draws,
         tune,
@@ -1469,12 +2077,59 @@ def _mp_sample(
         progressbar,
         mp_ctx=mp_ctx,
         pickle_backend=pickle_backend,
+        transport=transport,
+        checkpoint_every=checkpoint.every if checkpoint is not None else None,
+        resume=resume,
+        on_checkpoint=on_checkpoint,
+        pool_adaptation=pool_adaptation,
     )
+    if early_stopping is not None:
+        early_stopping._setup(model, chains)
+    return _record_parallel(
+        sampler,
+        traces,
+        chain,
+        draws + tune,
+        tune,
+        callback,
+        discard_tuned_samples,
+        early_stopping,
+        checkpoint,
+    )
+
+
+def _record_parallel(
+    sampler,
+    traces,
+    chain,
+    draws,
+    tune,
+    callback=None,
+    discard_tuned_samples=True,
+    early_stopping=None,
+    checkpoint=None,
+):
+    """Record the draws of a ``ParallelSampler`` in the traces of its chains.
+
+    Once ``early_stopping`` reports that the targets are reached, sampling
+    stops and the chains are cut to the length of the shortest one. The
+    chains that are finished, or stopped early, are saved with the
+    ``checkpoint`` as complete chains of ``draws`` draws including tuning.
+
+    Returns
+    -------
+    trace : pymc3.backends.base.MultiTrace
+        A ``MultiTrace`` object that contains the samples for all chains.
+    """
+    import pymc3.parallel_sampling as ps
+
+    last_points = {}
     try:
         try:
             with sampler:
                 for draw in sampler:
                     trace = traces[draw.chain - chain]
+                    last_points[draw.chain] = draw.point
                     if trace.supports_sampler_stats and draw.stats is not None:
                         trace.record(draw.point, draw.stats)
                     else:
@@ -1483,10 +2138,17 @@ def _mp_sample(
                         trace.close()
                         if draw.warnings is not None:
                             trace._add_warnings(draw.warnings)
+                        if checkpoint is not None:
+                            state = {"draw": len(trace), "point": draw.point, "step": None}
+                            checkpoint.save(draw.chain, trace, state, draws, tune, complete=True)
 
                     if callback is not None:
                         callback(trace=trace, draw=draw)
 
+                    if early_stopping is not None and not draw.tuning:
+                        if early_stopping.record(draw.chain - chain, draw.point):
+                            break
+
         except ps.ParallelSamplingError as error:
             trace = traces[error._chain - chain]
             trace._add_warnings(error._warnings)
@@ -1496,7 +2158,21 @@ def _mp_sample(
             multitrace = MultiTrace(traces)
             multitrace._report._log_summary()
             raise
-        return MultiTrace(traces)
+        multitrace = MultiTrace(traces)
+        if early_stopping is not None and early_stopping.stopped:
+            for trace in traces:
+                trace.close()
+            length = min(len(trace) for trace in traces)
+            # Summary traces can not be cut, but do not need equal lengths
+            if not any(isinstance(trace, SummaryTrace) for trace in traces):
+                multitrace = multitrace[:length]
+            if checkpoint is not None:
+                # Resuming must return the stopped chains instead of sampling on
+                for chain_num, point in last_points.items():
+                    trace = traces[chain_num - chain]
+                    state = {"draw": length, "point": point, "step": None}
+                    checkpoint.save(chain_num, trace, state, draws, tune, complete=True)
+        return multitrace
     except KeyboardInterrupt:
         if discard_tuned_samples:
             traces, length = _choose_chains(traces, tune)
@@ -1536,6 +2212,403 @@ def _choose_chains(traces, tune):
     return [traces[idx] for idx in idxs[use_until:]], final_length + tune
 
 
+class EarlyStopping:
+    """Stop sampling once the chains reach convergence targets.
+
+    Pass an instance to ``pm.sample(..., early_stopping=...)``. The draws of
+    the free variables after tuning are summarized online (see
+    :class:`pymc3.backends.summary.OnlineStats`) and every ``check_every``
+    draws the split R-hat and the effective sample size of every element are
+    computed from the summaries. Sampling stops when the largest R-hat is at
+    most ``rhat`` and the smallest effective sample size, summed over the
+    chains, is at least ``ess``. All chains keep the same number of draws.
+
+    The effective sample size is a batch means estimate and the R-hat is not
+    rank normalized, so both can differ from the values of ``arviz.ess`` and
+    ``arviz.rhat`` that are computed after sampling.
+
+    If the chains are sampled one after the other, the first chain is sampled
+    until its own split R-hat and its share of the effective sample size reach
+    the targets, and the other chains are sampled for as many draws.
+
+    Parameters
+    ----------
+    ess : float
+        The minimal effective sample size of all elements of the variables.
+    rhat : float
+        The maximal R-hat of all elements of the variables.
+    var_names : list of str, optional
+        Names of the free variables to monitor, in the transformed space.
+        Defaults to all free variables of the model.
+    check_every : int
+        The number of draws per chain between two checks.
+    min_draws : int
+        The number of draws per chain after tuning before the first check.
+    n_batches : int
+        The minimal number of batches for the batch means.
+
+    Attributes
+    ----------
+    stopped : bool
+        Whether the targets were reached before the end of sampling.
+    n_draws : int
+        The number of draws after tuning of the shortest chain.
+    ess_estimates, rhat_estimates : dict
+        The smallest effective sample size and the largest R-hat of every
+        variable at the latest check.
+    """
+
+    def __init__(
+        self, ess=400, rhat=1.01, var_names=None, check_every=50, min_draws=100, n_batches=32
+    ):
+        if check_every < 1:
+            raise ValueError("check_every must be positive.")
+        self.ess = ess
+        self.rhat = rhat
+        self.var_names = var_names
+        self.check_every = check_every
+        self.min_draws = min_draws
+        self.n_batches = n_batches
+        self._stats = []  # type: List[Dict[str, OnlineStats]]
+        self._ess_target = ess
+        self._next_check = min_draws
+        self.stopped = False
+        self.ess_estimates = {}  # type: Dict[str, float]
+        self.rhat_estimates = {}  # type: Dict[str, float]
+
+    def _setup(self, model, chains, total_chains=None):
+        """Reset the summaries for ``chains`` monitored chains out of ``total_chains``."""
+        model = modelcontext(model)
+        free_names = [var.name for var in model.free_RVs]
+        var_names = free_names if self.var_names is None else list(self.var_names)
+        missing = [name for name in var_names if name not in free_names]
+        if missing:
+            raise ValueError(
+                "Early stopping can only monitor free variables, but got %s. "
+                "The free variables of the model are %s." % (missing, free_names)
+            )
+        shapes = model.test_point
+        self._stats = [
+            {
+                name: OnlineStats(np.shape(shapes[name]), quantiles=(), n_batches=self.n_batches)
+                for name in var_names
+            }
+            for _ in range(chains)
+        ]
+        if total_chains is None:
+            total_chains = chains
+        self._ess_target = self.ess * chains / total_chains
+        self._next_check = max(self.min_draws, 2)
+        self.stopped = False
+        self.ess_estimates = {}
+        self.rhat_estimates = {}
+
+    @property
+    def n_draws(self):
+        if not self._stats:
+            return 0
+        return min(next(iter(stats.values())).count for stats in self._stats)
+
+    def record(self, chain, point):
+        """Add a draw after tuning of the monitored chain number ``chain``.
+
+        Returns True once the targets are reached.
+        """
+        for name, stats in self._stats[chain].items():
+            stats.update(point[name])
+        if self.n_draws < self._next_check:
+            return self.stopped
+        self._next_check += self.check_every
+        self.stopped = self._check()
+        return self.stopped
+
+    def _check(self):
+        for name in self._stats[0]:
+            chains = [stats[name] for stats in self._stats]
+            ess = sum(stats.ess for stats in chains)
+            rhat = split_rhat(chains)
+            self.ess_estimates[name] = float(np.min(ess)) if np.size(ess) else np.inf
+            self.rhat_estimates[name] = float(np.max(rhat)) if np.size(rhat) else 1.0
+        ess_reached = all(ess >= self._ess_target for ess in self.ess_estimates.values())
+        rhat_reached = all(rhat <= self.rhat for rhat in self.rhat_estimates.values())
+        return ess_reached and rhat_reached
+
+
+class SamplerPool:
+    """A pool of chain processes that is reused for several sampling runs.
+
+    Every call to ``pm.sample`` with more than one core starts new worker
+    processes and sends them the step method, which for small models can take
+    longer than the sampling itself. A ``SamplerPool`` starts the processes
+    once and keeps them, together with their compiled step methods, alive
+    between calls to ``SamplerPool.sample``. The values of ``pm.Data``
+    containers can be changed for each call.
+
+    The tuning of the step methods is reset before each run, so that each run
+    behaves like a separate call to ``pm.sample``.
+
+    Parameters
+    ----------
+    step : function or iterable of functions, optional
+        A step function or collection of functions. If None, the step methods are
+        assigned automatically as in ``pm.sample``. Continuous models use NUTS.
+    chains : int, optional
+        The number of chains to sample. Defaults to ``max(2, cores)``.
+    cores : int, optional
+        The number of chains to run in parallel. Defaults to the number of CPUs
+        in the system, but at most 4.
+    init : str
+        Initialization method for NUTS, see ``pm.sample``. The initial points and
+        the mass matrix are computed only once, when the pool is created.
+    n_init : int
+        Number of iterations of initializer, see ``pm.sample``.
+    model : Model (optional if in ``with`` context)
+    random_seed : int, optional
+        Random seed for the initialization of NUTS.
+    mp_ctx : multiprocessing.context.BaseContent
+        A multiprocessing context for parallel sampling.
+    pickle_backend : str
+        One of `'pickle'` or `'dill'`. The library used to pickle models.
+    transport : str
+        One of `'pipe'` or `'ring'`. How draws are sent from the chain processes.
+    **kwargs
+        Passed on to ``init_nuts`` or the step methods, as in ``pm.sample``.
+
+    Examples
+    --------
+    .. code:: ipython
+
+        >>> with pm.Model() as model:
+        ...     x = pm.Data("x", np.zeros(10))
+        ...     mu = pm.Normal("mu", 0, 1)
+        ...     obs = pm.Normal("obs", mu, 1, observed=x)
+        >>> with model, pm.SamplerPool(chains=4) as pool:
+        ...     traces = [pool.sample(500, data={"x": data}) for data in datasets]
+    """
+
+    def __init__(
+        self,
+        step=None,
+        chains=None,
+        cores=None,
+        init="auto",
+        n_init=200000,
+        model=None,
+        random_seed=None,
+        mp_ctx=None,
+        pickle_backend: str = "pickle",
+        transport: str = "pipe",
+        **kwargs,
+    ):
+        import pymc3.parallel_sampling as ps
+
+        model = modelcontext(model)
+        if model.ndim == 0:
+            raise ValueError("The model does not contain any free variables.")
+
+        if cores is None:
+            cores = min(4, _cpu_count())
+        if chains is None:
+            chains = max(2, cores)
+
+        start = None
+        if step is None and init is not None and all_continuous(model.vars):
+            _log.info("Auto-assigning NUTS sampler...")
+            start, step = init_nuts(
+                init=init,
+                chains=chains,
+                n_init=n_init,
+                model=model,
+                random_seed=random_seed,
+                progressbar=False,
+                **kwargs,
+            )
+        else:
+            step = assign_step_methods(model, step, step_kwargs=kwargs)
+        if isinstance(step, list):
+            step = CompoundStep(step)
+        if start is None:
+            start = [model.test_point] * chains
+
+        if transport == "pipe":
+            ring_size = None
+        elif transport == "ring":
+            ring_size = ps._default_ring_size(step.vars_shape_dtype)
+        else:
+            raise ValueError("Unknown transport '%s'. Must be 'pipe' or 'ring'." % transport)
+
+        self._model = model
+        self._step = step
+        self._start = start
+        self._chains = chains
+        self._cores = cores
+        self._transport = transport
+        self._ring_size = ring_size
+
+        mp_ctx = ps._get_mp_ctx(mp_ctx)
+        # The model is sent with the step method, so that the processes
+        # can update the data containers that the step method uses.
+        step_pickled = ps._pickle_step_method((step, model), mp_ctx, pickle_backend)
+        self._processes = []
+        try:
+            for chain in range(chains):
+                self._processes.append(
+                    ps.PoolProcessAdapter(
+                        step,
+                        model,
+                        step_pickled,
+                        chain,
+                        start[chain],
+                        mp_ctx,
+                        pickle_backend,
+                        ring_size,
+                    )
+                )
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def closed(self):
+        return not self._processes
+
+    def sample(
+        self,
+        draws=1000,
+        tune=1000,
+        start=None,
+        data=None,
+        random_seed=None,
+        discard_tuned_samples=True,
+        compute_convergence_checks=True,
+        progressbar=True,
+        callback=None,
+        return_inferencedata=False,
+        idata_kwargs: dict = None,
+    ):
+        """Draw samples with the processes of the pool.
+
+        Parameters
+        ----------
+        draws : int
+            The number of samples to draw.
+        tune : int
+            Number of iterations to tune.
+        start : dict, or array of dict
+            Starting point in parameter space. Defaults to the starting points
+            chosen when the pool was created.
+        data : dict, optional
+            New values for data containers of the model, as in ``pm.set_data``.
+            The values are also set in the model of the main process.
+        random_seed : int or list of ints
+            A list is accepted if ``cores`` is greater than one.
+        discard_tuned_samples : bool
+            Whether to discard posterior samples of the tune interval.
+        compute_convergence_checks : bool, default=True
+            Whether to compute sampler statistics like Gelman-Rubin and ``effective_n``.
+        progressbar : bool, optional default=True
+            Whether or not to display a progress bar in the command line.
+        callback : function, default=None
+            A function which gets called for every sample from the trace of a chain,
+            see ``pm.sample``.
+        return_inferencedata : bool, default=False
+            Whether to return the trace as an ``arviz.InferenceData`` object.
+        idata_kwargs : dict, optional
+            Keyword arguments for ``arviz.from_pymc3``
+
+        Returns
+        -------
+        trace : pymc3.backends.base.MultiTrace or arviz.InferenceData
+        """
+        import pymc3.parallel_sampling as ps
+
+        if self.closed:
+            raise ValueError("The sampler pool is closed.")
+
+        model = self._model
+        chains = self._chains
+        if data:
+            pm.set_data(data, model=model)
+
+        if start is None:
+            start = self._start
+        if isinstance(start, dict):
+            start = [start] * chains
+        start = [dict(chain_start) for chain_start in start]
+        for chain_start in start:
+            update_start_vals(chain_start, model.test_point, model)
+            _check_start_shape(model, chain_start)
+
+        if random_seed is None or isinstance(random_seed, int):
+            if random_seed is not None:
+                np.random.seed(random_seed)
+            random_seed = [np.random.randint(2 ** 30) for _ in range(chains)]
+        if len(random_seed) != chains:
+            raise ValueError("Number of seeds must be %s." % chains)
+
+        traces = []
+        for chain in range(chains):
+            strace = _choose_backend(None, chain, model=model)
+            if self._step.generates_stats and strace.supports_sampler_stats:
+                strace.setup(draws + tune, chain, self._step.stats_dtypes)
+            else:
+                strace.setup(draws + tune, chain)
+            traces.append(strace)
+
+        for proc, seed, chain_start in zip(self._processes, random_seed, start):
+            proc.submit(draws, tune, seed, chain_start, data)
+
+        sampler = ps.ParallelSampler(
+            draws,
+            tune,
+            chains,
+            self._cores,
+            random_seed,
+            start,
+            self._step,
+            progressbar=progressbar,
+            transport=self._transport,
+            ring_size=self._ring_size,
+            processes=self._processes,
+        )
+        t_start = time.time()
+        try:
+            trace = _record_parallel(
+                sampler, traces, 0, draws + tune, tune, callback, discard_tuned_samples
+            )
+        finally:
+            # Failed or interrupted runs terminate the processes
+            if not all(proc.is_alive() for proc in self._processes):
+                self.close()
+        t_sampling = time.time() - t_start
+
+        return _postprocess_trace(
+            trace,
+            model,
+            draws,
+            tune,
+            t_sampling,
+            discard_tuned_samples,
+            compute_convergence_checks,
+            return_inferencedata,
+            idata_kwargs,
+        )
+
+    def close(self):
+        """Stop the processes of the pool."""
+        import pymc3.parallel_sampling as ps
+
+        processes, self._processes = self._processes, []
+        if processes:
+            ps.ProcessAdapter.terminate_all(processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
 def stop_tuning(step):
     """Stop tuning the current step method."""
     step.stop_tuning()
@@ -1606,7 +2679,12 @@ def sample_posterior_predictive(
     keep_size: Optional[bool] = False,
     random_seed=None,
     progressbar: bool = True,
-) -> Dict[str, np.ndarray]:
+    vectorized: bool = False,
+    chunk_size: Optional[int] = None,
+    cores: Optional[int] = None,
+    out_dir: Optional[str] = None,
+    summary: Optional[PredictiveSummary] = None,
+) -> Dict[str, Any]:
     """Generate posterior predictive samples from a model given a trace.
 
     Parameters
@@ -1639,25 +2717,67 @@ def sample_posterior_predictive(
         Whether or not to display a progress bar in the command line. The bar shows the percentage
         of completion, the sampling speed in samples per second (SPS), and the estimated remaining
         time until completion ("expected time of arrival"; ETA).
+    vectorized : bool
+        If True, evaluate the whole trace, or chunks of ``chunk_size`` draws, at once with the
+        draws along a leading dimension, instead of drawing the values of every posterior draw
+        one at a time. This is much faster for long traces. The ``size`` argument is not
+        supported in this mode. See ``fast_sample_posterior_predictive``.
+    chunk_size : int, optional
+        The maximum number of posterior draws that are evaluated at once if ``vectorized=True``.
+        It bounds the memory needed for the intermediate values. Defaults to all draws, or to
+        1000 draws with ``cores``, ``out_dir`` or ``summary``.
+    cores : int, optional
+        The number of processes that sample chunks of the draws in parallel. This implies
+        ``vectorized=True``. Every chunk is sampled with its own seed derived from
+        ``random_seed``, so the samples do not depend on the number of cores.
+    out_dir : str, optional
+        A directory to write the samples of every variable to, chunk by chunk, as
+        ``<name>.npy``. The returned arrays are memory-mapped to these files. This implies
+        ``vectorized=True``.
+    summary : PredictiveSummary, optional
+        Reduce the samples chunk by chunk to summary statistics, like means, HDIs and
+        exceedance probabilities, instead of returning them. This implies ``vectorized=True``.
+        See ``pymc3.distributions.posterior_predictive.PredictiveSummary``.
 
     Returns
     -------
     samples : dict
         Dictionary with the variable names as keys, and values numpy arrays containing
-        posterior predictive samples.
+        posterior predictive samples. If ``summary`` is given, the values are dictionaries
+        with the summary statistics instead.
     """
+    if vectorized or cores is not None or out_dir is not None or summary is not None:
+        if size is not None:
+            raise IncorrectArgumentsError(
+                "The size argument is not supported with vectorized=True, cores, out_dir or summary"
+            )
+        return fast_sample_posterior_predictive(
+            trace,
+            samples=samples,
+            model=model,
+            var_names=var_names,
+            keep_size=keep_size,
+            random_seed=random_seed,
+            chunk_size=chunk_size,
+            progressbar=progressbar,
+            cores=cores,
+            out_dir=out_dir,
+            summary=summary,
+        )
+    if chunk_size is not None:
+        raise IncorrectArgumentsError("chunk_size is only supported with vectorized=True")
 
     _trace: Union[MultiTrace, PointList]
-    if isinstance(trace, InferenceData):
+    if is_inference_data(trace):
         _trace = dataset_to_point_list(trace.posterior)
-    elif isinstance(trace, xarray.Dataset):
+    elif is_dataset(trace):
         _trace = dataset_to_point_list(trace)
     else:
         _trace = trace
 
     nchain: int
     len_trace: int
-    if isinstance(trace, (InferenceData, xarray.Dataset)):
+    if is_inference_data(trace) or is_dataset(trace):
         nchain, len_trace = chains_and_samples(trace)
     else:
         len_trace = len(_trace)
@@ -1785,12 +2905,12 @@ def sample_posterior_predictive_w(
     """
     np.random.seed(random_seed)
 
-    if isinstance(traces[0], InferenceData):
+    if is_inference_data(traces[0]):
         n_samples = [
             trace.posterior.sizes["chain"] * trace.posterior.sizes["draw"] for trace in traces
         ]
         traces = [dataset_to_point_list(trace.posterior) for trace in traces]
-    elif isinstance(traces[0], xarray.Dataset):
+    elif is_dataset(traces[0]):
         n_samples = [trace.sizes["chain"] * trace.sizes["draw"] for trace in traces]
         traces = [dataset_to_point_list(trace) for trace in traces]
     else:
@@ -2005,6 +3125,7 @@ def init_nuts(
     random_seed=None,
     progressbar=True,
     jitter_max_retries=10,
+    warmup=None,
     **kwargs,
 ):
     """Set up the mass matrix initialization for NUTS.
@@ -2038,6 +3159,11 @@ def init_nuts(
           test value (usually the prior mean) as starting point.
         * jitter+adapt_full: Same as ``adapt_full``, but use test value plus a uniform jitter in
           [-1, 1] as starting point in each chain.
+        * adapt_lowrank: Adapt a diagonal plus low rank mass matrix from the samples and
+          gradients of the tuning samples. Unlike ``adapt_full`` this scales to models with many
+          parameters. All chains use the test value (usually the prior mean) as starting point.
+        * jitter+adapt_lowrank: Same as ``adapt_lowrank``, but use test value plus a uniform
+          jitter in [-1, 1] as starting point in each chain.
 
     chains : int
         Number of jobs to start.
@@ -2048,8 +3174,14 @@ def init_nuts(
         Whether or not to display a progressbar for advi sampling.
     jitter_max_retries : int
         Maximum number of repeated attempts (per chain) at creating an initial matrix with uniform jitter
-        that yields a finite probability. This applies to ``jitter+adapt_diag`` and ``jitter+adapt_full``
-        init methods.
+        that yields a finite probability. This applies to ``jitter+adapt_diag``, ``jitter+adapt_full``
+        and ``jitter+adapt_lowrank`` init methods.
+    warmup : WarmupSchedule, optional
+        Schedule of the step size and mass matrix adaptation during tuning, with an initial
+        fast interval, expanding slow windows for the mass matrix and a terminal fast interval
+        like in Stan. It needs the number of tuning draws, which ``pm.sample`` sets. The phases
+        of the draws are stored in the ``warmup_phase`` and ``warmup_window`` sampler stats.
+        Defaults to the adaptation of the potential itself.
     **kwargs : keyword arguments
         Extra keyword arguments are forwarded to pymc3.NUTS.
 
@@ -2180,9 +3312,15 @@ def init_nuts(
         mean = np.mean([model.dict_to_array(vals) for vals in start], axis=0)
         cov = np.eye(model.ndim)
         potential = quadpotential.QuadPotentialFullAdapt(model.ndim, mean, cov, 10)
+    elif init == "adapt_lowrank":
+        start = [model.test_point] * chains
+        potential = quadpotential.QuadPotentialLowRankAdapt(model.ndim)
+    elif init == "jitter+adapt_lowrank":
+        start = _init_jitter(model, chains, jitter_max_retries)
+        potential = quadpotential.QuadPotentialLowRankAdapt(model.ndim)
     else:
         raise ValueError(f"Unknown initializer: {init}.")
 
-    step = pm.NUTS(potential=potential, model=model, **kwargs)
+    step = pm.NUTS(potential=potential, model=model, warmup=warmup, **kwargs)
 
     return start, step
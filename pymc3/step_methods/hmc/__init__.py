@@ -12,5 +12,7 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+from pymc3.step_methods.hmc.batched_nuts import BatchedNUTS
 from pymc3.step_methods.hmc.hmc import HamiltonianMC
 from pymc3.step_methods.hmc.nuts import NUTS
+from pymc3.step_methods.hmc.warmup import WarmupSchedule
@@ -25,6 +25,7 @@ from pymc3.model import Point, modelcontext
 from pymc3.step_methods import arraystep, step_sizes
 from pymc3.step_methods.hmc import integration
 from pymc3.step_methods.hmc.quadpotential import QuadPotentialDiagAdapt, quad_potential
+from pymc3.step_methods.hmc.warmup import SAMPLING, SLOW_WINDOW
 from pymc3.theanof import floatX, inputvars
 from pymc3.tuning import guess_scaling
 
@@ -57,6 +58,7 @@ class BaseHMC(arraystep.GradientSharedStep):
         t0=10,
         adapt_step_size=True,
         step_rand=None,
+        warmup=None,
         **theano_kwargs
     ):
         """Set up Hamiltonian samplers with common structures.
@@ -77,6 +79,11 @@ class BaseHMC(arraystep.GradientSharedStep):
         potential: Potential, optional
             An object that represents the Hamiltonian with methods `velocity`,
             `energy`, and `random` methods.
+        warmup: WarmupSchedule, optional
+            Schedule of the step size and mass matrix adaptation during
+            tuning. The phase of each draw is stored in the `warmup_phase`
+            and `warmup_window` sampler stats. By default the step size is
+            adapted over all tuning draws and the potential adapts by itself.
         **theano_kwargs: passed to theano functions
         """
         self._model = modelcontext(model)
@@ -118,6 +125,18 @@ class BaseHMC(arraystep.GradientSharedStep):
 
         self.integrator = integration.CpuLeapfrogIntegrator(self.potential, self._logp_dlogp_func)
 
+        if warmup is not None:
+            if warmup.tune is None:
+                raise ValueError(
+                    "The warmup schedule needs the number of tuning draws, "
+                    "use `WarmupSchedule(tune=...)` or pass it to `pm.sample`."
+                )
+            self.stats_dtypes = [
+                {**stats, "warmup_phase": np.int64, "warmup_window": np.int64}
+                for stats in self.stats_dtypes
+            ]
+        self.warmup = warmup
+
         self._step_rand = step_rand
         self._warnings = []
         self._samples_after_tune = 0
@@ -137,7 +156,14 @@ class BaseHMC(arraystep.GradientSharedStep):
 
         p0 = self.potential.random()
         start = self.integrator.compute_state(q0, p0)
+        adapt_step, step_size = self._begin_step(start)
+
+        hmc_step = self._hamiltonian_step(start, p0, step_size)
 
+        return self._end_step(hmc_step, adapt_step, perf_start, process_start)
+
+    def _begin_step(self, start):
+        """Check the initial state and return whether and with which step size to step."""
         if not np.isfinite(start.energy):
             model = self._model
             check_test_point = model.check_test_point()
@@ -164,14 +190,18 @@ class BaseHMC(arraystep.GradientSharedStep):
 
         if self._step_rand is not None:
             step_size = self._step_rand(step_size)
+        return adapt_step, step_size
 
-        hmc_step = self._hamiltonian_step(start, p0, step_size)
-
+    def _end_step(self, hmc_step, adapt_step, perf_start, process_start):
+        """Adapt to the trajectory and return the new position and the stats."""
         perf_end = time.perf_counter()
         process_end = time.process_time()
 
         self.step_adapt.update(hmc_step.accept_stat, adapt_step)
-        self.potential.update(hmc_step.end.q, hmc_step.end.q_grad, self.tune)
+        if self.warmup is None:
+            self.potential.update(hmc_step.end.q, hmc_step.end.q_grad, self.tune)
+        else:
+            phase, window = self._warmup_step(hmc_step.end)
         if hmc_step.divergence_info:
             info = hmc_step.divergence_info
             point = None
@@ -216,12 +246,36 @@ class BaseHMC(arraystep.GradientSharedStep):
 
         stats.update(hmc_step.stats)
         stats.update(self.step_adapt.stats())
+        if self.warmup is not None:
+            stats["warmup_phase"] = phase
+            stats["warmup_window"] = window
 
         return hmc_step.end.q, [stats]
 
+    def _warmup_step(self, state):
+        """Adapt the potential according to the warmup schedule.
+
+        Returns the phase and the slow window of the draw.
+        """
+        if not self.tune:
+            return SAMPLING, -1
+        draw = self.iter_count
+        phase, window = self.warmup.phase(draw)
+        if phase == SLOW_WINDOW:
+            self.potential.add_window_sample(state.q, state.q_grad)
+            if self.warmup.is_window_end(draw):
+                self.potential.finish_window()
+                self.step_adapt.restart()
+        return phase, window
+
     def reset_tuning(self, start=None):
         self.step_adapt.reset()
         self.reset(start=None)
+        # Warnings and divergence counts belong to a single chain
+        self.iter_count = 0
+        self._warnings = []
+        self._samples_after_tune = 0
+        self._num_divs_sample = 0
 
     def reset(self, start=None):
         self.tune = True
@@ -0,0 +1,199 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import logging
+import time
+
+from copy import copy, deepcopy
+
+import numpy as np
+
+from pymc3.math import logbern
+from pymc3.step_methods.hmc import integration
+from pymc3.step_methods.hmc.integration import IntegrationError
+from pymc3.step_methods.hmc.nuts import NUTS, _Tree
+from pymc3.theanof import floatX
+
+__all__ = ["BatchedNUTS"]
+
+logger = logging.getLogger("pymc3")
+
+
+class BatchedNUTS(NUTS):
+    r"""A No-U-Turn sampler that advances many chains in lockstep in one process.
+
+    Each chain has its own tree, mass matrix and step size adaptation, but
+    the leapfrog steps of all chains are computed together: in each round
+    the positions of all chains that still extend their trees are stacked
+    into a matrix of shape `(n_chains, ndim)` and evaluated in one call
+    of `ValueGradFunction.batch`.
+    This amortizes the python overhead of a logp evaluation over the chains
+    and lets the model use vectorized operations.
+
+    ``pm.sample`` uses this batched mode if ``BatchedNUTS`` is the only step
+    method, which requires it to sample all free variables of the model.
+    Otherwise it samples one chain at a time like ``NUTS``. If the batched
+    logp raises an error, the chains are evaluated one at a time from then on.
+
+    The parameters are the same as for ``NUTS``.
+
+    Examples
+    --------
+    .. code:: ipython
+
+        >>> with model:
+        ...     trace = pm.sample(step=pm.BatchedNUTS(), chains=32, cores=1)
+    """
+
+    def __init__(self, vars=None, **kwargs):
+        super().__init__(vars, **kwargs)
+        self._chain_steps = []
+        self._batching = self.batchable
+        if self._batching:
+            # Build the batched function now, so that errors are raised here
+            self._logp_dlogp_func._batch_function(True)
+
+    @property
+    def batchable(self):
+        """Whether the step method samples all free variables of its model."""
+        return not self._logp_dlogp_func._extra_vars
+
+    def _make_chain_step(self):
+        step = copy(self)
+        step.potential = deepcopy(self.potential)
+        step.step_adapt = deepcopy(self.step_adapt)
+        step._arena = deepcopy(self._arena)
+        step.integrator = integration.CpuLeapfrogIntegrator(
+            step.potential, self._logp_dlogp_func, step._arena
+        )
+        step._warnings = []
+        step._chain_steps = []
+        return step
+
+    def _astep_gen(self, q0):
+        """Generator version of `astep`, see `integration.evaluate_batch`."""
+        perf_start = time.perf_counter()
+        process_start = time.process_time()
+
+        p0 = self.potential.random()
+        start = yield from self.integrator.compute_state_gen(q0, p0)
+        adapt_step, step_size = self._begin_step(start)
+
+        hmc_step = yield from self._hamiltonian_step_gen(start, p0, step_size)
+
+        return self._end_step(hmc_step, adapt_step, perf_start, process_start)
+
+    def _hamiltonian_step_gen(self, start, p0, step_size):
+        """Generator version of `_hamiltonian_step`, see `integration.evaluate_batch`."""
+        tree = _BatchedTree(len(p0), self.integrator, start, step_size, self.Emax, self._arena)
+
+        for _ in range(self._current_max_treedepth()):
+            direction = logbern(np.log(0.5)) * 2 - 1
+            divergence_info, turning = yield from tree.extend(direction)
+
+            if divergence_info or turning:
+                break
+        else:
+            if not self.tune:
+                self._reached_max_treedepth += 1
+
+        return self._finish_tree(tree, divergence_info)
+
+    def step_batch(self, points):
+        """Perform one NUTS iteration for each chain.
+
+        Parameters
+        ----------
+        points : list of dict
+            The current points of the chains. The chains keep their state
+            between calls, so the points must always be in the same order.
+
+        Returns
+        -------
+        A list with a tuple `(point, stats)` for each chain.
+        """
+        if not self.batchable:
+            raise ValueError("BatchedNUTS must sample all free variables of the model.")
+        if len(points) != len(self._chain_steps):
+            self._chain_steps = [self._make_chain_step() for _ in points]
+
+        func = self._logp_dlogp_func
+        func.set_extra_values({})
+        iterations = [
+            chain_step._astep_gen(func.dict_to_array(point))
+            for chain_step, point in zip(self._chain_steps, points)
+        ]
+        batch = self._logp_dlogp_batch if self._batching else None
+        results = integration.evaluate_batch(iterations, func, batch)
+        return [(func.array_to_full_dict(q), stats) for q, stats in results]
+
+    def _logp_dlogp_batch(self, array):
+        try:
+            return self._logp_dlogp_func.batch(array)
+        except Exception as err:
+            logger.warning(
+                "Batched evaluation of the logp failed, the chains are evaluated one at "
+                "a time from now on: %s" % err
+            )
+            self._batching = False
+            raise
+
+    def stop_tuning(self):
+        super().stop_tuning()
+        for chain_step in self._chain_steps:
+            chain_step.stop_tuning()
+
+    def reset_tuning(self, start=None):
+        super().reset_tuning(start)
+        for chain_step in self._chain_steps:
+            chain_step.reset_tuning(start)
+
+    def chain_warnings(self):
+        """Return a list with the warnings of each chain of `step_batch`."""
+        return [chain_step.warnings() for chain_step in self._chain_steps]
+
+
+class _BatchedTree(_Tree):
+    """A NUTS tree whose methods are generators that yield the positions
+    at which the logp is needed, see `integration.evaluate_batch`.
+    """
+
+    def extend(self, direction):
+        if direction > 0:
+            tree, diverging, turning = yield from self._build_subtree(
+                self.right, self.depth, floatX(np.asarray(self.step_size))
+            )
+        else:
+            tree, diverging, turning = yield from self._build_subtree(
+                self.left, self.depth, floatX(np.asarray(-self.step_size))
+            )
+        return self._add_subtree(direction, tree, diverging, turning)
+
+    def _single_step(self, left, epsilon):
+        try:
+            right = yield from self.integrator.step_gen(epsilon, left)
+        except IntegrationError as err:
+            return self._leaf(left, None, err)
+        return self._leaf(left, right, None)
+
+    def _build_subtree(self, left, depth, epsilon):
+        if depth == 0:
+            return (yield from self._single_step(left, epsilon))
+
+        tree1, diverging, turning = yield from self._build_subtree(left, depth - 1, epsilon)
+        if diverging or turning:
+            return tree1, diverging, turning
+
+        tree2, diverging, turning = yield from self._build_subtree(tree1.right, depth - 1, epsilon)
+        return self._join_subtrees(depth, tree1, tree2, diverging, turning)
@@ -25,9 +25,78 @@ class IntegrationError(RuntimeError):
     pass
 
 
+class StateArena:
+    """A pool of preallocated arrays for the states of a trajectory.
+
+    `take` returns a free array, and only allocates a new one if the pool is
+    empty. Arrays go back to the pool with `release` once no state of the
+    trajectory uses them anymore, and `reset` returns all arrays that were
+    taken since the last reset. Arrays that are used outside of the
+    trajectory, like the returned sample, must be `detach`-ed before.
+
+    Parameters
+    ----------
+    size: int
+        The size of the arrays.
+    dtype: str
+        The dtype of the arrays.
+    capacity: int, default=0
+        The number of arrays to preallocate.
+    """
+
+    def __init__(self, size, dtype, capacity=0):
+        self.size = size
+        self.dtype = dtype
+        self.n_allocated = capacity
+        self._free = [np.empty(size, dtype) for _ in range(capacity)]
+        self._used = {}
+
+    def take(self):
+        """Return an array of the pool, with arbitrary values."""
+        if self._free:
+            array = self._free.pop()
+        else:
+            array = np.empty(self.size, self.dtype)
+            self.n_allocated += 1
+        self._used[id(array)] = array
+        return array
+
+    def release(self, *arrays):
+        """Return arrays to the pool. Arrays that are not in use are ignored."""
+        for array in arrays:
+            if self._used.pop(id(array), None) is not None:
+                self._free.append(array)
+
+    def detach(self, *arrays):
+        """Remove arrays from the pool, so that they are never reused."""
+        for array in arrays:
+            self._used.pop(id(array), None)
+
+    def reset(self):
+        """Return all arrays in use to the pool."""
+        self._free.extend(self._used.values())
+        self._used.clear()
+
+    def __getstate__(self):
+        # The arrays are not worth pickling
+        return {"size": self.size, "dtype": self.dtype}
+
+    def __setstate__(self, state):
+        self.__init__(state["size"], state["dtype"])
+
+
 class CpuLeapfrogIntegrator:
-    def __init__(self, potential, logp_dlogp_func):
-        """Leapfrog integrator using CPU."""
+    def __init__(self, potential, logp_dlogp_func, arena=None):
+        """Leapfrog integrator using CPU.
+
+        Parameters
+        ----------
+        potential: quadpotential.QuadPotential
+        logp_dlogp_func: ValueGradFunction
+        arena: StateArena, optional
+            Take the arrays of the new states from this arena instead of
+            allocating them.
+        """
         self._potential = potential
         self._logp_dlogp_func = logp_dlogp_func
         self._dtype = self._logp_dlogp_func.dtype
@@ -36,12 +105,34 @@ class CpuLeapfrogIntegrator:
                 "dtypes of potential (%s) and logp function (%s)"
                 "don't match." % (self._potential.dtype, self._dtype)
             )
+        self._arena = arena
+        self._axpy = linalg.blas.get_blas_funcs("axpy", dtype=self._dtype)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # BLAS functions can not be pickled
+        del state["_axpy"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._axpy = linalg.blas.get_blas_funcs("axpy", dtype=self._dtype)
 
     def compute_state(self, q, p):
         """Compute Hamiltonian functions using a position and momentum."""
         if q.dtype != self._dtype or p.dtype != self._dtype:
             raise ValueError("Invalid dtype. Must be %s" % self._dtype)
         logp, dlogp = self._logp_dlogp_func(q)
+        return self._make_state(q, p, logp, dlogp)
+
+    def compute_state_gen(self, q, p):
+        """Generator version of `compute_state`, see `evaluate_batch`."""
+        if q.dtype != self._dtype or p.dtype != self._dtype:
+            raise ValueError("Invalid dtype. Must be %s" % self._dtype)
+        logp, dlogp = yield q
+        return self._make_state(q, p, logp, dlogp)
+
+    def _make_state(self, q, p, logp, dlogp):
         v = self._potential.velocity(p)
         kinetic = self._potential.energy(p, velocity=v)
         energy = kinetic - logp
@@ -58,35 +149,41 @@ class CpuLeapfrogIntegrator:
             step scale
         state: State namedtuple,
             current position data
-        out: (optional) State namedtuple,
-            preallocated arrays to write to in place
 
         Returns
         -------
-        None if `out` is provided, else a State namedtuple
+        A State namedtuple
         """
         try:
-            return self._step(epsilon, state)
-        except linalg.LinAlgError as err:
-            msg = "LinAlgError during leapfrog step."
-            raise IntegrationError(msg)
-        except ValueError as err:
-            # Raised by many scipy.linalg functions
-            scipy_msg = "array must not contain infs or nans"
-            if len(err.args) > 0 and scipy_msg in err.args[0].lower():
-                msg = "Infs or nans in scipy.linalg during leapfrog step."
-                raise IntegrationError(msg)
-            else:
-                raise
+            q_new, p_new, v_new = self._move(epsilon, state)
+            logp, q_new_grad = self._logp_dlogp_func(q_new)
+            return self._finish_step(epsilon, q_new, p_new, v_new, logp, q_new_grad)
+        except (linalg.LinAlgError, ValueError) as err:
+            raise _integration_error(err)
+
+    def step_gen(self, epsilon, state):
+        """Generator version of `step`, see `evaluate_batch`."""
+        try:
+            q_new, p_new, v_new = self._move(epsilon, state)
+            logp, q_new_grad = yield q_new
+            return self._finish_step(epsilon, q_new, p_new, v_new, logp, q_new_grad)
+        except (linalg.LinAlgError, ValueError) as err:
+            raise _integration_error(err)
 
-    def _step(self, epsilon, state):
-        axpy = linalg.blas.get_blas_funcs("axpy", dtype=self._dtype)
-        pot = self._potential
+    def _move(self, epsilon, state):
+        """Update the momentum by half a step and the position by a full step."""
+        axpy = self._axpy
 
-        q_new = state.q.copy()
-        p_new = state.p.copy()
-        v_new = np.empty_like(q_new)
-        q_new_grad = np.empty_like(q_new)
+        if self._arena is None:
+            q_new = state.q.copy()
+            p_new = state.p.copy()
+            v_new = np.empty_like(q_new)
+        else:
+            q_new = self._arena.take()
+            p_new = self._arena.take()
+            v_new = self._arena.take()
+            np.copyto(q_new, state.q)
+            np.copyto(p_new, state.p)
 
         dt = 0.5 * epsilon
 
@@ -94,17 +191,91 @@ class CpuLeapfrogIntegrator:
         # p_new = p + dt * q_grad
         axpy(state.q_grad, p_new, a=dt)
 
-        pot.velocity(p_new, out=v_new)
+        self._potential.velocity(p_new, out=v_new)
         # q is already stored in q_new
         # q_new = q + epsilon * v_new
         axpy(v_new, q_new, a=epsilon)
+        return q_new, p_new, v_new
 
-        logp = self._logp_dlogp_func(q_new, q_new_grad)
-
+    def _finish_step(self, epsilon, q_new, p_new, v_new, logp, q_new_grad):
+        """Update the momentum by the second half step and return the new state."""
         # p_new = p_new + dt * q_new_grad
-        axpy(q_new_grad, p_new, a=dt)
+        self._axpy(q_new_grad, p_new, a=0.5 * epsilon)
 
-        kinetic = pot.velocity_energy(p_new, v_new)
+        kinetic = self._potential.velocity_energy(p_new, v_new)
         energy = kinetic - logp
 
         return State(q_new, p_new, v_new, q_new_grad, energy, logp)
+
+
+def _integration_error(err):
+    """Turn numerical errors during a leapfrog step into `IntegrationError`.
+
+    Other errors are returned unchanged.
+    """
+    if isinstance(err, linalg.LinAlgError):
+        return IntegrationError("LinAlgError during leapfrog step.")
+    # Raised by many scipy.linalg functions
+    scipy_msg = "array must not contain infs or nans"
+    if len(err.args) > 0 and scipy_msg in err.args[0].lower():
+        return IntegrationError("Infs or nans in scipy.linalg during leapfrog step.")
+    return err
+
+
+def evaluate_batch(steps, logp_dlogp_func, logp_dlogp_batch=None):
+    """Run several computations that need values and gradients of the logp in lockstep.
+
+    Each generator in `steps` yields the positions at which it needs the
+    logp and expects a tuple `(logp, dlogp)` to be sent back for each of
+    them. Errors in the logp function are raised inside of the generator.
+    In each round the pending positions of all generators are stacked
+    into an array of shape `(n, size)` and passed to `logp_dlogp_batch`,
+    which must return the logp values with shape `(n,)` and the gradients
+    with shape `(n, size)`. If it is None, `logp_dlogp_func` is called for
+    each position. If the batched call fails, the positions of this and all
+    later rounds are evaluated one by one, so that the error is only raised
+    in the generator that caused it.
+
+    Returns a list with the return values of the generators.
+    """
+    results = [None] * len(steps)
+    pending = {}
+
+    def advance(i, method, value):
+        try:
+            pending[i] = method(value)
+        except StopIteration as stop:
+            pending.pop(i, None)
+            results[i] = stop.value
+
+    for i, gen in enumerate(steps):
+        try:
+            pending[i] = next(gen)
+        except StopIteration as stop:
+            results[i] = stop.value
+
+    while pending:
+        idxs = list(pending)
+        outcomes = None
+        if logp_dlogp_batch is not None:
+            try:
+                logps, grads = logp_dlogp_batch(np.stack([pending[i] for i in idxs]))
+            except Exception:
+                logp_dlogp_batch = None
+            else:
+                outcomes = [(None, (logp, grad)) for logp, grad in zip(logps, grads)]
+        if outcomes is None:
+            outcomes = []
+            for i in idxs:
+                try:
+                    outcomes.append((None, logp_dlogp_func(pending[i])))
+                except Exception as err:
+                    outcomes.append((err, None))
+
+        for i, (err, result) in zip(idxs, outcomes):
+            if err is not None:
+                advance(i, steps[i].throw, err)
+            else:
+                advance(i, steps[i].send, result)
+
+    return results
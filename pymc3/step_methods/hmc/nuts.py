@@ -20,6 +20,7 @@ from pymc3.backends.report import SamplerWarning, WarningType
 from pymc3.distributions import BART
 from pymc3.math import logbern, logdiffexp_numpy
 from pymc3.step_methods.arraystep import Competence
+from pymc3.step_methods.hmc import integration
 from pymc3.step_methods.hmc.base_hmc import BaseHMC, DivergenceInfo, HMCStepData
 from pymc3.step_methods.hmc.integration import IntegrationError
 from pymc3.theanof import floatX
@@ -109,7 +110,7 @@ class NUTS(BaseHMC):
         }
     ]
 
-    def __init__(self, vars=None, max_treedepth=10, early_max_treedepth=8, **kwargs):
+    def __init__(self, vars=None, max_treedepth=10, early_max_treedepth=8, arena=False, **kwargs):
         r"""Set up the No-U-Turn sampler.
 
         Parameters
@@ -145,6 +146,12 @@ class NUTS(BaseHMC):
             depth is reached.
         early_max_treedepth: int, default=8
             The maximum tree depth during the first 200 tuning samples.
+        arena: bool, default=False
+            Take the arrays of the states of the trajectory from a pool of
+            preallocated arrays, and return them to the pool as soon as the
+            tree does not need them anymore. This avoids most allocations
+            in the leapfrog steps, which helps for models with cheap
+            gradients. The draws are the same as without it.
         scaling: array_like, ndim = {1,2}
             The inverse mass, or precision matrix. One dimensional arrays are
             interpreted as diagonal matrices. If `is_cov` is set to True,
@@ -167,19 +174,24 @@ class NUTS(BaseHMC):
         """
         super().__init__(vars, **kwargs)
 
+        self._arena = None
+        if arena:
+            func = self._logp_dlogp_func
+            self._arena = integration.StateArena(func.size, func.dtype)
+            self.integrator = integration.CpuLeapfrogIntegrator(self.potential, func, self._arena)
+
         self.max_treedepth = max_treedepth
         self.early_max_treedepth = early_max_treedepth
         self._reached_max_treedepth = 0
 
-    def _hamiltonian_step(self, start, p0, step_size):
-        if self.tune and self.iter_count < 200:
-            max_treedepth = self.early_max_treedepth
-        else:
-            max_treedepth = self.max_treedepth
+    def reset_tuning(self, start=None):
+        super().reset_tuning(start)
+        self._reached_max_treedepth = 0
 
-        tree = _Tree(len(p0), self.integrator, start, step_size, self.Emax)
+    def _hamiltonian_step(self, start, p0, step_size):
+        tree = _Tree(len(p0), self.integrator, start, step_size, self.Emax, self._arena)
 
-        for _ in range(max_treedepth):
+        for _ in range(self._current_max_treedepth()):
             direction = logbern(np.log(0.5)) * 2 - 1
             divergence_info, turning = tree.extend(direction)
 
@@ -189,6 +201,23 @@ class NUTS(BaseHMC):
             if not self.tune:
                 self._reached_max_treedepth += 1
 
+        return self._finish_tree(tree, divergence_info)
+
+    def _current_max_treedepth(self):
+        if self.tune and self.iter_count < 200:
+            return self.early_max_treedepth
+        return self.max_treedepth
+
+    def _finish_tree(self, tree, divergence_info):
+        if self._arena is not None:
+            # The draw and the states of a divergence outlive the tree
+            self._arena.detach(tree.proposal.q)
+            if divergence_info:
+                for state in (divergence_info.state, divergence_info.state_div):
+                    if state is not None:
+                        self._arena.detach(state.q, state.p, state.v)
+            self._arena.reset()
+
         stats = tree.stats()
         accept_stat = stats["mean_tree_accept"]
         return HMCStepData(tree.proposal, accept_stat, divergence_info, stats)
@@ -226,7 +255,7 @@ Subtree = namedtuple(
 
 
 class _Tree:
-    def __init__(self, ndim, integrator, start, step_size, Emax):
+    def __init__(self, ndim, integrator, start, step_size, Emax, arena=None):
         """Binary tree from the NUTS algorithm.
 
         Parameters
@@ -240,6 +269,10 @@ class _Tree:
         Emax: float
             The maximum energy change to accept before aborting the
             transition as diverging.
+        arena: integration.StateArena, optional
+            The arena of the integrator. The arrays of the states inside
+            the tree are returned to it as soon as they are not needed
+            anymore.
         """
         self.ndim = ndim
         self.integrator = integrator
@@ -255,9 +288,34 @@ class _Tree:
         self.log_weighted_accept_sum = -np.inf
         self.mean_tree_accept = 0.0
         self.n_proposals = 0
-        self.p_sum = start.p.copy()
+        self.arena = arena
+        self.p_sum = self._new_array()
+        np.copyto(self.p_sum, start.p)
         self.max_energy_change = 0
 
+    def _new_array(self):
+        if self.arena is None:
+            return np.empty(self.ndim, self.start.p.dtype)
+        return self.arena.take()
+
+    def _release(self, interior, dropped, keep):
+        """Return the arrays of states and sums that left the tree to the arena.
+
+        `interior` are states that are no longer at an edge of the tree,
+        `dropped` arrays that are no longer used, unless they are in
+        `keep`.
+        """
+        if self.arena is None:
+            return
+        keep = {id(array) for array in keep}
+        for state in interior:
+            dropped.extend((state.q, state.p, state.v))
+        self.arena.release(*[array for array in dropped if id(array) not in keep])
+
+    def _edges(self, left, right, p_sum, proposal):
+        """The arrays that a tree with the given edges, sum and proposal needs."""
+        return [left.q, left.p, left.v, right.q, right.p, right.v, p_sum, proposal.q]
+
     def extend(self, direction):
         """Double the treesize by extending the tree in the given direction.
 
@@ -274,19 +332,27 @@ class _Tree:
             tree, diverging, turning = self._build_subtree(
                 self.right, self.depth, floatX(np.asarray(self.step_size))
             )
+        else:
+            tree, diverging, turning = self._build_subtree(
+                self.left, self.depth, floatX(np.asarray(-self.step_size))
+            )
+        return self._add_subtree(direction, tree, diverging, turning)
+
+    def _add_subtree(self, direction, tree, diverging, turning):
+        """Add a new subtree at the edge of the tree in the given direction."""
+        if direction > 0:
             leftmost_begin, leftmost_end = self.left, self.right
             rightmost_begin, rightmost_end = tree.left, tree.right
             leftmost_p_sum = self.p_sum
             rightmost_p_sum = tree.p_sum
+            interior = [self.right, tree.left]
             self.right = tree.right
         else:
-            tree, diverging, turning = self._build_subtree(
-                self.left, self.depth, floatX(np.asarray(-self.step_size))
-            )
             leftmost_begin, leftmost_end = tree.right, tree.left
             rightmost_begin, rightmost_end = self.left, self.right
             leftmost_p_sum = tree.p_sum
             rightmost_p_sum = self.p_sum
+            interior = [self.left, tree.left]
             self.left = tree.right
 
         self.depth += 1
@@ -296,8 +362,12 @@ class _Tree:
             return diverging, turning
 
         size1, size2 = self.log_size, tree.log_size
+        dropped = [tree.p_sum]
         if logbern(size2 - size1):
+            dropped.append(self.proposal.q)
             self.proposal = tree.proposal
+        else:
+            dropped.append(tree.proposal.q)
 
         self.log_size = np.logaddexp(self.log_size, tree.log_size)
         self.log_weighted_accept_sum = np.logaddexp(
@@ -310,12 +380,15 @@ class _Tree:
             left, right = self.left, self.right
             p_sum = self.p_sum
             turning = (p_sum.dot(left.v) <= 0) or (p_sum.dot(right.v) <= 0)
-            p_sum1 = leftmost_p_sum + rightmost_begin.p
+            p_sum1 = np.add(leftmost_p_sum, rightmost_begin.p, out=self._new_array())
             turning1 = (p_sum1.dot(leftmost_begin.v) <= 0) or (p_sum1.dot(rightmost_begin.v) <= 0)
-            p_sum2 = leftmost_end.p + rightmost_p_sum
+            p_sum2 = np.add(leftmost_end.p, rightmost_p_sum, out=self._new_array())
             turning2 = (p_sum2.dot(leftmost_end.v) <= 0) or (p_sum2.dot(rightmost_end.v) <= 0)
             turning = turning | turning1 | turning2
+            dropped.extend((p_sum1, p_sum2))
 
+        keep = self._edges(self.left, self.right, self.p_sum, self.proposal)
+        self._release(interior, dropped, keep)
         return diverging, turning
 
     def _single_step(self, left, epsilon):
@@ -323,9 +396,13 @@ class _Tree:
         try:
             right = self.integrator.step(epsilon, left)
         except IntegrationError as err:
-            error_msg = str(err)
-            error = err
-            right = None
+            return self._leaf(left, None, err)
+        return self._leaf(left, right, None)
+
+    def _leaf(self, left, right, error):
+        """The subtree with the single state `right`, or a divergence if the step failed."""
+        if error is not None:
+            error_msg = str(error)
         else:
             # h - H0
             energy_change = right.energy - self.start_energy
@@ -366,19 +443,24 @@ class _Tree:
             return tree1, diverging, turning
 
         tree2, diverging, turning = self._build_subtree(tree1.right, depth - 1, epsilon)
+        return self._join_subtrees(depth, tree1, tree2, diverging, turning)
 
+    def _join_subtrees(self, depth, tree1, tree2, diverging, turning):
+        """Join two adjacent subtrees of the given depth into one."""
         left, right = tree1.left, tree2.right
 
         if not (diverging or turning):
-            p_sum = tree1.p_sum + tree2.p_sum
+            p_sum = np.add(tree1.p_sum, tree2.p_sum, out=self._new_array())
             turning = (p_sum.dot(left.v) <= 0) or (p_sum.dot(right.v) <= 0)
+            dropped = [tree1.p_sum, tree2.p_sum]
             # Additional U turn check only when depth > 1 to avoid redundant work.
             if depth - 1 > 0:
-                p_sum1 = tree1.p_sum + tree2.left.p
+                p_sum1 = np.add(tree1.p_sum, tree2.left.p, out=self._new_array())
                 turning1 = (p_sum1.dot(tree1.left.v) <= 0) or (p_sum1.dot(tree2.left.v) <= 0)
-                p_sum2 = tree1.right.p + tree2.p_sum
+                p_sum2 = np.add(tree1.right.p, tree2.p_sum, out=self._new_array())
                 turning2 = (p_sum2.dot(tree1.right.v) <= 0) or (p_sum2.dot(tree2.right.v) <= 0)
                 turning = turning | turning1 | turning2
+                dropped.extend((p_sum1, p_sum2))
 
             log_size = np.logaddexp(tree1.log_size, tree2.log_size)
             log_weighted_accept_sum = np.logaddexp(
@@ -386,8 +468,13 @@ class _Tree:
             )
             if logbern(tree2.log_size - log_size):
                 proposal = tree2.proposal
+                dropped.append(tree1.proposal.q)
             else:
                 proposal = tree1.proposal
+                dropped.append(tree2.proposal.q)
+
+            keep = self._edges(left, right, p_sum, proposal)
+            self._release([tree1.right, tree2.left], dropped, keep)
         else:
             p_sum = tree1.p_sum
             log_size = tree1.log_size
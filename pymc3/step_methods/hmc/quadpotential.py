@@ -12,6 +12,7 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import copy
 import warnings
 
 import numpy as np
@@ -21,7 +22,10 @@ import theano
 from numpy.random import normal
 from scipy.sparse import issparse
 
-from pymc3.theanof import floatX
+from pymc3.blocking import ArrayOrdering
+from pymc3.model import modelcontext
+from pymc3.theanof import floatX, inputvars
+from pymc3.util import get_var_name
 
 __all__ = [
     "quad_potential",
@@ -30,6 +34,10 @@ __all__ = [
     "QuadPotentialFullInv",
     "QuadPotentialDiagAdapt",
     "QuadPotentialFullAdapt",
+    "QuadPotentialLowRank",
+    "QuadPotentialLowRankAdapt",
+    "QuadPotentialBlockAdapt",
+    "var_blocks",
     "isquadpotential",
 ]
 
@@ -115,6 +123,18 @@ class QuadPotential:
         """
         pass
 
+    def add_window_sample(self, sample, grad):
+        """Inform the potential about a sample in a slow window of a `WarmupSchedule`.
+
+        Adaptive potentials collect the samples of the window, and only
+        change the mass matrix in `finish_window`.
+        """
+        pass
+
+    def finish_window(self):
+        """Set the mass matrix to the estimate of the finished slow window."""
+        pass
+
     def raise_ok(self, vmap=None):
         """Check if the mass matrix is ok, and raise ValueError if not.
 
@@ -137,12 +157,46 @@ class QuadPotential:
         pass
 
 
+def _pool_estimate(pool, estimate):
+    """Publish `estimate` of this chain to `pool` and merge it with those of the other chains."""
+    if pool is None:
+        return estimate
+    pool.publish(estimate.as_array())
+    pooled = copy.deepcopy(estimate)
+    for values in pool.others():
+        pooled.add_array(values)
+    return pooled
+
+
+class _PoolMixin:
+    """Support for pooling the estimates of the mass matrix across chains.
+
+    `set_pool` connects the potential to an object with methods
+    `publish(values)`, which shares the estimate of this chain, and
+    `others()`, which returns the latest shared estimates of the other
+    chains, see `pymc3.parallel_sampling`. The potential then adapts to
+    the estimate of all chains together. `pool_size` is the number of
+    values of an estimate.
+    """
+
+    _pool = None
+
+    def set_pool(self, pool):
+        self._pool = pool
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The pool is only valid in the process of its chain
+        state.pop("_pool", None)
+        return state
+
+
 def isquadpotential(value):
     """Check whether an object might be a QuadPotential object."""
     return isinstance(value, QuadPotential)
 
 
-class QuadPotentialDiagAdapt(QuadPotential):
+class QuadPotentialDiagAdapt(_PoolMixin, QuadPotential):
     """Adapt a diagonal mass matrix from the sample variances."""
 
     def __init__(
@@ -198,6 +252,10 @@ class QuadPotentialDiagAdapt(QuadPotential):
         self._background_var = _WeightedVariance(self._n, dtype=self.dtype)
         self._n_samples = 0
 
+    @property
+    def pool_size(self):
+        return 1 + 2 * self._n
+
     def velocity(self, x, out=None):
         """Compute the current velocity at a position in parameter space."""
         return np.multiply(self._var, x, out=out)
@@ -231,7 +289,7 @@ class QuadPotentialDiagAdapt(QuadPotential):
 
         self._foreground_var.add_sample(sample, weight=1)
         self._background_var.add_sample(sample, weight=1)
-        self._update_from_weightvar(self._foreground_var)
+        self._update_from_weightvar(_pool_estimate(self._pool, self._foreground_var))
 
         if self._n_samples > 0 and self._n_samples % self.adaptation_window == 0:
             self._foreground_var = self._background_var
@@ -240,6 +298,16 @@ class QuadPotentialDiagAdapt(QuadPotential):
 
         self._n_samples += 1
 
+    def add_window_sample(self, sample, grad):
+        """Inform the potential about a sample in a slow window of a `WarmupSchedule`."""
+        self._background_var.add_sample(sample, weight=1)
+
+    def finish_window(self):
+        """Set the mass matrix to the estimate of the finished slow window."""
+        self._update_from_weightvar(_pool_estimate(self._pool, self._background_var))
+        self._foreground_var = self._background_var
+        self._background_var = _WeightedVariance(self._n, dtype=self.dtype)
+
     def raise_ok(self, vmap):
         """Check if the mass matrix is ok, and raise ValueError if not.
 
@@ -360,6 +428,22 @@ class _WeightedVariance:
         new_diff = x - self.mean
         self.raw_var[:] += weight * old_diff * new_diff
 
+    def as_array(self):
+        """Return the number of samples, the mean and the raw variance in one array."""
+        return np.concatenate([[self.n_samples], self.mean, self.raw_var])
+
+    def add_array(self, values):
+        """Merge the estimate of `as_array` of other samples into this estimate."""
+        n_samples = values[0]
+        if n_samples == 0:
+            return
+        nelem = len(self.mean)
+        diff = values[1 : nelem + 1] - self.mean
+        total = self.n_samples + n_samples
+        self.mean[:] += diff * n_samples / total
+        self.raw_var[:] += values[nelem + 1 :] + diff ** 2 * self.n_samples * n_samples / total
+        self.n_samples = total
+
     def current_variance(self, out=None):
         if self.n_samples == 0:
             raise ValueError("Can not compute variance without samples.")
@@ -497,7 +581,7 @@ class QuadPotentialFull(QuadPotential):
     __call__ = random
 
 
-class QuadPotentialFullAdapt(QuadPotentialFull):
+class QuadPotentialFullAdapt(_PoolMixin, QuadPotentialFull):
     """Adapt a dense mass matrix using the sample covariances."""
 
     def __init__(
@@ -554,6 +638,10 @@ class QuadPotentialFullAdapt(QuadPotentialFull):
         self._background_cov = _WeightedCovariance(self._n, dtype=self.dtype)
         self._n_samples = 0
 
+    @property
+    def pool_size(self):
+        return 1 + self._n + self._n ** 2
+
     def _update_from_weightvar(self, weightvar):
         weightvar.current_covariance(out=self._cov)
         try:
@@ -574,7 +662,7 @@ class QuadPotentialFullAdapt(QuadPotentialFull):
         # Update the covariance matrix and recompute the Cholesky factorization
         # every "update_window" steps
         if (delta + 1) % self._update_window == 0:
-            self._update_from_weightvar(self._foreground_cov)
+            self._update_from_weightvar(_pool_estimate(self._pool, self._foreground_cov))
 
         # Reset the background covariance if we are at the end of the adaptation
         # window.
@@ -587,6 +675,16 @@ class QuadPotentialFullAdapt(QuadPotentialFull):
 
         self._n_samples += 1
 
+    def add_window_sample(self, sample, grad):
+        """Inform the potential about a sample in a slow window of a `WarmupSchedule`."""
+        self._background_cov.add_sample(sample, weight=1)
+
+    def finish_window(self):
+        """Set the mass matrix to the estimate of the finished slow window."""
+        self._update_from_weightvar(_pool_estimate(self._pool, self._background_cov))
+        self._foreground_cov = self._background_cov
+        self._background_cov = _WeightedCovariance(self._n, dtype=self.dtype)
+
     def raise_ok(self, vmap):
         if self._chol_error is not None:
             raise ValueError(str(self._chol_error))
@@ -636,6 +734,23 @@ class _WeightedCovariance:
         new_diff = x - self.mean
         self.raw_cov[:] += weight * new_diff[:, None] * old_diff[None, :]
 
+    def as_array(self):
+        """Return the number of samples, the mean and the raw covariance in one array."""
+        return np.concatenate([[self.n_samples], self.mean, self.raw_cov.ravel()])
+
+    def add_array(self, values):
+        """Merge the estimate of `as_array` of other samples into this estimate."""
+        n_samples = values[0]
+        if n_samples == 0:
+            return
+        nelem = len(self.mean)
+        diff = values[1 : nelem + 1] - self.mean
+        total = self.n_samples + n_samples
+        self.mean[:] += diff * n_samples / total
+        self.raw_cov[:] += values[nelem + 1 :].reshape(nelem, nelem)
+        self.raw_cov[:] += np.outer(diff, diff) * self.n_samples * n_samples / total
+        self.n_samples = total
+
     def current_covariance(self, out=None):
         if self.n_samples == 0:
             raise ValueError("Can not compute covariance without samples.")
@@ -648,6 +763,476 @@ class _WeightedCovariance:
         return np.array(self.mean, dtype=self._dtype)
 
 
+class QuadPotentialLowRank(QuadPotential):
+    """QuadPotential with a diagonal plus low rank covariance matrix.
+
+    The covariance matrix is ``D^(1/2) (I + U diag(vals - 1) U^T) D^(1/2)``
+    where ``D`` is diagonal and ``U`` has orthonormal columns. Velocity,
+    energy and random momentum only cost ``O(n * k)`` for ``k`` columns.
+    """
+
+    def __init__(self, diag, vecs=None, vals=None, dtype=None):
+        """Set up the covariance matrix.
+
+        Parameters
+        ----------
+        diag: array, ndim = 1
+            The diagonal ``D``.
+        vecs: array, ndim = 2, optional
+            The ``n x k`` matrix ``U`` with orthonormal columns.
+        vals: array, ndim = 1, optional
+            The eigenvalues of the covariance in the scaled space along the
+            columns of ``U``.
+        """
+        if dtype is None:
+            dtype = theano.config.floatX
+        self.dtype = dtype
+        self._n = len(diag)
+        if vecs is None:
+            vecs = np.zeros((self._n, 0))
+            vals = np.zeros(0)
+        self._set(diag, vecs, vals)
+
+    def _set(self, diag, vecs, vals):
+        if vecs.shape != (self._n, len(vals)):
+            raise ValueError(
+                "Wrong shape for vecs: expected {} got {}".format((self._n, len(vals)), vecs.shape)
+            )
+        self._diag = np.array(diag, dtype=self.dtype, copy=True)
+        self._stds = np.sqrt(self._diag)
+        self._vecs = np.array(vecs, dtype=self.dtype, copy=True)
+        self._vals = np.array(vals, dtype=self.dtype, copy=True)
+
+    def velocity(self, x, out=None):
+        """Compute the current velocity at a position in parameter space."""
+        y = self._stds * x
+        y += self._vecs.dot((self._vals - 1) * self._vecs.T.dot(y))
+        return np.multiply(self._stds, y, out=out)
+
+    def random(self):
+        """Draw random value from QuadPotential."""
+        vals = normal(size=self._n).astype(self.dtype)
+        vals += self._vecs.dot((self._vals ** -0.5 - 1) * self._vecs.T.dot(vals))
+        return vals / self._stds
+
+    def energy(self, x, velocity=None):
+        """Compute kinetic energy at a position in parameter space."""
+        if velocity is None:
+            velocity = self.velocity(x)
+        return 0.5 * np.dot(x, velocity)
+
+    def velocity_energy(self, x, v_out):
+        """Compute velocity and return kinetic energy at a position in parameter space."""
+        self.velocity(x, out=v_out)
+        return 0.5 * np.dot(x, v_out)
+
+
+class QuadPotentialLowRankAdapt(QuadPotentialLowRank):
+    """Adapt a diagonal plus low rank mass matrix from the draws and gradients.
+
+    The estimate uses the last `adaptation_window` tuning draws and their
+    gradients. The diagonal is ``sqrt(var(draws) / var(grads))``, which is
+    exact for normal posteriors. After scaling with the diagonal, the
+    leading eigenvectors of the covariance of the draws and of the
+    covariance of the gradients span the directions with large and small
+    variance. In that subspace the covariance is estimated as the geometric
+    mean of the covariance of the draws and the inverse covariance of the
+    gradients, and the `rank` eigenvectors of the estimate whose eigenvalues
+    are furthest from 1 are kept. Unlike the covariance of the draws alone,
+    this estimate is not inflated by noise when the window is much smaller
+    than the number of parameters.
+
+    The draws and gradients of the window are stored, which needs memory
+    for ``2 * adaptation_window * n`` values, and each update costs
+    ``O(n * adaptation_window**2)``.
+    """
+
+    def __init__(
+        self,
+        n,
+        initial_diag=None,
+        rank=10,
+        adaptation_window=100,
+        update_window=20,
+        dtype=None,
+    ):
+        """Set up an adaptive diagonal plus low rank mass matrix.
+
+        Parameters
+        ----------
+        n: int
+            The number of parameters.
+        initial_diag: array, ndim = 1, optional
+            The diagonal of the covariance before the first update.
+            Defaults to the identity.
+        rank: int, default=10
+            The number of columns of the low rank correction.
+        adaptation_window: int, default=100
+            The number of recent tuning draws that are used for the estimate.
+        update_window: int, default=20
+            Update the mass matrix every `update_window` tuning draws.
+        """
+        if initial_diag is not None and initial_diag.ndim != 1:
+            raise ValueError("Initial diagonal must be one-dimensional.")
+        if initial_diag is not None and len(initial_diag) != n:
+            raise ValueError(
+                "Wrong shape for initial_diag: expected {} got {}".format(n, len(initial_diag))
+            )
+        if adaptation_window < 3:
+            raise ValueError("The adaptation window needs at least 3 draws.")
+
+        if dtype is None:
+            dtype = theano.config.floatX
+        if initial_diag is None:
+            initial_diag = np.ones(n, dtype=dtype)
+
+        self.dtype = dtype
+        self._n = n
+        self._initial_diag = initial_diag
+        self.rank = int(rank)
+        self.adaptation_window = int(adaptation_window)
+        self._update_window = int(update_window)
+
+        self.reset()
+
+    def reset(self):
+        self._set(self._initial_diag, np.zeros((self._n, 0)), np.zeros(0))
+        self._draws = np.zeros((self.adaptation_window, self._n), dtype="d")
+        self._grads = np.zeros((self.adaptation_window, self._n), dtype="d")
+        self._n_samples = 0
+
+    def update(self, sample, grad, tune):
+        """Inform the potential about a new sample during tuning."""
+        if not tune:
+            return
+
+        idx = self._n_samples % self.adaptation_window
+        self._draws[idx] = sample
+        self._grads[idx] = grad
+        self._n_samples += 1
+
+        if self._n_samples >= 3 and self._n_samples % self._update_window == 0:
+            n_draws = min(self._n_samples, self.adaptation_window)
+            self._set(*self._estimate(self._draws[:n_draws], self._grads[:n_draws]))
+
+    def add_window_sample(self, sample, grad):
+        """Inform the potential about a sample in a slow window of a `WarmupSchedule`.
+
+        Only the last `adaptation_window` draws of the window are kept.
+        """
+        idx = self._n_samples % self.adaptation_window
+        self._draws[idx] = sample
+        self._grads[idx] = grad
+        self._n_samples += 1
+
+    def finish_window(self):
+        """Set the mass matrix to the estimate of the finished slow window."""
+        n_draws = min(self._n_samples, self.adaptation_window)
+        if n_draws >= 3:
+            self._set(*self._estimate(self._draws[:n_draws], self._grads[:n_draws]))
+        self._n_samples = 0
+
+    def _estimate(self, draws, grads):
+        """Estimate the diagonal, eigenvectors and eigenvalues of the covariance."""
+        n_draws = len(draws)
+        draws = draws - draws.mean(0)
+        grads = grads - grads.mean(0)
+        draws_var = (draws ** 2).mean(0)
+        grads_var = (grads ** 2).mean(0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            diag = np.where(grads_var > 0, np.sqrt(draws_var / grads_var), draws_var)
+        # Regularize like the diagonal adaptation in Stan, so that parameters
+        # that did not move in the window keep a positive scale
+        diag = (n_draws * diag + 5e-3) / (n_draws + 5)
+        stds = np.sqrt(diag)
+        draws /= stds
+        grads *= stds
+
+        # Leading eigenvectors of both covariances, orthonormalized together
+        rank = min(self.rank, n_draws - 1, self._n)
+        vecs = np.concatenate([_leading_vecs(draws, rank), _leading_vecs(grads, rank)], axis=1)
+        vecs, _ = np.linalg.qr(vecs)
+
+        # The geometric mean M of the covariance A of the draws and the
+        # inverse of the covariance B of the gradients solves M B M = A.
+        proj_draws = draws.dot(vecs)
+        proj_grads = grads.dot(vecs)
+        cov_draws = proj_draws.T.dot(proj_draws) / n_draws
+        cov_grads = proj_grads.T.dot(proj_grads) / n_draws
+        root, inv_root = _sqrt_inv_sqrt(cov_grads)
+        mean, _ = _sqrt_inv_sqrt(root.dot(cov_draws).dot(root))
+        mean = inv_root.dot(mean).dot(inv_root)
+
+        vals, eigvecs = np.linalg.eigh(mean)
+        keep = np.argsort(-np.abs(np.log(vals)))[:rank]
+        return diag, vecs.dot(eigvecs[:, keep]), vals[keep]
+
+    def raise_ok(self, vmap):
+        if not np.all(np.isfinite(self._diag)) or not np.all(np.isfinite(self._vals)):
+            raise ValueError("Mass matrix contains non-finite values.")
+
+
+def _leading_vecs(x, k):
+    """The `k` leading eigenvectors of ``x.T.dot(x)``, computed from the smaller gram matrix."""
+    vals, vecs = np.linalg.eigh(x.dot(x.T))
+    vecs = x.T.dot(vecs[:, ::-1][:, :k])
+    return vecs / np.maximum(np.linalg.norm(vecs, axis=0), 1e-300)
+
+
+def _sqrt_inv_sqrt(a):
+    """Square root and inverse square root of a symmetric positive semi-definite matrix."""
+    vals, vecs = np.linalg.eigh(a)
+    vals = np.maximum(vals, 1e-10 * max(vals.max(), 1e-300))
+    root = (vecs * np.sqrt(vals)).dot(vecs.T)
+    inv_root = (vecs / np.sqrt(vals)).dot(vecs.T)
+    return root, inv_root
+
+
+class QuadPotentialBlockAdapt(QuadPotential):
+    """Adapt a block diagonal mass matrix using the sample covariances of the blocks.
+
+    Each block is estimated and factored on its own, so that a leapfrog step
+    costs ``O(sum(b**2))`` for blocks of size ``b`` instead of ``O(n**2)``.
+    Parameters that are not in any block get a diagonal mass matrix. The
+    adaptation windows are the same as in `QuadPotentialFullAdapt`.
+
+    Examples
+    --------
+    Correlations only within the group effects of each group:
+
+    .. code:: ipython
+
+        >>> from pymc3.step_methods.hmc.quadpotential import QuadPotentialBlockAdapt, var_blocks
+        >>> with model:
+        ...     blocks = var_blocks([[mu, z_group]])
+        ...     pot = QuadPotentialBlockAdapt(model.ndim, np.zeros(model.ndim), blocks)
+        ...     trace = pm.sample(step=pm.NUTS(potential=pot))
+    """
+
+    def __init__(
+        self,
+        n,
+        initial_mean,
+        blocks,
+        initial_diag=None,
+        initial_weight=0,
+        adaptation_window=101,
+        adaptation_window_multiplier=2,
+        update_window=1,
+        dtype=None,
+    ):
+        """Set up a block diagonal mass matrix.
+
+        Parameters
+        ----------
+        n: int
+            The number of parameters.
+        initial_mean: array, ndim = 1
+            The initial guess of the posterior mean.
+        blocks: list
+            The blocks of the mass matrix. Each block is a slice or an array
+            of indices into the array of all parameters, see `var_blocks`.
+        initial_diag: array, ndim = 1, optional
+            The initial diagonal of the covariance. The blocks start with
+            the corresponding diagonal. Defaults to the identity.
+        initial_weight: int, default=0
+            The weight of the initial covariance in the first window.
+        """
+        if initial_mean.ndim != 1:
+            raise ValueError("Initial mean must be one-dimensional.")
+        if len(initial_mean) != n:
+            raise ValueError(
+                "Wrong shape for initial_mean: expected {} got {}".format(n, len(initial_mean))
+            )
+        if initial_diag is not None and initial_diag.shape != (n,):
+            raise ValueError(f"Wrong shape for initial_diag: expected {n} got {initial_diag.shape}")
+
+        if dtype is None:
+            dtype = theano.config.floatX
+
+        if initial_diag is None:
+            initial_diag = np.ones(n, dtype=dtype)
+            initial_weight = 1
+
+        in_block = np.zeros(n, dtype=int)
+        self._blocks = []
+        for block in blocks:
+            idx = np.arange(n)[block] if isinstance(block, slice) else np.asarray(block, int)
+            if idx.ndim != 1 or np.any(idx < 0) or np.any(idx >= n):
+                raise ValueError(f"Invalid block {block} for {n} parameters.")
+            in_block[idx] += 1
+            if len(idx) > 0 and np.array_equal(idx, np.arange(idx[0], idx[0] + len(idx))):
+                # Slices select views instead of copies
+                idx = slice(idx[0], idx[0] + len(idx))
+            self._blocks.append(idx)
+        if np.any(in_block > 1):
+            raise ValueError(
+                "The parameters %s are in more than one block." % np.flatnonzero(in_block > 1)
+            )
+        self._diag_idx = np.flatnonzero(in_block == 0)
+
+        self.dtype = dtype
+        self._n = n
+        self._initial_mean = initial_mean
+        self._initial_diag = initial_diag
+        self._initial_weight = initial_weight
+
+        self.adaptation_window = int(adaptation_window)
+        self.adaptation_window_multiplier = float(adaptation_window_multiplier)
+        self._update_window = int(update_window)
+
+        self.reset()
+
+    def reset(self):
+        self._previous_update = 0
+        self._chol_error = None
+        self._var = np.array(self._initial_diag[self._diag_idx], dtype=self.dtype, copy=True)
+        self._covs = [np.diag(self._initial_diag[idx]).astype(self.dtype) for idx in self._blocks]
+        self._chols = [np.diag(np.sqrt(np.diag(cov))) for cov in self._covs]
+        self._foreground = self._new_estimates(
+            self._initial_mean, self._initial_diag, self._initial_weight
+        )
+        self._background = self._new_estimates()
+        self._n_samples = 0
+
+    def _new_estimates(self, mean=None, diag=None, weight=0):
+        """Estimators of the variances of the diagonal and of the covariances of the blocks."""
+        if mean is None:
+            mean = np.zeros(self._n)
+            diag = np.ones(self._n)
+        var = _WeightedVariance(
+            len(self._diag_idx), mean[self._diag_idx], diag[self._diag_idx], weight, self.dtype
+        )
+        covs = [
+            _WeightedCovariance(len(mean[idx]), mean[idx], np.diag(diag[idx]), weight, self.dtype)
+            for idx in self._blocks
+        ]
+        return [var] + covs
+
+    def _update_from_estimates(self, estimates):
+        var, covs = estimates[0], estimates[1:]
+        if len(self._diag_idx) > 0:
+            var.current_variance(out=self._var)
+        for i, cov in enumerate(covs):
+            cov.current_covariance(out=self._covs[i])
+            try:
+                self._chols[i] = scipy.linalg.cholesky(self._covs[i], lower=True)
+            except (scipy.linalg.LinAlgError, ValueError) as error:
+                self._chol_error = error
+
+    def velocity(self, x, out=None):
+        """Compute the current velocity at a position in parameter space."""
+        if out is None:
+            out = np.empty_like(x)
+        out[self._diag_idx] = self._var * x[self._diag_idx]
+        for idx, cov in zip(self._blocks, self._covs):
+            out[idx] = cov.dot(x[idx])
+        return out
+
+    def random(self):
+        """Draw random value from QuadPotential."""
+        vals = normal(size=self._n).astype(self.dtype)
+        vals[self._diag_idx] /= np.sqrt(self._var)
+        for idx, chol in zip(self._blocks, self._chols):
+            vals[idx] = scipy.linalg.solve_triangular(chol.T, vals[idx])
+        return vals
+
+    def energy(self, x, velocity=None):
+        """Compute kinetic energy at a position in parameter space."""
+        if velocity is None:
+            velocity = self.velocity(x)
+        return 0.5 * np.dot(x, velocity)
+
+    def velocity_energy(self, x, v_out):
+        """Compute velocity and return kinetic energy at a position in parameter space."""
+        self.velocity(x, out=v_out)
+        return 0.5 * np.dot(x, v_out)
+
+    def update(self, sample, grad, tune):
+        """Inform the potential about a new sample during tuning."""
+        if not tune:
+            return
+
+        # Steps since previous update
+        delta = self._n_samples - self._previous_update
+
+        for estimates in (self._foreground, self._background):
+            estimates[0].add_sample(sample[self._diag_idx], weight=1)
+            for idx, cov in zip(self._blocks, estimates[1:]):
+                cov.add_sample(sample[idx], weight=1)
+
+        if (delta + 1) % self._update_window == 0:
+            self._update_from_estimates(self._foreground)
+
+        if delta >= self.adaptation_window:
+            self._foreground = self._background
+            self._background = self._new_estimates()
+
+            self._previous_update = self._n_samples
+            self.adaptation_window = int(self.adaptation_window * self.adaptation_window_multiplier)
+
+        self._n_samples += 1
+
+    def add_window_sample(self, sample, grad):
+        """Inform the potential about a sample in a slow window of a `WarmupSchedule`."""
+        self._background[0].add_sample(sample[self._diag_idx], weight=1)
+        for idx, cov in zip(self._blocks, self._background[1:]):
+            cov.add_sample(sample[idx], weight=1)
+
+    def finish_window(self):
+        """Set the mass matrix to the estimate of the finished slow window."""
+        self._update_from_estimates(self._background)
+        self._foreground = self._background
+        self._background = self._new_estimates()
+
+    def raise_ok(self, vmap):
+        if self._chol_error is not None:
+            raise ValueError(str(self._chol_error))
+        if np.any(self._var <= 0) or not np.all(np.isfinite(self._var)):
+            raise ValueError("Mass matrix contains zeros or non-finite values on the diagonal.")
+
+
+def var_blocks(groups, vars=None, model=None):
+    """Return the blocks of `QuadPotentialBlockAdapt` for groups of variables.
+
+    Parameters
+    ----------
+    groups: list
+        Each group is a variable or a list of variables (or their names)
+        whose parameters form one block of the mass matrix. Transformed
+        variables can be given by the variable or its transformed name.
+    vars: list of variables, optional
+        The variables sampled by NUTS. Defaults to all continuous variables
+        of the model.
+    model: Model, optional
+
+    Returns
+    -------
+    list of arrays of indices into the array of the parameters of `vars`
+    """
+    model = modelcontext(model)
+    if vars is None:
+        vars = model.cont_vars
+    ordering = ArrayOrdering(inputvars(vars))
+    indices = np.arange(ordering.size)
+    blocks = []
+    for group in groups:
+        if not isinstance(group, (list, tuple)):
+            group = [group]
+        block = []
+        for var in group:
+            name = get_var_name(var)
+            if name not in ordering.by_name:
+                var = model.named_vars.get(name)
+                if hasattr(var, "transformed"):
+                    name = var.transformed.name
+            if name not in ordering.by_name:
+                raise ValueError("The variable %s is not sampled by NUTS." % name)
+            block.append(indices[ordering[name].slc])
+        blocks.append(np.concatenate(block))
+    return blocks
+
+
 try:
     import sksparse.cholmod as cholmod
 
@@ -0,0 +1,134 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import copy
+
+__all__ = ["WarmupSchedule"]
+
+# The phases of the tuning draws, as stored in the `warmup_phase` stat
+SAMPLING = 0
+INIT_BUFFER = 1
+SLOW_WINDOW = 2
+TERM_BUFFER = 3
+
+
+class WarmupSchedule:
+    """Windowed schedule of the tuning draws of HMC samplers, like in Stan.
+
+    The tuning draws are split into three phases:
+
+    1. An initial fast interval of `init_buffer` draws, in which only the
+       step size is adapted, while the sampler moves to the typical set.
+    2. Slow windows, in which the mass matrix is estimated from the draws of
+       the window. The first window has `base_window` draws, and each
+       following window is twice as long. The last window is extended to the
+       end of this phase. At the end of each window, the mass matrix is set
+       to the estimate of the window and the step size adaptation restarts.
+    3. A terminal fast interval of `term_buffer` draws, in which the step
+       size is adapted to the final mass matrix.
+
+    If there are fewer tuning draws than the three phases need, they use
+    15%, 75% and 10% of the tuning draws.
+
+    Samplers with a schedule store the phase of each draw in the
+    `warmup_phase` stat (0 after tuning, 1 initial fast interval, 2 slow
+    window, 3 terminal fast interval) and the number of the slow window in
+    the `warmup_window` stat.
+
+    Parameters
+    ----------
+    tune: int, optional
+        The number of tuning draws. ``pm.sample`` sets it to its ``tune``.
+    init_buffer: int, default=75
+        The number of draws in the initial fast interval.
+    term_buffer: int, default=50
+        The number of draws in the terminal fast interval.
+    base_window: int, default=25
+        The number of draws in the first slow window.
+
+    Examples
+    --------
+    .. code:: ipython
+
+        >>> with model:
+        ...     trace = pm.sample(tune=500, warmup=pm.WarmupSchedule(init_buffer=50))
+    """
+
+    def __init__(self, tune=None, init_buffer=75, term_buffer=50, base_window=25):
+        if min(init_buffer, term_buffer) < 0 or base_window < 1:
+            raise ValueError(
+                "The buffers must not be negative and the base window must have at least one draw."
+            )
+        self.init_buffer = int(init_buffer)
+        self.term_buffer = int(term_buffer)
+        self.base_window = int(base_window)
+        self.tune = None
+        self.windows = []
+        if tune is not None:
+            self._compute_windows(int(tune))
+
+    def for_tune(self, tune):
+        """Return a copy of the schedule for `tune` tuning draws."""
+        if self.tune is not None and self.tune != tune:
+            raise ValueError(
+                f"The warmup schedule is for {self.tune} tuning draws, but there are {tune}."
+            )
+        schedule = copy.copy(self)
+        schedule._compute_windows(int(tune))
+        return schedule
+
+    def _compute_windows(self, tune):
+        init_buffer, term_buffer, base_window = self.init_buffer, self.term_buffer, self.base_window
+        if init_buffer + base_window + term_buffer > tune:
+            init_buffer = int(0.15 * tune)
+            term_buffer = int(0.1 * tune)
+            base_window = tune - init_buffer - term_buffer
+
+        self.tune = tune
+        self._init_end = init_buffer
+        self._slow_end = tune - term_buffer
+        self.windows = []
+        start, size = init_buffer, base_window
+        while size > 0 and start < self._slow_end:
+            end = start + size
+            # Extend the window to the end if the next one would not fit
+            if end + 2 * size > self._slow_end:
+                end = self._slow_end
+            self.windows.append((start, end))
+            start, size = end, 2 * size
+
+    def phase(self, draw):
+        """Return the phase and the number of the slow window of a draw.
+
+        The window is -1 outside of the slow windows.
+        """
+        if self.tune is None:
+            raise ValueError("The warmup schedule needs the number of tuning draws.")
+        if draw >= self.tune:
+            return SAMPLING, -1
+        if draw < self._init_end:
+            return INIT_BUFFER, -1
+        for i, (start, end) in enumerate(self.windows):
+            if start <= draw < end:
+                return SLOW_WINDOW, i
+        return TERM_BUFFER, -1
+
+    def is_window_end(self, draw):
+        """Whether the draw is the last of a slow window."""
+        return any(draw == end - 1 for _, end in self.windows)
+
+    def __repr__(self):
+        return "WarmupSchedule(tune={}, init_buffer={}, term_buffer={}, base_window={})".format(
+            self.tune, self.init_buffer, self.term_buffer, self.base_window
+        )
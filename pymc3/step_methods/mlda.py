@@ -17,7 +17,6 @@ import warnings
 
 from typing import List, Optional, Type, Union
 
-import arviz as az
 import numpy as np
 import theano
 import theano.tensor as tt
@@ -977,6 +976,8 @@ def extract_Q_estimate(trace, levels):
     MLDA with variance reduction has been used for sampling.
     """
 
+    import arviz as az
+
     Q_0_raw = trace.get_sampler_stats("Q_0")
     # total number of base level samples from all iterations
     total_base_level_samples = sum([it.shape[0] for it in Q_0_raw])
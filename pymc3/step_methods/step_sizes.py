@@ -36,6 +36,17 @@ class DualAverageAdaptation:
         self._mu = np.log(10 * self._initial_step)
         self._tuned_stats = []
 
+    def restart(self):
+        """Restart the adaptation from the current step size.
+
+        This is used after the mass matrix changed, so that the step size
+        adapts to the new mass matrix.
+        """
+        self._mu = np.log(10 * np.exp(self._log_step))
+        self._log_bar = self._log_step
+        self._hbar = 0.0
+        self._count = 1
+
     def current(self, tune):
         if tune:
             return np.exp(self._log_step)
@@ -0,0 +1,131 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import os
+
+import numpy.testing as npt
+import pytest
+
+import pymc3 as pm
+
+from pymc3 import checkpoint
+
+
+def build_model():
+    with pm.Model() as model:
+        pm.Normal("x", shape=2)
+        pm.HalfNormal("sd")
+    return model
+
+
+class Interrupt:
+    """Interrupt sampling at a draw of the first chain."""
+
+    def __init__(self, draw_idx):
+        self.draw_idx = draw_idx
+
+    def __call__(self, trace, draw):
+        if draw.chain == 0 and draw.draw_idx == self.draw_idx:
+            raise KeyboardInterrupt()
+
+
+def run(model, step, **kwargs):
+    with model:
+        return pm.sample(
+            draws=60,
+            tune=40,
+            chains=2,
+            step=step(),
+            random_seed=5,
+            return_inferencedata=False,
+            compute_convergence_checks=False,
+            progressbar=False,
+            **kwargs,
+        )
+
+
+@pytest.mark.parametrize(
+    "step, cores, transport, interrupt_at",
+    [
+        (pm.Metropolis, 1, "pipe", 70),
+        (pm.NUTS, 1, "pipe", 30),
+        (pm.Metropolis, 2, "pipe", 70),
+        (pm.NUTS, 2, "ring", 70),
+    ],
+)
+def test_resume(tmpdir, step, cores, transport, interrupt_at):
+    directory = str(tmpdir.join("checkpoints"))
+    model = build_model()
+    kwargs = dict(cores=cores, transport=transport)
+    expected = run(model, step, **kwargs)
+
+    kwargs.update(checkpoint=directory, checkpoint_every=25)
+    try:
+        run(model, step, callback=Interrupt(interrupt_at), **kwargs)
+    except ValueError:
+        # Interrupted before the end of tuning
+        pass
+    with model:
+        partial = checkpoint.load_trace(directory)
+    assert len(partial) == 25 * (interrupt_at // 25)
+    # Compound steps have one statistic per step method
+    tune = partial.get_sampler_stats("tune", chains=0).reshape(len(partial), -1)[:, 0]
+    assert tune.sum() == min(len(partial), 40)
+
+    trace = run(model, step, **kwargs)
+    assert trace.nchains == 2
+    for name in expected.varnames:
+        npt.assert_equal(
+            trace.get_values(name, combine=False), expected.get_values(name, combine=False)
+        )
+    with model:
+        assert len(checkpoint.load_trace(directory)) == 100
+
+    # Finished chains are loaded from their checkpoints
+    again = run(model, step, **kwargs)
+    npt.assert_equal(again["x"], expected["x"])
+
+
+def test_checkpoint_arguments(tmpdir):
+    directory = str(tmpdir.join("checkpoints"))
+    model = build_model()
+    run(model, pm.Metropolis, cores=1, checkpoint=directory, checkpoint_every=10)
+    assert sorted(os.listdir(directory)) == ["chain-0.pkl", "chain-1.pkl"]
+    with model:
+        with pytest.raises(ValueError, match="is for 100 draws with 40 tuning draws"):
+            pm.sample(draws=10, tune=40, chains=2, cores=1, checkpoint=directory)
+        with pytest.raises(ValueError, match="stores the draws"):
+            pm.sample(
+                draws=10,
+                tune=10,
+                chains=1,
+                cores=1,
+                trace="summary",
+                checkpoint=str(tmpdir.join("other")),
+            )
+
+
+def test_resume_early_stopping(tmpdir):
+    directory = str(tmpdir.join("checkpoints"))
+    model = build_model()
+    kwargs = dict(cores=2, checkpoint=directory, checkpoint_every=25)
+    early_stopping = pm.EarlyStopping(ess=20, rhat=1.5, check_every=10, min_draws=20)
+    trace = run(model, pm.Metropolis, early_stopping=early_stopping, **kwargs)
+    assert early_stopping.stopped
+    assert len(trace) < 60
+    with model:
+        assert len(checkpoint.load_trace(directory)) == 40 + len(trace)
+
+    # The stopped chains are loaded from their checkpoints
+    again = run(model, pm.Metropolis, **kwargs)
+    npt.assert_equal(again["x"], trace["x"])
@@ -0,0 +1,152 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import numpy as np
+import numpy.testing as npt
+import pytest
+import theano
+import theano.tensor as tt
+
+import pymc3 as pm
+
+from pymc3 import compile_cache
+
+
+@pytest.fixture
+def cache(tmpdir):
+    cache = compile_cache.enable(str(tmpdir.join("functions")))
+    yield cache
+    compile_cache.disable()
+
+
+def build_model(scale=1.0):
+    with pm.Model() as model:
+        x = pm.Data("x", np.arange(5.0))
+        mu = pm.Normal("mu", 0, scale)
+        sd = pm.HalfNormal("sd", 1)
+        pm.Normal("y", mu * x, sd, observed=np.ones(5))
+    return model
+
+
+def test_logp_dlogp_function_hit(cache):
+    point = np.array([0.3, 0.1])
+    func = build_model().logp_dlogp_function()
+    func.set_extra_values({})
+    expected = func(point)
+    assert cache.stats["misses"] == 1
+    assert cache.stats["stores"] == 1
+    assert len(cache) == 1
+
+    model = build_model()
+    func = model.logp_dlogp_function()
+    func.set_extra_values({})
+    assert cache.stats["hits"] == 1
+    npt.assert_allclose(func(point)[0], expected[0])
+    npt.assert_allclose(func(point)[1], expected[1])
+
+    # The cached function uses the data of the new model
+    with model:
+        pm.set_data({"x": np.zeros(5)})
+    assert not np.allclose(func(point)[0], expected[0])
+
+    compile_cache.disable()
+    reference = model.logp_dlogp_function()
+    reference.set_extra_values({})
+    npt.assert_allclose(func(point)[0], reference(point)[0])
+
+
+def test_different_graph_miss(cache):
+    build_model().logp_dlogp_function()
+    build_model(scale=2.0).logp_dlogp_function()
+    assert cache.stats["hits"] == 0
+    assert cache.stats["misses"] == 2
+    assert len(cache) == 2
+
+
+def test_uncacheable(cache):
+    a = theano.shared(1.0)
+    x = tt.dscalar()
+    x.tag.test_value = 1.0
+    fn = compile_cache.function([x], x + a, updates=[(a, a + 1)])
+    assert fn(1.0) == 2.0
+    assert cache.stats["skipped"] == 1
+    assert len(cache) == 0
+
+
+def test_eviction(cache):
+    build_model().logp_dlogp_function()
+    cache.max_bytes = int(cache.size * 1.5)
+    build_model(scale=2.0).logp_dlogp_function()
+    assert cache.stats["evictions"] == 1
+    assert len(cache) == 1
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_corrupt_file(cache, tmpdir):
+    build_model().logp_dlogp_function()
+    path = tmpdir.join("functions").listdir()[0]
+    path.write_binary(b"invalid")
+    func = build_model().logp_dlogp_function()
+    func.set_extra_values({})
+    assert np.isfinite(func(np.array([0.3, 0.1]))[0])
+    assert cache.stats["errors"] == 1
+    assert cache.stats["stores"] == 2
+
+
+def test_function_lru():
+    lru = compile_cache.FunctionLRU(maxsize=2)
+    x = tt.dscalar("x")
+    x.tag.test_value = 1.0
+    a = theano.shared(2.0)
+    fn = lru.function([x], x * a)
+    assert fn(3.0) == 6.0
+    assert lru.function([x], x * a) is fn
+    assert lru.stats == dict(hits=1, misses=1, evictions=0, skipped=0)
+
+    # A structurally identical graph is linked to its own shared variables
+    y = tt.dscalar("y")
+    y.tag.test_value = 1.0
+    b = theano.shared(5.0)
+    assert lru.function([y], y * b)(3.0) == 15.0
+    assert fn(3.0) == 6.0
+    assert lru.stats["misses"] == 1
+    assert len(lru) == 1
+
+    lru.function([x], x + a)
+    lru.function([x], x - a)
+    assert lru.stats["evictions"] == 1
+    assert len(lru) == 2
+    lru.function([x], x * a)
+    assert lru.stats["misses"] == 4
+
+    lru.clear()
+    assert len(lru) == 0
+
+
+def test_draw_values_cache():
+    cache = pm.distributions.distribution.draw_values_cache
+    trace = [{"mu": np.array(0.5), "sd": np.array(1.0)}] * 3
+    models = [build_model(), build_model()]
+    with models[1]:
+        pm.set_data({"x": np.zeros(5)})
+    pm.memoize.clear_cache()
+    assert len(cache) == 0
+    for model in models:
+        with model:
+            mu_x = pm.Deterministic("mu_x", model["mu"] * model["x"])
+            ppc = pm.sample_posterior_predictive(trace, var_names=["mu_x"], progressbar=False)
+        npt.assert_allclose(ppc["mu_x"], np.tile(mu_x.eval({model["mu"]: 0.5}), (3, 1)))
+    assert len(cache) == 1
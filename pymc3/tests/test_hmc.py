@@ -16,9 +16,11 @@ import logging
 
 import numpy as np
 import numpy.testing as npt
+import pytest
 
 import pymc3
 
+from pymc3.step_methods.hmc import integration
 from pymc3.step_methods.hmc.base_hmc import BaseHMC
 from pymc3.tests import models
 from pymc3.theanof import floatX
@@ -57,3 +59,161 @@ def test_nuts_tuning():
 
     assert not step.tune
     assert np.all(trace["step_size"][5:] == trace["step_size"][5])
+
+
+def test_state_arena():
+    arena = integration.StateArena(3, "float64", capacity=1)
+    a, b = arena.take(), arena.take()
+    assert arena.n_allocated == 2
+    arena.release(a, a, np.zeros(3))
+    assert arena.take() is a
+    arena.detach(b)
+    arena.reset()
+    assert arena.take() is a
+    arena.take()
+    assert arena.n_allocated == 3
+
+
+def test_nuts_arena():
+    with pymc3.Model():
+        x = pymc3.Normal("x", shape=5)
+        pymc3.Normal("y", x[:2], 0.1, shape=2)
+        traces = {}
+        for arena in [False, True]:
+            step = pymc3.NUTS(arena=arena)
+            traces[arena] = pymc3.sample(
+                100, tune=100, step=step, chains=1, random_seed=3, progressbar=False
+            )
+
+    npt.assert_array_equal(traces[True]["x"], traces[False]["x"])
+    npt.assert_array_equal(traces[True]["depth"], traces[False]["depth"])
+    # Apart from the draws, the states of the trajectories reuse the arrays
+    assert step._arena.n_allocated < 200 + 2 ** traces[True]["depth"].max()
+
+
+def test_batched_nuts():
+    with pymc3.Model() as model:
+        pymc3.Normal("x", mu=np.arange(3), sigma=np.array([1, 2, 3]), shape=3)
+        step = pymc3.BatchedNUTS()
+        assert step.batchable
+        trace = pymc3.sample(
+            500,
+            tune=500,
+            step=step,
+            chains=4,
+            cores=2,
+            random_seed=3,
+            progressbar=False,
+            return_inferencedata=False,
+        )
+
+    assert trace.nchains == 4
+    assert len(trace) == 500
+    assert "depth" in trace.stat_names
+    # Each chain adapts its own step size
+    step_sizes = trace.get_sampler_stats("step_size", combine=False)
+    assert len({chain_step_sizes[-1] for chain_step_sizes in step_sizes}) == 4
+    npt.assert_allclose(trace["x"].mean(0), np.arange(3), atol=0.4)
+    npt.assert_allclose(trace["x"].std(0), [1, 2, 3], rtol=0.2)
+
+
+def test_batched_nuts_needs_all_vars():
+    with pymc3.Model():
+        x = pymc3.Normal("x")
+        pymc3.Normal("y")
+        step = pymc3.BatchedNUTS(vars=[x])
+        assert not step.batchable
+        with pytest.raises(ValueError, match="all free variables"):
+            step.step_batch([{"x": 0.0, "y": 0.0}])
+
+
+def _evaluate(steps, logp_dlogp_func):
+    """Run a single computation of `integration.evaluate_batch` on its own."""
+    try:
+        q = next(steps)
+        while True:
+            try:
+                result = logp_dlogp_func(q)
+            except Exception as err:
+                q = steps.throw(err)
+            else:
+                q = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+def test_evaluate_batch():
+    def logp_dlogp(q):
+        if q[0] < 0:
+            raise ValueError("negative")
+        return -0.5 * q.dot(q), -q
+
+    def steps(q):
+        total = 0.0
+        for _ in range(3):
+            try:
+                logp, dlogp = yield q
+            except ValueError:
+                return None
+            total += logp
+            q = q + 1
+        return total
+
+    def logp_dlogp_batch(qs):
+        results = [logp_dlogp(q) for q in qs]
+        return np.array([r[0] for r in results]), np.stack([r[1] for r in results])
+
+    starts = [np.zeros(2), np.ones(2), -np.ones(2)]
+    expected = [_evaluate(steps(q), logp_dlogp) for q in starts]
+    assert expected[2] is None
+    calls = []
+
+    def failing_batch(qs):
+        calls.append(len(qs))
+        raise ValueError("batch")
+
+    for batch in [None, logp_dlogp_batch, failing_batch]:
+        results = integration.evaluate_batch([steps(q) for q in starts], logp_dlogp, batch)
+        assert results == expected
+    # After the first failure the positions are evaluated one by one
+    assert calls == [3]
+
+
+def test_warmup_schedule():
+    schedule = pymc3.WarmupSchedule(tune=1000)
+    assert schedule.windows == [(75, 100), (100, 150), (150, 250), (250, 450), (450, 950)]
+    assert schedule.phase(0) == (1, -1)
+    assert schedule.phase(75) == (2, 0)
+    assert schedule.phase(949) == (2, 4)
+    assert schedule.phase(950) == (3, -1)
+    assert schedule.phase(1000) == (0, -1)
+    assert schedule.is_window_end(149)
+    assert not schedule.is_window_end(150)
+
+    # Too few tuning draws for the default buffers
+    assert pymc3.WarmupSchedule().for_tune(100).windows == [(15, 90)]
+    with pytest.raises(ValueError, match="1000 tuning draws"):
+        schedule.for_tune(500)
+
+
+def test_nuts_warmup():
+    with pymc3.Model():
+        pymc3.Normal("x", mu=0, sigma=np.array([0.1, 10.0]), shape=2)
+        with pytest.raises(ValueError, match="number of tuning draws"):
+            pymc3.NUTS(warmup=pymc3.WarmupSchedule())
+        trace = pymc3.sample(
+            200,
+            tune=200,
+            chains=1,
+            warmup=pymc3.WarmupSchedule(init_buffer=20, term_buffer=20),
+            discard_tuned_samples=False,
+            random_seed=3,
+            progressbar=False,
+            return_inferencedata=False,
+        )
+
+    assert "warmup_phase" in trace.stat_names
+    npt.assert_array_equal(np.bincount(trace["warmup_phase"]), [200, 20, 160, 20])
+    # The second slow window is extended to the terminal fast interval
+    npt.assert_array_equal(np.bincount(trace["warmup_window"][20:180]), [25, 135])
+    npt.assert_allclose(trace["x"][200:].std(0), [0.1, 10.0], rtol=0.3)
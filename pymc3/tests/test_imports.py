@@ -0,0 +1,62 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pymc3 as pm
+
+LAZY = [
+    "arviz",
+    "matplotlib",
+    "pandas",
+    "xarray",
+    "pymc3.glm",
+    "pymc3.gp",
+    "pymc3.model_graph",
+    "pymc3.ode",
+    "pymc3.plots",
+    "pymc3.variational",
+]
+
+
+def test_import_is_lazy():
+    code = "import sys, pymc3; print(' '.join(m for m in %r if m in sys.modules))" % LAZY
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(pm.__file__)))
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.split() == []
+
+
+@pytest.mark.parametrize("module", ["pymc3.glm", "pymc3.plots", "pymc3.variational"])
+def test_lazy_names(module):
+    mod = importlib.import_module(module)
+    names = getattr(mod, "__all__", [n for n in vars(mod) if not n.startswith("_")])
+    for name in names:
+        assert getattr(pm, name) is getattr(mod, name)
+        assert name in dir(pm)
+        assert name in pm.__all__
+
+
+def test_lazy_modules():
+    assert pm.gp is importlib.import_module("pymc3.gp")
+    assert pm.ode is importlib.import_module("pymc3.ode")
+    assert pm.model_to_graphviz is importlib.import_module("pymc3.model_graph").model_to_graphviz
+    with pytest.raises(AttributeError, match="no attribute 'not_a_name'"):
+        pm.not_a_name
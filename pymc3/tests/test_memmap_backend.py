@@ -0,0 +1,145 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import functools
+import gc
+import os
+
+import numpy as np
+import numpy.testing as npt
+
+import pymc3 as pm
+
+from pymc3.backends import memmap, ndarray
+from pymc3.tests import backend_fixtures as bf
+
+STATS1 = [{"a": np.float64, "b": np.bool}]
+
+# A small chunk size, so that the tests write several chunks
+SmallChunkMemmapTrace = functools.partial(memmap.MemmapTrace, chunk_size=2)
+
+
+class TestMemmap0dSampling(bf.SamplingTestCase):
+    backend = SmallChunkMemmapTrace
+    name = None
+    shape = ()
+
+
+class TestMemmap1dSamplingStats1(bf.SamplingTestCase):
+    backend = SmallChunkMemmapTrace
+    name = None
+    sampler_vars = STATS1
+    shape = 2
+
+
+class TestMemmap2dSampling(bf.SamplingTestCase):
+    backend = memmap.MemmapTrace
+    name = None
+    shape = (2, 3)
+
+
+class TestMemmap0dSelection(bf.SelectionTestCase):
+    backend = SmallChunkMemmapTrace
+    name = None
+    shape = ()
+    sampler_vars = STATS1
+
+
+class TestMemmap2dSelection(bf.SelectionTestCase):
+    backend = SmallChunkMemmapTrace
+    name = None
+    shape = (2, 3)
+
+
+class TestMemmapEquality(bf.BackendEqualityTestCase):
+    backend0 = ndarray.NDArray
+    name0 = None
+    backend1 = SmallChunkMemmapTrace
+    name1 = None
+    shape = (2, 3)
+
+
+def test_memmap_files(tmpdir):
+    directory = str(tmpdir.join("trace"))
+    with pm.Model():
+        pm.Normal("x", shape=3)
+        strace = memmap.MemmapTrace(directory, chunk_size=4)
+    strace.setup(10, 0)
+    for i in range(10):
+        strace.record({"x": np.full(3, i)})
+    strace.close()
+
+    values = strace.get_values("x", burn=2, thin=2)
+    assert isinstance(values, np.memmap)
+    npt.assert_equal(values[:, 0], [2, 4, 6, 8])
+    npt.assert_equal(np.load(os.path.join(directory, "chain-0-x.npy"))[:, 0], np.arange(10))
+
+    # Sampling more draws extends the files
+    strace.setup(3, 0)
+    for i in range(2):
+        strace.record({"x": np.full(3, 10 + i)})
+    strace.close()
+    assert len(strace) == 12
+    npt.assert_equal(strace.get_values("x")[:, 0], np.arange(12))
+
+
+def test_memmap_temporary_directory():
+    with pm.Model():
+        pm.Normal("x")
+        strace = memmap.MemmapTrace()
+    directory = strace.directory
+    assert os.path.isdir(directory)
+    del strace
+    assert not os.path.exists(directory)
+
+
+def test_sample_memmap():
+    with pm.Model():
+        pm.Normal("x", shape=2)
+        kwargs = dict(
+            draws=20,
+            tune=10,
+            chains=2,
+            cores=1,
+            random_seed=3,
+            return_inferencedata=False,
+            compute_convergence_checks=False,
+        )
+        trace = pm.sample(trace="memmap", step=pm.Metropolis(), **kwargs)
+        expected = pm.sample(step=pm.Metropolis(), **kwargs)
+    assert all(isinstance(values, np.memmap) for values in trace.get_values("x", combine=False))
+    npt.assert_allclose(trace["x"], expected["x"])
+
+
+def test_sample_memmap_keeps_files():
+    with pm.Model():
+        pm.Normal("x", shape=2)
+        trace = pm.sample(
+            draws=10,
+            tune=10,
+            chains=1,
+            trace="memmap",
+            step=pm.Metropolis(),
+            return_inferencedata=False,
+            compute_convergence_checks=False,
+        )
+    gc.collect()
+    strace = trace._straces[0]
+    assert isinstance(strace, memmap.MemmapTrace)
+    assert len(strace) == 10
+    assert os.path.exists(strace.samples["x"].filename)
+    directory = strace.directory
+    del trace, strace
+    gc.collect()
+    assert not os.path.exists(directory)
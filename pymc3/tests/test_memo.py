@@ -66,3 +66,72 @@ def test_hashing_of_rv_tuples():
                 (freerv, []),
             ]:
                 assert isinstance(memoize.hashable(structure), int)
+
+
+def test_memo_lru():
+    calls = []
+
+    def fun(x):
+        calls.append(x)
+        return x * 2
+
+    funmem = memoize.memoize(fun, maxsize=2)
+    assert [funmem(1), funmem(2), funmem(1), funmem(3)] == [2, 4, 2, 6]
+    assert len(fun.cache) == 2
+    # 2 was the least recently used argument
+    funmem(1)
+    funmem(2)
+    assert calls == [1, 2, 3, 2]
+    assert memoize.cache_stats(funmem) == dict(hits=2, misses=4, evictions=2, size=2)
+    memoize.clear_cache(funmem)
+    assert memoize.cache_stats(funmem)["size"] == 0
+
+
+def test_memo_weak():
+    class Obj:
+        pass
+
+    def fun(obj, x):
+        return x + 1
+
+    funmem = memoize.memoize(fun, weak=True)
+    obj = Obj()
+    assert funmem(obj, 1) == funmem(obj, 1) == 2
+    assert funmem(obj, 2) == 3
+    assert len(fun.cache) == 2
+    assert memoize.cache_stats(funmem) == dict(hits=1, misses=2, evictions=0, size=2)
+    del obj
+    assert len(fun.cache) == 0
+
+    # first arguments without weak references are part of the key
+    assert funmem(1, 1) == funmem(1, 1) == 2
+    assert len(fun.cache) == 1
+
+
+def test_memo_bound_stats():
+    with pm.Model() as model:
+        pm.Normal("x")
+    assert model.bijection is model.bijection
+    assert memoize.cache_stats(model)["hits"] >= 1
+    memoize.clear_cache(model)
+    assert memoize.cache_stats(model)["size"] == 0
+
+
+def test_memo_total_stats():
+    import pymc3.distributions  # noqa: F401 registers the draw_values cache
+
+    stats = memoize.cache_stats()
+    assert {"hits", "misses", "evictions", "size"} <= set(stats)
+    assert all(v >= 0 for v in stats.values())
+
+
+def test_hashable_arrays():
+    a = np.arange(6.0)
+    assert memoize.hashable(a) == memoize.hashable(a.copy())
+    assert memoize.hashable(a) != memoize.hashable(a.reshape(2, 3))
+    assert memoize.hashable(a) != memoize.hashable(a.astype("float32"))
+    assert memoize.hashable(a[::2]) == memoize.hashable(np.array([0.0, 2.0, 4.0]))
+    b = a.copy()
+    b[0] = 1
+    assert memoize.hashable(a) != memoize.hashable(b)
+    assert isinstance(memoize.hashable({"a": a, "b": [a, np.array(1)]}), int)
@@ -14,6 +14,7 @@
 
 import pickle
 import unittest
+import unittest.mock as mock
 
 import numpy as np
 import numpy.testing as npt
@@ -164,6 +165,57 @@ class TestObserved:
         assert x1.type == X.type
         assert x2.type == X.type
 
+    @pytest.mark.parametrize("compress", [True, "rows", "sufficient"])
+    def test_observed_compress(self, compress):
+        n = 500
+        group = np.random.randint(0, 4, n)
+        x = np.random.randint(0, 3, n).astype(theano.config.floatX)
+        X = np.stack([np.ones(n), x], axis=1)
+        counts = np.random.poisson(2, n)
+        flips = np.random.binomial(1, 0.4, n)
+        heights = np.round(np.random.randn(n, 2))
+
+        def build(**kwargs):
+            with pm.Model() as model:
+                beta = pm.Normal("beta", shape=2)
+                a = pm.Normal("a", shape=4)
+                sd = pm.HalfNormal("sd")
+                eta = tt.dot(X, beta) + a[group]
+                pm.Poisson("counts", tt.exp(eta), observed=counts, **kwargs)
+                pm.Bernoulli("logit_flips", logit_p=eta, observed=flips, **kwargs)
+                pm.Bernoulli("flips", p=pm.math.sigmoid(eta), observed=flips, **kwargs)
+                pm.Normal("heights", a[group][:, None], sd, observed=heights, **kwargs)
+            return model
+
+        expected = build()
+        model = build(compress=compress)
+        point = {"beta": np.array([0.3, -0.2]), "a": np.random.randn(4), "sd_log__": 0.5}
+        npt.assert_allclose(model.logp(point), expected.logp(point))
+        npt.assert_allclose(model.dlogp()(point), expected.dlogp()(point))
+        for name in ["counts", "heights"]:
+            npt.assert_allclose(
+                model[name].logp_elemwise(point), expected[name].logp_elemwise(point)
+            )
+        # The logp is only evaluated on the compressed rows
+        inputs = theano.graph.basic.graph_inputs([model.logpt])
+        assert all(np.size(var.data) < n for var in inputs if isinstance(var, tt.Constant))
+
+    def test_observed_compress_fail(self):
+        with pm.Model():
+            mu = pm.Normal("mu", shape=3)
+            with pytest.raises(ValueError, match="other than constants"):
+                pm.Normal("x", mu, observed=np.zeros(3), compress=True)
+            with pytest.raises(ValueError, match="combines the rows"):
+                pm.Normal("y", tt.cumsum(np.ones(3)), observed=np.zeros(3), compress=True)
+            with pytest.raises(ValueError, match="numpy arrays"):
+                pm.Normal("z", observed=theano.shared(np.zeros(3)), compress=True)
+            with pytest.raises(ValueError, match="no sufficient statistics"):
+                pm.StudentT("t", 3, observed=np.zeros(3), compress="sufficient")
+            with pytest.raises(ValueError, match="not elementwise"):
+                pm.MvNormal("mv", np.zeros(2), np.eye(2), observed=np.zeros((3, 2)), compress=True)
+            with pytest.raises(ValueError, match="Only observed"):
+                pm.Normal("free", compress=True)
+
 
 class TestTheanoConfig:
     def test_set_testval_raise(self):
@@ -321,6 +373,35 @@ class TestValueGradFunction(unittest.TestCase):
         assert val == 21
         npt.assert_allclose(grad, [5, 5, 5, 1, 1, 1, 1, 1, 1])
 
+    def test_batch(self):
+        self.f_grad.set_extra_values({"extra1": 5})
+        array = np.random.randn(4, self.f_grad.size).astype(self.f_grad.dtype)
+        vals, grads = self.f_grad.batch(array)
+        assert vals.shape == (4,)
+        assert grads.shape == (4, self.f_grad.size)
+        for point, val, grad in zip(array, vals, grads):
+            expected_val, expected_grad = self.f_grad(point)
+            npt.assert_allclose(val, expected_val, rtol=1e-5)
+            npt.assert_allclose(grad, expected_grad)
+        npt.assert_allclose(self.f_grad.batch_logp(array), vals)
+
+        vals, grads = self.f_grad.batch(array[:0])
+        assert vals.shape == (0,)
+        assert grads.shape == (0, self.f_grad.size)
+
+        with pytest.raises(ValueError, match="Invalid shape"):
+            self.f_grad.batch(array[0])
+
+    def test_batch_error(self):
+        self.f_grad.set_extra_values({"extra1": 5})
+        array = np.zeros((2, self.f_grad.size), dtype=self.f_grad.dtype)
+        with mock.patch("pymc3.model.batched", side_effect=ValueError("no batch")) as patched:
+            for _ in range(2):
+                with pytest.raises(ValueError, match="no batch"):
+                    self.f_grad.batch(array)
+        # The failure is not built again
+        assert patched.call_count == 1
+
     def test_bij(self):
         self.f_grad.set_extra_values({"extra1": 5})
         array = np.ones(self.f_grad.size, dtype=self.f_grad.dtype)
@@ -13,6 +13,7 @@
 #   limitations under the License.
 import multiprocessing
 import os
+import pickle
 
 import numpy as np
 import pytest
@@ -202,3 +203,155 @@ def test_spawn_densitydist_mpctxwarning(monkeypatch):
         normal_dist = pm.Normal.dist(mu, 1)
         with pytest.warns(UserWarning, match="errors when sampling when multiprocessing"):
             obs = pm.DensityDist("density_dist", normal_dist.logp, observed=np.random.randn(100))
+
+
+@pytest.mark.parametrize("ring_size", [None, 1, 3])
+def test_iterator_ring(ring_size):
+    with pm.Model() as model:
+        a = pm.Normal("a", shape=1)
+        pm.HalfNormal("b")
+        step1 = pm.NUTS([a])
+        step2 = pm.Metropolis([model.b_log__])
+
+    step = pm.CompoundStep([step1, step2])
+
+    start = {"a": 1.0, "b_log__": 2.0}
+    sampler = ps.ParallelSampler(
+        10, 10, 3, 2, [2, 3, 4], [start] * 3, step, 0, False, transport="ring", ring_size=ring_size
+    )
+    draws = {}
+    with sampler:
+        for draw in sampler:
+            draws.setdefault(draw.chain, []).append(draw)
+
+    assert sorted(draws) == [0, 1, 2]
+    for chain_draws in draws.values():
+        assert [draw.draw_idx for draw in chain_draws] == list(range(20))
+        assert [draw.tuning for draw in chain_draws] == [True] * 10 + [False] * 10
+        assert [draw.is_last for draw in chain_draws] == [False] * 19 + [True]
+        assert chain_draws[-1].warnings is not None
+
+
+def test_ring_transport_matches_pipe():
+    with pm.Model():
+        pm.Normal("x", shape=3)
+        traces = [
+            pm.sample(
+                draws=20,
+                tune=20,
+                chains=2,
+                cores=2,
+                random_seed=[10, 11],
+                transport=transport,
+                compute_convergence_checks=False,
+                return_inferencedata=False,
+            )
+            for transport in ["pipe", "ring"]
+        ]
+    for chain in range(2):
+        np.testing.assert_array_equal(
+            traces[0].get_values("x", chains=chain), traces[1].get_values("x", chains=chain)
+        )
+
+
+def test_bad_transport():
+    with pm.Model():
+        pm.Normal("x")
+        with pytest.raises(ValueError, match="Unknown transport"):
+            pm.sample(tune=2, draws=2, chains=2, cores=2, transport="carrier-pigeon")
+
+
+def test_shared_estimates():
+    pots = [
+        pm.step_methods.hmc.quadpotential.QuadPotentialDiagAdapt(2, np.zeros(2), np.ones(2), 0)
+        for _ in range(2)
+    ]
+    array = multiprocessing.RawArray("d", 2 * pots[0].pool_size)
+    lock = multiprocessing.Lock()
+    for chain, pot in enumerate(pots):
+        pot.set_pool(ps._SharedEstimates(array, lock, chain, 2))
+
+    np.random.seed(42)
+    samples = np.random.randn(2, 20, 2) * [1.0, 3.0]
+    for chain in [1, 0]:
+        for sample in samples[chain]:
+            pots[chain].update(sample, None, True)
+    # The second chain only saw its own draws
+    np.testing.assert_allclose(pots[1]._var, samples[1].var(0))
+    np.testing.assert_allclose(pots[0]._var, samples.reshape(-1, 2).var(0))
+    assert pickle.loads(pickle.dumps(pots[0]))._pool is None
+
+
+def test_pool_adaptation():
+    with pm.Model():
+        pm.Normal("x", 0, np.array([0.1, 10.0]), shape=2)
+        trace = pm.sample(
+            draws=200,
+            tune=200,
+            chains=2,
+            cores=2,
+            pool_adaptation=True,
+            compute_convergence_checks=False,
+            return_inferencedata=False,
+        )
+        np.testing.assert_allclose(trace["x"].std(0), [0.1, 10.0], rtol=0.3)
+
+        with pytest.raises(ValueError, match="Pooled adaptation"):
+            pm.sample(
+                draws=2, tune=2, chains=2, cores=2, step=pm.Metropolis(), pool_adaptation=True
+            )
+
+
+@pytest.mark.parametrize("transport", ["pipe", "ring"])
+def test_sampler_pool_reuses_processes(transport):
+    with pm.Model() as model:
+        x = pm.Data("x", np.zeros(10))
+        mu = pm.Normal("mu", 0, 10)
+        pm.Normal("obs", mu, 1, observed=x)
+
+    with model, pm.SamplerPool(chains=2, cores=2, transport=transport) as pool:
+        pids = [proc._process.pid for proc in pool._processes]
+        means = []
+        for value in [-5.0, 5.0]:
+            trace = pool.sample(
+                draws=200,
+                tune=200,
+                data={"x": np.full(10, value)},
+                compute_convergence_checks=False,
+            )
+            assert trace.nchains == 2
+            assert len(trace) == 200
+            means.append(trace["mu"].mean())
+        assert [proc._process.pid for proc in pool._processes] == pids
+    assert pool.closed
+    np.testing.assert_allclose(means, [-5, 5], atol=1)
+    np.testing.assert_array_equal(model["x"].get_value(), np.full(10, 5.0))
+
+
+def test_sampler_pool_matches_sample():
+    with pm.Model():
+        pm.Normal("x", shape=3)
+        with pm.SamplerPool(step=pm.Metropolis(), chains=2, cores=2) as pool:
+            pool_traces = [
+                pool.sample(
+                    draws=20, tune=20, random_seed=[10, 11], compute_convergence_checks=False
+                )
+                for _ in range(2)
+            ]
+        trace = pm.sample(
+            draws=20,
+            tune=20,
+            step=pm.Metropolis(),
+            chains=2,
+            cores=2,
+            random_seed=[10, 11],
+            compute_convergence_checks=False,
+            return_inferencedata=False,
+        )
+    for pool_trace in pool_traces:
+        for chain in range(2):
+            np.testing.assert_array_equal(
+                pool_trace.get_values("x", chains=chain), trace.get_values("x", chains=chain)
+            )
+    with pytest.raises(ValueError, match="closed"):
+        pool.sample(draws=2, tune=2)
@@ -1,4 +1,7 @@
+import asyncio
+
 import numpy as np
+import pytest
 
 import pymc3 as pm
 
@@ -37,3 +40,55 @@ def test_build_TraceDict_point_list():
         assert len(dict) == 1
         assert len(dict["mu"]) == 1
         assert dict["mu"][0] == 0.0
+
+
+def _engine_model():
+    with pm.Model() as model:
+        x = pm.Data("x", np.arange(3.0))
+        y = pm.Data("y", np.zeros(3))
+        beta = pm.Normal("beta", 0.0, 1.0)
+        sigma = pm.HalfNormal("sigma", 1.0)
+        pm.Normal("obs", beta * x, sigma, observed=y)
+    sigma = 1e-6
+    points = [
+        {"beta": float(b), "sigma_log__": np.log(sigma), "sigma": sigma} for b in range(1, 11)
+    ]
+    return model, points
+
+
+def test_predictive_engine():
+    model, points = _engine_model()
+    with pm.PredictiveEngine(points, model) as engine:
+        ppc = engine.predict({"x": [1.0, 2.0], "y": [0.0, 0.0]})
+        assert set(ppc) == {"obs"}
+        np.testing.assert_allclose(ppc["obs"], np.outer(np.arange(1, 11), [1.0, 2.0]), atol=1e-4)
+        assert engine.predict()["obs"].shape == (10, 3)
+    assert engine.closed
+    np.testing.assert_array_equal(model["x"].get_value(), np.arange(3.0))
+    with pytest.raises(RuntimeError, match="closed"):
+        engine.submit()
+
+    with pm.PredictiveEngine(points, model, samples=4) as engine:
+        ppc = asyncio.run(engine.apredict({"x": [1.0], "y": [0.0]}))
+        np.testing.assert_allclose(ppc["obs"][:, 0], [1.0, 4.0, 7.0, 10.0], atol=1e-4)
+
+
+def test_predictive_engine_batching():
+    model, points = _engine_model()
+    with pm.PredictiveEngine(points, model, batch=True, max_delay=1.0) as engine:
+        futures = [engine.submit({"x": np.full(i, i), "y": np.zeros(i)}) for i in range(1, 5)]
+        futures.append(engine.submit({"x": [1.0, 2.0], "y": [0.0]}))
+        for i, future in enumerate(futures[:-1], 1):
+            ppc = future.result()["obs"]
+            np.testing.assert_allclose(ppc, np.outer(np.arange(1, 11), np.full(i, i)), atol=1e-4)
+        with pytest.raises(AssertionError, match="wrong shape"):
+            futures[-1].result()
+    assert engine.stats == dict(requests=5, batches=1, evaluations=1)
+
+    # Requests are sampled one by one unless batching is enabled
+    with pm.PredictiveEngine(points, model, max_delay=1.0) as engine:
+        futures = [engine.submit({"x": np.full(i, i), "y": np.zeros(i)}) for i in range(1, 5)]
+        for i, future in enumerate(futures, 1):
+            ppc = future.result()["obs"]
+            np.testing.assert_allclose(ppc, np.outer(np.arange(1, 11), np.full(i, i)), atol=1e-4)
+    assert engine.stats == dict(requests=4, batches=1, evaluations=4)
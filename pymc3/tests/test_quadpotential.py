@@ -192,6 +192,22 @@ def test_weighted_covariance(ndim=10, seed=5432):
     assert np.allclose(cov_est2, cov_est0)
 
 
+def test_weighted_estimates_add_array(ndim=3, seed=5432):
+    np.random.seed(seed)
+    samples = np.random.randn(50, ndim) * [1.0, 2.0, 3.0]
+    for est_type in [quadpotential._WeightedVariance, quadpotential._WeightedCovariance]:
+        ests = [est_type(ndim) for _ in range(3)]
+        for sample in samples[:20]:
+            ests[0].add_sample(sample, 1)
+        for sample in samples[20:]:
+            ests[1].add_sample(sample, 1)
+        for sample in samples:
+            ests[2].add_sample(sample, 1)
+        ests[0].add_array(ests[1].as_array())
+        ests[0].add_array(np.zeros_like(ests[1].as_array()))
+        npt.assert_allclose(ests[0].as_array(), ests[2].as_array())
+
+
 def test_full_adapt_sample_p(seed=4566):
     # ref: https://github.com/stan-dev/stan/pull/2672
     np.random.seed(seed)
@@ -278,6 +294,154 @@ def test_full_adapt_sampling(seed=289586):
         pymc3.sample(draws=10, tune=1000, random_seed=seed, step=step, cores=1, chains=1)
 
 
+def test_lowrank():
+    np.random.seed(42)
+    diag = np.random.rand(10) + 0.5
+    vecs, _ = np.linalg.qr(np.random.randn(10, 2))
+    vals = np.array([20.0, 0.1])
+    root = np.diag(np.sqrt(diag))
+    cov = root.dot(np.eye(10) + vecs.dot(np.diag(vals - 1)).dot(vecs.T)).dot(root)
+    pot = quadpotential.QuadPotentialLowRank(diag, vecs, vals, dtype="float64")
+
+    x = np.random.randn(10)
+    npt.assert_allclose(pot.velocity(x), cov.dot(x))
+    npt.assert_allclose(pot.energy(x), 0.5 * x.dot(cov).dot(x))
+    cov_ = np.cov(np.array([pot.random() for _ in range(5000)]).T)
+    npt.assert_allclose(cov_, np.linalg.inv(cov), atol=0.3)
+
+
+def test_lowrank_adapt(seed=3254):
+    np.random.seed(seed)
+    n = 100
+    stds = np.exp(np.random.randn(n))
+    vecs, _ = np.linalg.qr(np.random.randn(n, 2))
+    corr = np.eye(n) + vecs.dot(np.diag([50.0, 0.02]) - np.eye(2)).dot(vecs.T)
+    cov = stds[:, None] * corr * stds
+    chol = np.linalg.cholesky(cov)
+
+    pot = quadpotential.QuadPotentialLowRankAdapt(
+        n, rank=4, adaptation_window=50, update_window=50, dtype="float64"
+    )
+    for i in range(49):
+        draw = chol.dot(np.random.randn(n))
+        pot.update(draw, -np.linalg.solve(cov, draw), True)
+    npt.assert_array_equal(pot._diag, np.ones(n))
+    pot.update(draw, -np.linalg.solve(cov, draw), True)
+    assert pot._vecs.shape == (n, 4)
+    pot.raise_ok(None)
+
+    # The adapted mass matrix removes most of the scales and correlations
+    mass = np.array([pot.velocity(x) for x in np.eye(n)])
+    eigvals = np.linalg.eigvals(np.linalg.solve(mass, cov)).real
+    assert eigvals.max() / eigvals.min() < 100
+    eigvals = np.linalg.eigvalsh(corr)
+    assert eigvals.max() / eigvals.min() > 1000
+
+    pot.update(draw, -draw, False)
+    assert pot._n_samples == 50
+
+
+def test_lowrank_adapt_sampling(seed=289586):
+    np.random.seed(seed)
+
+    L = np.random.randn(5, 5)
+    L[np.diag_indices_from(L)] = np.exp(L[np.diag_indices_from(L)])
+    L[np.triu_indices_from(L, 1)] = 0.0
+
+    with pymc3.Model() as model:
+        pymc3.MvNormal("a", mu=np.zeros(len(L)), chol=L, shape=len(L))
+
+        pot = quadpotential.QuadPotentialLowRankAdapt(model.ndim, rank=2)
+        step = pymc3.NUTS(model=model, potential=pot)
+        pymc3.sample(draws=10, tune=200, random_seed=seed, step=step, cores=1, chains=1)
+
+
+def test_block_adapt_equal_full(seed=3254):
+    np.random.seed(seed)
+    init_cov = np.eye(3)
+    full = quadpotential.QuadPotentialFullAdapt(3, np.zeros(3), init_cov, 1, adaptation_window=10)
+    block = quadpotential.QuadPotentialBlockAdapt(
+        3, np.zeros(3), [slice(0, 3)], np.ones(3), 1, adaptation_window=10
+    )
+    for i in range(25):
+        sample = np.random.randn(3) * [1.0, 2.0, 3.0]
+        full.update(sample, None, True)
+        block.update(sample, None, True)
+    npt.assert_allclose(block._covs[0], full._cov)
+    x = np.random.randn(3)
+    npt.assert_allclose(block.velocity(x), full.velocity(x))
+    npt.assert_allclose(block.energy(x), full.energy(x))
+
+
+def test_block_adapt():
+    np.random.seed(42)
+    block_cov = np.array([[2.0, 0.9], [0.9, 1.0]])
+    cov = np.diag([2.0, 0.5, 1.0, 4.0, 0.3])
+    cov[np.ix_([0, 2], [0, 2])] = block_cov
+    pot = quadpotential.QuadPotentialBlockAdapt(5, np.zeros(5), [[0, 2], slice(3, 5)])
+    chol = np.linalg.cholesky(cov)
+    for _ in range(1000):
+        pot.update(chol.dot(np.random.randn(5)), None, True)
+    pot.raise_ok(None)
+
+    npt.assert_allclose(pot._covs[0], block_cov, atol=0.3)
+    npt.assert_allclose(pot._var, [0.5], atol=0.1)
+    dense = np.zeros((5, 5))
+    dense[np.ix_([0, 2], [0, 2])] = pot._covs[0]
+    dense[1, 1] = pot._var[0]
+    dense[3:, 3:] = pot._covs[1]
+    x = np.random.randn(5)
+    npt.assert_allclose(pot.velocity(x), dense.dot(x), rtol=1e-6)
+    cov_ = np.cov(np.array([pot.random() for _ in range(5000)]).T)
+    npt.assert_allclose(cov_, np.linalg.inv(dense), atol=0.3)
+
+    with pytest.raises(ValueError, match="more than one block"):
+        quadpotential.QuadPotentialBlockAdapt(5, np.zeros(5), [[0, 2], slice(2, 5)])
+
+
+def test_var_blocks():
+    with pymc3.Model() as model:
+        a = pymc3.Normal("a", shape=2)
+        b = pymc3.HalfNormal("b")
+        pymc3.Normal("c", shape=3)
+        blocks = quadpotential.var_blocks([[a, b], "c"])
+        pot = quadpotential.QuadPotentialBlockAdapt(model.ndim, np.zeros(model.ndim), blocks)
+        step = pymc3.NUTS(potential=pot)
+        pymc3.sample(draws=10, tune=50, step=step, cores=1, chains=1)
+
+    # The blocks follow the ordering of the parameters in NUTS
+    ordering = step._logp_dlogp_func._ordering
+    indices = np.arange(model.ndim)
+    npt.assert_array_equal(
+        blocks[0], np.concatenate([indices[ordering["a"].slc], indices[ordering["b_log__"].slc]])
+    )
+    npt.assert_array_equal(blocks[1], indices[ordering["c"].slc])
+    with pytest.raises(ValueError, match="not sampled"):
+        quadpotential.var_blocks(["d"], model=model)
+
+
+def test_finish_window(seed=3254):
+    np.random.seed(seed)
+    diag = quadpotential.QuadPotentialDiagAdapt(3, np.zeros(3))
+    full = quadpotential.QuadPotentialFullAdapt(3, np.zeros(3))
+    block = quadpotential.QuadPotentialBlockAdapt(3, np.zeros(3), [slice(0, 2)])
+    samples = np.random.randn(20, 3) * [1.0, 2.0, 3.0]
+    for sample in samples:
+        for pot in [diag, full, block]:
+            pot.add_window_sample(sample, None)
+    # The mass matrix only changes at the end of the window
+    npt.assert_allclose(diag._var, np.ones(3))
+    npt.assert_allclose(full._cov, np.eye(3))
+
+    for pot in [diag, full, block]:
+        pot.finish_window()
+    npt.assert_allclose(diag._var, samples.var(0))
+    cov = np.cov(samples.T)
+    npt.assert_allclose(full._cov, cov)
+    npt.assert_allclose(block._covs[0], cov[:2, :2])
+    npt.assert_allclose(block._var, samples[:, 2].var())
+
+
 def test_issue_3965():
     with pymc3.Model():
         pymc3.Normal("n")
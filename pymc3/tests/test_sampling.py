@@ -321,6 +321,136 @@ def test_partial_trace_sample():
         trace = pm.sample(trace=[a])
 
 
+@pytest.mark.parametrize("deterministics", ["after", "skip"])
+def test_sample_deterministics_after(deterministics):
+    with pm.Model():
+        mu = pm.Normal("mu", shape=3)
+        sd = pm.HalfNormal("sd")
+        pm.Deterministic("scaled", mu * sd)
+        pm.Normal("y", mu.sum(), sd, observed=np.ones(5))
+        kwargs = dict(
+            draws=20,
+            tune=10,
+            chains=2,
+            cores=1,
+            random_seed=1,
+            return_inferencedata=False,
+            compute_convergence_checks=False,
+        )
+        expected = pm.sample(step=pm.Metropolis(), **kwargs)
+        trace = pm.sample(step=pm.Metropolis(), deterministics=deterministics, **kwargs)
+
+    if deterministics == "after":
+        assert trace.varnames == expected.varnames
+        assert trace["scaled"].shape == (40, 3)
+    else:
+        assert trace.varnames == ["mu", "sd_log__", "sd"]
+    for name in trace.varnames:
+        npt.assert_allclose(trace[name], expected[name])
+
+
+def test_compute_deterministics():
+    with pm.Model() as model:
+        mu = pm.Normal("mu", shape=3)
+        pm.Deterministic("shifted", mu + 1)
+        trace = pm.sample(
+            10, tune=0, step=pm.Metropolis(), chains=2, cores=1, trace=[mu], progressbar=False
+        )
+        assert trace.varnames == ["mu"]
+        pm.compute_deterministics(trace, batch_size=3)
+    assert trace.varnames == ["mu", "shifted"]
+    assert trace.get_values("shifted", combine=False)[1].shape == (10, 3)
+    npt.assert_allclose(trace["shifted"], trace["mu"] + 1)
+
+    with model:
+        with pytest.raises(ValueError, match="can not be used with a `trace`"):
+            pm.sample(deterministics="after", trace=[mu])
+        with pytest.raises(ValueError, match="'memmap' trace backend"):
+            pm.sample(deterministics="after", trace="memmap")
+
+
+def test_compute_log_likelihood(tmpdir):
+    data = np.random.randn(4, 2)
+    with pm.Model() as model:
+        mu = pm.Normal("mu", shape=2)
+        sd = pm.HalfNormal("sd")
+        y = pm.Normal("y", mu, sd, observed=data)
+        trace = pm.sample(7, tune=0, step=pm.Metropolis(), chains=2, cores=1, progressbar=False)
+        loglik = pm.compute_log_likelihood(trace, batch_size=3)
+        stored = pm.compute_log_likelihood(trace, batch_size=3, out_dir=str(tmpdir))
+    assert list(loglik) == ["y"]
+    assert loglik["y"].shape == (2, 7, 4, 2)
+    expected = np.array(
+        [
+            [y.logp_elemwise(point) for point in trace.points(chains=[chain])]
+            for chain in trace.chains
+        ]
+    )
+    npt.assert_allclose(loglik["y"], expected)
+    assert isinstance(stored["y"], np.memmap)
+    npt.assert_allclose(stored["y"], expected)
+
+    with model:
+        assert pm.compute_log_likelihood(trace, var_names=[]) == {}
+        with pytest.raises(ValueError, match="not observed"):
+            pm.compute_log_likelihood(trace, var_names=["mu"])
+
+
+@pytest.mark.parametrize("cores", [1, 2])
+def test_sample_early_stopping(cores):
+    with pm.Model() as model:
+        pm.Normal("x", shape=2)
+        pm.HalfNormal("sd")
+        early_stopping = pm.EarlyStopping(ess=100, rhat=1.1, check_every=20)
+        trace = pm.sample(
+            draws=5000,
+            tune=100,
+            chains=2,
+            cores=cores,
+            step=pm.Metropolis(),
+            early_stopping=early_stopping,
+            random_seed=2,
+            return_inferencedata=False,
+            compute_convergence_checks=False,
+            progressbar=False,
+        )
+    assert early_stopping.stopped
+    assert set(early_stopping.ess_estimates) == {"x", "sd_log__"}
+    assert trace.nchains == 2
+    assert 100 <= len(trace) < 5000
+    assert all(len(values) == len(trace) for values in trace.get_values("x", combine=False))
+    assert trace.report.n_draws == len(trace)
+    if cores == 1:
+        # The first chain alone needs half of the effective sample size
+        assert len(trace) == early_stopping.n_draws
+    assert all(ess >= 50 for ess in early_stopping.ess_estimates.values())
+
+
+def test_early_stopping_targets():
+    with pm.Model() as model:
+        pm.Normal("x", shape=3)
+    early_stopping = pm.EarlyStopping(ess=100, rhat=1.05, check_every=10, min_draws=50)
+    early_stopping._setup(model, 2)
+    rng = np.random.RandomState(0)
+    stopped_at = None
+    for i in range(1000):
+        for chain in range(2):
+            if early_stopping.record(chain, {"x": rng.normal(size=3)}) and stopped_at is None:
+                stopped_at = i + 1
+    assert stopped_at is not None and stopped_at % 10 == 0
+    assert early_stopping.n_draws == 1000
+
+    # Chains around different means do not converge
+    early_stopping._setup(model, 2)
+    for i in range(1000):
+        for chain in range(2):
+            assert not early_stopping.record(chain, {"x": rng.normal(size=3) + 3 * chain})
+    assert early_stopping.rhat_estimates["x"] > 1.05
+
+    with pytest.raises(ValueError, match="free variables"):
+        pm.EarlyStopping(var_names=["y"])._setup(model, 2)
+
+
 @pytest.mark.parametrize(
     "n_points, tune, expected_length, expected_n_traces",
     [
@@ -743,6 +873,138 @@ class TestSamplePPC(SeededTest):
             assert ppc["a"].dtype.kind == "f"
             assert ppc["b"].dtype.kind == "i"
 
+    def test_vectorized(self):
+        x = np.linspace(0, 1, 20)
+        with pm.Model() as model:
+            a = pm.Normal("a")
+            b = pm.Normal("b")
+            mu = pm.Deterministic("mu", a + b * x)
+            pm.Normal("y", mu, 0.1, observed=1 + 2 * x)
+            trace = pm.sample(
+                300, tune=100, chains=2, cores=1, step=pm.Metropolis(), return_inferencedata=False
+            )
+
+        with model:
+            loop = pm.sample_posterior_predictive(trace, progressbar=False)
+            ppc = pm.sample_posterior_predictive(trace, vectorized=True, chunk_size=70)
+            assert ppc["y"].shape == loop["y"].shape == (600, 20)
+            _, pval = stats.ks_2samp(
+                (ppc["y"] - trace["mu"]).ravel(), (loop["y"] - trace["mu"]).ravel()
+            )
+            assert pval > 0.001
+
+            # the chunks are concatenated in the order of the trace
+            ppc = pm.fast_sample_posterior_predictive(trace, var_names=["y", "mu"], chunk_size=70)
+            npt.assert_allclose(ppc["mu"], trace["mu"])
+
+            ppc = pm.sample_posterior_predictive(
+                trace, vectorized=True, chunk_size=250, keep_size=True
+            )
+            assert ppc["y"].shape == (2, 300, 20)
+            ppc = pm.sample_posterior_predictive(
+                trace, samples=1000, vectorized=True, chunk_size=250
+            )
+            assert ppc["y"].shape == (1000, 20)
+
+            with pytest.raises(IncorrectArgumentsError):
+                pm.sample_posterior_predictive(trace, size=2, vectorized=True)
+            with pytest.raises(IncorrectArgumentsError):
+                pm.sample_posterior_predictive(trace, chunk_size=10)
+            with pytest.raises(IncorrectArgumentsError):
+                pm.fast_sample_posterior_predictive(trace, chunk_size=0)
+
+    def test_cores(self):
+        with pm.Model() as model:
+            mu = pm.Normal("mu", 0.0, 1.0)
+            pm.Normal("a", mu=mu, sigma=1, observed=np.zeros(5))
+            pm.Poisson("b", pm.math.exp(mu), observed=np.ones(3, dtype=int))
+            trace = pm.sample(
+                250, tune=50, chains=2, cores=1, step=pm.Metropolis(), return_inferencedata=False
+            )
+
+        with model:
+            ppcs = [
+                pm.fast_sample_posterior_predictive(trace, random_seed=3, chunk_size=100, cores=c)
+                for c in (1, 2, 3)
+            ]
+            for ppc in ppcs:
+                assert ppc["a"].shape == (500, 5)
+                assert ppc["b"].dtype.kind == "i"
+                npt.assert_array_equal(ppc["a"], ppcs[0]["a"])
+                npt.assert_array_equal(ppc["b"], ppcs[0]["b"])
+            _, pval = stats.kstest(
+                (ppcs[0]["a"] - trace["mu"][:, None]).ravel(), stats.norm(loc=0, scale=1).cdf
+            )
+            assert pval > 0.001
+
+            ppc = pm.sample_posterior_predictive(
+                trace, random_seed=3, chunk_size=100, cores=2, keep_size=True, var_names=["a"]
+            )
+            npt.assert_array_equal(ppc["a"].reshape(500, 5), ppcs[0]["a"])
+            ppc = pm.sample_posterior_predictive(trace, samples=1200, cores=2, var_names=["a"])
+            assert ppc["a"].shape == (1200, 5)
+            # A single chunk needs no worker processes
+            ppc = pm.fast_sample_posterior_predictive(trace, random_seed=3, cores=2)
+            assert ppc["a"].shape == (500, 5)
+
+            with pytest.raises(IncorrectArgumentsError):
+                pm.sample_posterior_predictive(trace, size=2, cores=2)
+            with pytest.raises(IncorrectArgumentsError):
+                pm.fast_sample_posterior_predictive(trace, cores=0)
+
+    @pytest.mark.parametrize("cores", [None, 2])
+    def test_out_dir_and_summary(self, tmpdir, cores, monkeypatch):
+        with pm.Model() as model:
+            mu = pm.Normal("mu", 0.0, 1.0)
+            pm.Normal("a", mu=mu, sigma=1, observed=np.zeros((2, 3)))
+            pm.Poisson("b", pm.math.exp(mu), observed=np.ones(4, dtype=int))
+            trace = pm.sample(
+                250, tune=50, chains=2, cores=1, step=pm.Metropolis(), return_inferencedata=False
+            )
+
+        with model:
+            kwargs = dict(random_seed=3, chunk_size=70, cores=cores)
+            np.random.seed(1)
+            ppc = pm.fast_sample_posterior_predictive(trace, **kwargs)
+            np.random.seed(1)
+            on_disk = pm.fast_sample_posterior_predictive(trace, out_dir=str(tmpdir), **kwargs)
+            assert isinstance(on_disk["a"], np.memmap)
+            npt.assert_array_equal(np.load(str(tmpdir.join("a.npy"))), ppc["a"])
+            npt.assert_array_equal(on_disk["b"], ppc["b"])
+
+            np.random.seed(1)
+            summary = pm.PredictiveSummary(hdi_prob=0.8, thresholds={"a": 0.5, "b": 1})
+            stats = pm.fast_sample_posterior_predictive(trace, summary=summary, **kwargs)
+            npt.assert_allclose(stats["a"]["mean"], ppc["a"].mean(0))
+            npt.assert_allclose(stats["a"]["sd"], ppc["a"].std(0, ddof=1))
+            npt.assert_allclose(stats["a"]["exceedance"], (ppc["a"] > 0.5).mean(0))
+            npt.assert_allclose(stats["b"]["exceedance"], (ppc["b"] > 1).mean(0))
+            npt.assert_allclose(stats["a"]["hdi"], az.hdi(ppc["a"][None], hdi_prob=0.8))
+            npt.assert_allclose(stats["b"]["hdi"], az.hdi(ppc["b"][None], hdi_prob=0.8))
+
+            stats = pm.sample_posterior_predictive(trace, summary=pm.PredictiveSummary())
+            assert set(stats["b"]) == {"mean", "sd"}
+            assert stats["a"]["mean"].shape == (2, 3)
+
+            # Summaries are computed chunk by chunk by default
+            monkeypatch.setattr(pm.distributions.posterior_predictive, "_DEFAULT_CHUNK_SIZE", 70)
+            update = pm.PredictiveSummary._update
+            chunks = []
+
+            def record_update(self, name, values):
+                chunks.append(len(values))
+                update(self, name, values)
+
+            monkeypatch.setattr(pm.PredictiveSummary, "_update", record_update)
+            stats = pm.fast_sample_posterior_predictive(trace, summary=pm.PredictiveSummary())
+            assert max(chunks) == 70
+            assert stats["a"]["mean"].shape == (2, 3)
+
+            with pytest.raises(IncorrectArgumentsError):
+                pm.fast_sample_posterior_predictive(trace, summary=summary, keep_size=True)
+            with pytest.raises(ValueError):
+                pm.PredictiveSummary(hdi_prob=1.5)
+
     def test_potentials_warning(self):
         warning_msg = "The effect of Potentials on other parameters is ignored during"
         with pm.Model() as m:
@@ -833,6 +1095,8 @@ class TestSamplePPCW(SeededTest):
         "advi_map",
         "adapt_full",
         "jitter+adapt_full",
+        "adapt_lowrank",
+        "jitter+adapt_lowrank",
     ],
 )
 def test_exec_nuts_init(method):
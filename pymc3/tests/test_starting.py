@@ -13,10 +13,13 @@
 #   limitations under the License.
 
 import numpy as np
+import pytest
+import theano.tensor as tt
 
 from pytest import raises
 
-from pymc3 import Beta, Binomial, Model, Normal, Point, Uniform, find_MAP
+from pymc3 import Beta, Binomial, Model, Normal, Point, Potential, Uniform, find_MAP
+from pymc3.math import logsumexp
 from pymc3.tests.checks import close_to
 from pymc3.tests.helpers import select_by_precision
 from pymc3.tests.models import non_normal, simple_arbitrary_det, simple_model
@@ -88,6 +91,43 @@ def test_find_MAP():
     close_to(map_est2["sigma"], 1, tol)
 
 
+@pytest.mark.parametrize("cores", [1, 2])
+def test_find_MAP_starts(cores):
+    with Model():
+        x = Normal("x", 0, 10)
+        # Two modes, the one at 3 is higher
+        Potential("modes", logsumexp([-((x + 3) ** 2), -((x - 3) ** 2) + 1]))
+
+        local = find_MAP(start={"x": -3.5}, progressbar=False)
+        best, optima = find_MAP(starts=[{"x": -3.5}, {"x": 3.5}], cores=cores, progressbar=False)
+        jittered, _, opt_results = find_MAP(
+            start={"x": 0.5},
+            starts=4,
+            random_seed=1,
+            cores=cores,
+            progressbar=False,
+            return_raw=True,
+        )
+
+    close_to(local["x"], -3, 0.05)
+    close_to(best["x"], 3, 0.05)
+    assert [optimum["x"] for optimum in optima] == pytest.approx([3, -3], abs=0.05)
+    close_to(jittered["x"], 3, 0.05)
+    assert len(opt_results) == 4
+    assert opt_results[0].fun <= min(result.fun for result in opt_results)
+
+
+def test_find_MAP_starts_nan():
+    with Model():
+        x = Normal("x", 0, 10)
+        # The logp is undefined below -2
+        Potential("p", -((x - 3) ** 2) + tt.log(tt.switch(x < -2, -1.0, 1.0)))
+        best, optima = find_MAP(starts=[{"x": -5.0}, {"x": 0.0}], progressbar=False)
+
+    close_to(best["x"], 3, 0.05)
+    assert optima[-1]["x"] < -2
+
+
 def test_allinmodel():
     model1 = Model()
     model2 = Model()
@@ -0,0 +1,128 @@
+#   Copyright 2020 The PyMC Developers
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+import pymc3 as pm
+
+from pymc3.backends import base, summary
+from pymc3.tests import backend_fixtures as bf
+
+STATS1 = [{"a": np.float64, "b": np.bool}]
+
+
+class TestSummaryStats(bf.StatsTestCase):
+    backend = summary.SummaryTrace
+    name = None
+    shape = (2, 3)
+
+
+class TestSummarySetup(bf.ModelBackendSetupTestCase):
+    backend = summary.SummaryTrace
+    name = None
+    shape = 2
+    sampler_vars = STATS1
+
+
+class TestOnlineStats:
+    def setup_method(self):
+        rng = np.random.RandomState(42)
+        self.draws = np.zeros((5000, 2, 2))
+        for i in range(1, len(self.draws)):
+            self.draws[i] = 0.5 * self.draws[i - 1] + rng.normal(size=(2, 2))
+        self.stats = summary.OnlineStats((2, 2))
+        for draw in self.draws:
+            self.stats.update(draw)
+
+    def test_moments(self):
+        assert self.stats.count == 5000
+        npt.assert_allclose(self.stats.mean, self.draws.mean(0))
+        npt.assert_allclose(self.stats.var, self.draws.var(0, ddof=1))
+
+    def test_quantiles(self):
+        for q in self.stats.quantiles:
+            npt.assert_allclose(
+                self.stats.quantile(q), np.quantile(self.draws, q, axis=0), atol=0.2
+            )
+        with pytest.raises(ValueError, match="not tracked"):
+            self.stats.quantile(0.1)
+
+    def test_ess(self):
+        # The integrated autocorrelation time of an AR(1) process is (1 + phi) / (1 - phi)
+        assert self.stats.batch_size > 1
+        assert self.stats._n_batches < 64
+        npt.assert_allclose(self.stats.ess, 5000 / 3, rtol=0.5)
+
+    def test_halves(self):
+        (n_first, mean_first, _), (n_second, mean_second, _) = self.stats.halves()
+        assert n_first + n_second == 5000
+        npt.assert_allclose(mean_first, self.draws[:n_first].reshape(n_first, -1).mean(0))
+        npt.assert_allclose(mean_second, self.draws[n_first:].reshape(n_second, -1).mean(0))
+
+
+def test_summary_trace_sample():
+    with pm.Model() as model:
+        pm.Normal("x", shape=2)
+        trace = pm.sample(
+            draws=300,
+            tune=100,
+            chains=2,
+            cores=1,
+            step=pm.Metropolis(),
+            trace="summary",
+            return_inferencedata=False,
+            random_seed=1,
+        )
+    assert len(trace) == 400
+    assert trace.report.n_tune == 100
+    assert trace.report.n_draws == 300
+    assert set(trace.report._rhat) == {"x"}
+    assert trace._straces[0].summaries["x"].count == 300
+
+    df = summary.summary(trace)
+    assert list(df.index) == ["x[0]", "x[1]"]
+    npt.assert_allclose(df["mean"], 0, atol=0.5)
+    npt.assert_allclose(df["sd"], 1, atol=0.3)
+    assert np.all(df["r_hat"] < 1.2)
+    assert summary.summary(trace, ["accept"]).shape[0] == 1
+
+    # Nothing to check if the trace contains none of the free variables
+    with pm.Model() as other:
+        pm.Normal("y")
+    trace.report._run_summary_convergence_checks(trace, other)
+
+    with pytest.raises(base.BackendError):
+        trace["x"]
+    with model:
+        with pytest.raises(ValueError, match="InferenceData"):
+            pm.sample(trace="summary", return_inferencedata=True)
+
+
+def test_summary_trace_sample_without_stats():
+    with pm.Model():
+        pm.Normal("x")
+        trace = pm.sample(
+            draws=100,
+            tune=300,
+            chains=1,
+            step=pm.Slice(),
+            trace="summary",
+            return_inferencedata=False,
+            compute_convergence_checks=False,
+        )
+    assert trace.report.n_tune == 300
+    assert trace.report.n_draws == 100
+    assert trace._straces[0].summaries["x"].count == 100
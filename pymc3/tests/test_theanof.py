@@ -19,7 +19,7 @@ import pytest
 import theano
 import theano.tensor as tt
 
-from pymc3.theanof import _conversion_map, take_along_axis
+from pymc3.theanof import _conversion_map, batched, take_along_axis
 from pymc3.vartypes import int_types
 
 FLOATX = str(theano.config.floatX)
@@ -223,3 +223,34 @@ class TestTakeAlongAxis:
         indices.tag.test_value = np.zeros((1,) * indices.ndim, dtype=FLOATX)
         with pytest.raises(IndexError):
             take_along_axis(arr, indices)
+
+
+@pytest.mark.parametrize(
+    "make_output",
+    [
+        lambda x: tt.exp(x).sum() * x[0],
+        lambda x: tt.dot(np.arange(12.0).reshape(4, 3), x[:3]),
+        lambda x: tt.dot(x[:3], x[3:6]),
+        lambda x: tt.dot(x[:4].reshape((2, 2)), x[2:6].reshape((2, 2))),
+        lambda x: tt.max(x[:6].reshape((2, 3)), axis=1),
+        lambda x: tt.concatenate([x[np.array([0, 2, 2])], tt.ones(2), tt.stack([x[1], 1.0])]),
+        lambda x: tt.set_subtensor(x[1:3], x[0] * 3),
+        lambda x: tt.inc_subtensor(x[np.array([0, 2])], x[3]) + tt.alloc(x[0], x.shape[0]),
+        lambda x: tt.constant(np.ones(2)),
+    ],
+)
+@theano.config.change_flags(compute_test_value="off")
+def test_batched(make_output):
+    x = tt.vector("x")
+    out = make_output(x)
+    (batched_out,), (batched_x,) = batched([out], [x])
+    grad = tt.grad(batched_out.sum(), batched_x, disconnected_inputs="ignore")
+    fn = theano.function([batched_x], [batched_out, grad], on_unused_input="ignore")
+    row_grad = tt.grad(out.sum(), x, disconnected_inputs="ignore")
+    row_fn = theano.function([x], [out, row_grad], on_unused_input="ignore")
+    values = np.random.randn(5, 7).astype(x.dtype)
+
+    # The graph is vectorized without looping over the rows
+    assert not any("Scan" in type(node.op).__name__ for node in fn.maker.fgraph.apply_nodes)
+    for result, expected in zip(fn(values), zip(*[row_fn(row) for row in values])):
+        np.testing.assert_allclose(result, np.stack(expected), rtol=1e-5)
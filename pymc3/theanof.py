@@ -17,7 +17,7 @@ import theano
 
 from theano import scalar
 from theano import tensor as tt
-from theano.graph.basic import Apply, graph_inputs
+from theano.graph.basic import Apply, graph_inputs, io_toposort
 from theano.graph.op import Op
 from theano.sandbox.rng_mrg import MRG_RandomStream as RandomStream
 
@@ -42,6 +42,7 @@ __all__ = [
     "set_tt_rng",
     "tt_rng",
     "take_along_axis",
+    "batched",
 ]
 
 
@@ -238,6 +239,231 @@ def make_shared_replacements(vars, model):
     return {var: theano.shared(var.tag.test_value, var.name + "_shared") for var in othervars}
 
 
+@theano.config.change_flags(compute_test_value="ignore")
+def batched(outputs, inputs, name=None):
+    """Map a graph over a batch of values of some of its inputs.
+
+    The graph is rebuilt with an additional first dimension on every variable
+    that depends on the inputs, so that the operations are applied to all rows
+    at once: elementwise operations broadcast over the rows, reductions and
+    indexing skip the first axis and dot products become matrix products.
+    Operations without such a vectorized form are looped over the rows with
+    `theano.scan`. The rows of the batch must be independent, so the gradient
+    of the sum of a batched scalar with respect to a batched input is the
+    gradient of every row.
+
+    Parameters
+    ----------
+    outputs: list of theano variables
+        The outputs of the graph.
+    inputs: list of theano variables
+        The variables of the graph that are replaced by batches. They do not
+        need to be root variables of the graph.
+    name: str, optional
+        The name of the scan ops of operations without a vectorized form.
+
+    Returns
+    -------
+    batched_outputs, batched_inputs
+    batched_outputs: list of the outputs, with the results of all rows
+        stacked along a new first dimension
+    batched_inputs: list of new variables with an additional first dimension
+        that replace `inputs`
+    """
+    batched_inputs = []
+    for var in inputs:
+        batch_type = tt.TensorType(var.dtype, (False,) + var.broadcastable)
+        batched_inputs.append(batch_type(None if var.name is None else var.name + "_batch"))
+    if not batched_inputs:
+        raise ValueError("At least one input is required.")
+    batch_size = batched_inputs[0].shape[0]
+
+    # Maps variables of the graph to their new variable and whether it is batched
+    replacements = {var: (new, True) for var, new in zip(inputs, batched_inputs)}
+    for node in io_toposort(inputs, outputs):
+        new_inputs = [replacements.get(var, (var, False)) for var in node.inputs]
+        if all(new is var for var, (new, _) in zip(node.inputs, new_inputs)):
+            continue
+        if not any(is_batched for _, is_batched in new_inputs):
+            new_outputs = [
+                (out, False) for out in node.op(*[new for new, _ in new_inputs], return_list=True)
+            ]
+        else:
+            new_outputs = _batched_node(node, new_inputs, batch_size)
+            if new_outputs is None:
+                new_outputs = _scanned_node(node, new_inputs, name)
+        for out, (new, is_batched) in zip(node.outputs, new_outputs):
+            if is_batched:
+                new = _like_rows(new, out)
+            replacements[out] = (new, is_batched)
+
+    batched_outputs = []
+    for out in outputs:
+        new, is_batched = replacements.get(out, (out, False))
+        if not is_batched:
+            new = tt.alloc(new, batch_size, *[new.shape[i] for i in range(new.ndim)])
+        batched_outputs.append(new)
+    return batched_outputs, batched_inputs
+
+
+def _like_rows(new, var):
+    """Give the rows of the batched variable `new` the type of `var`."""
+    if new.dtype != var.dtype:
+        new = tt.cast(new, var.dtype)
+    broadcastable = (False,) + var.broadcastable
+    if new.broadcastable != broadcastable:
+        new = tt.patternbroadcast(new, broadcastable)
+    return new
+
+
+def _expand(var, batch_size=None):
+    """Add a first dimension to an unbatched variable, broadcast or of length `batch_size`."""
+    var = var.dimshuffle(["x"] + list(range(var.ndim)))
+    if batch_size is None:
+        return var
+    return tt.alloc(var, batch_size, *[var.shape[i] for i in range(1, var.ndim)])
+
+
+def _batched_node(node, inputs, batch_size):
+    """Apply the op of `node` to all rows of the batched inputs at once.
+
+    `inputs` is a list of tuples of the new inputs and whether they are
+    batched. Returns a list of such tuples for the outputs, or None if the
+    op has no vectorized form.
+    """
+    op = node.op
+    values = [var for var, _ in inputs]
+    is_batched = [flag for _, flag in inputs]
+    var = values[0]
+
+    if isinstance(op, tt.Elemwise):
+        values = [val if flag else _expand(val) for val, flag in inputs]
+        return [(out, True) for out in op(*values, return_list=True)]
+    if isinstance(op, tt.DimShuffle):
+        new_order = [0] + ["x" if i == "x" else i + 1 for i in op.new_order]
+        return [(var.dimshuffle(new_order), True)]
+    if isinstance(op, tt.elemwise.CAReduce):
+        ndim = node.inputs[0].ndim
+        axis = range(ndim) if op.axis is None else op.axis
+        props = {prop: getattr(op, prop) for prop in op.__props__}
+        props["axis"] = [i % ndim + 1 for i in axis]
+        return [(type(op)(**props)(var), True)]
+    if isinstance(op, tt.basic.MaxAndArgmax):
+        new_op = tt.basic.MaxAndArgmax([i + 1 for i in op.axis])
+        return [(out, True) for out in new_op(var, return_list=True)]
+    if isinstance(op, tt.basic.Dot):
+        return [(_batched_dot(node, inputs), True)]
+    if isinstance(op, tt.basic.Join):
+        return _batched_join(inputs, batch_size)
+    if isinstance(op, tt.opt.MakeVector):
+        rows = [val if flag else tt.alloc(val, batch_size) for val, flag in inputs]
+        return [(tt.stack(rows, axis=1), True)]
+    if isinstance(op, (tt.subtensor.IncSubtensor, tt.subtensor.AdvancedIncSubtensor1)):
+        return _batched_inc_subtensor(node, inputs, batch_size)
+    if isinstance(op, tt.opt.Assert):
+        conditions = [tt.all(val) if flag else val for val, flag in inputs[1:]]
+        value = var if is_batched[0] else _expand(var, batch_size)
+        return [(op(value, *conditions), True)]
+    if isinstance(op, theano.compile.ops.ViewOp):
+        return [(var, True)]
+    if not is_batched[0] or any(is_batched[1:]):
+        # Batched indices or shapes
+        return None
+
+    if isinstance(op, tt.subtensor.Subtensor):
+        new_op = tt.subtensor.Subtensor((slice(None),) + tuple(op.idx_list))
+        return [(new_op(var, *values[1:]), True)]
+    if isinstance(op, tt.subtensor.AdvancedSubtensor1):
+        return [(var[:, values[1]], True)]
+    if isinstance(op, tt.basic.Reshape):
+        shape = tt.join(0, batch_size.dimshuffle("x"), tt.cast(values[1], "int64"))
+        return [(tt.reshape(var, shape, ndim=op.ndim + 1), True)]
+    if isinstance(op, theano.compile.ops.Shape):
+        return [(var.shape[1:], False)]
+    if isinstance(op, theano.compile.ops.Shape_i):
+        return [(var.shape[op.i + 1], False)]
+    if isinstance(op, tt.basic.Alloc):
+        missing = len(values) - 1 - node.inputs[0].ndim
+        rows = var.dimshuffle([0] + ["x"] * missing + list(range(1, var.ndim)))
+        return [(tt.alloc(rows, batch_size, *values[1:]), True)]
+    if isinstance(op, tt.basic.Rebroadcast):
+        return [(var, True)]
+    return None
+
+
+def _batched_dot(node, inputs):
+    (x, x_batched), (y, y_batched) = inputs
+    x_ndim, y_ndim = node.inputs[0].ndim, node.inputs[1].ndim
+    if not y_batched:
+        return tt.dot(x, y)
+    if not x_batched:
+        if y_ndim == 1:
+            return tt.dot(y, x.T)
+        out = tt.tensordot(x, y, [[x_ndim - 1], [1]])
+        return out if x_ndim == 1 else out.dimshuffle(1, 0, 2)
+    # Multiply the rows and sum over the contracted axis of x
+    if x_ndim == 2 and y_ndim == 2:
+        x = x.dimshuffle(0, 1, 2, "x")
+        y = y.dimshuffle(0, "x", 1, 2)
+    elif x_ndim == 2:
+        y = y.dimshuffle(0, "x", 1)
+    elif y_ndim == 2:
+        x = x.dimshuffle(0, 1, "x")
+    return tt.sum(x * y, axis=x_ndim)
+
+
+def _batched_join(inputs, batch_size):
+    (axis, axis_batched), tensors = inputs[0], inputs[1:]
+    if axis_batched:
+        return None
+    try:
+        axis = int(tt.get_scalar_constant_value(axis))
+    except tt.NotScalarConstantError:
+        return None
+    tensors = [val if flag else _expand(val, batch_size) for val, flag in tensors]
+    return [(tt.join(axis + 1 if axis >= 0 else axis, *tensors), True)]
+
+
+def _batched_inc_subtensor(node, inputs, batch_size):
+    (x, x_batched), (y, y_batched) = inputs[:2]
+    if any(is_batched for _, is_batched in inputs[2:]):
+        return None
+    if not x_batched:
+        x = _expand(x, batch_size)
+    op = node.op
+    if isinstance(op, tt.subtensor.AdvancedIncSubtensor1):
+        subtensor = x[:, inputs[2][0]]
+    else:
+        new_op = tt.subtensor.Subtensor((slice(None),) + tuple(op.idx_list))
+        subtensor = new_op(x, *[var for var, _ in inputs[2:]])
+    if y_batched:
+        # Align the rows of y with the rows of the subtensor
+        missing = subtensor.ndim - y.ndim
+        y = y.dimshuffle([0] + ["x"] * missing + list(range(1, y.ndim)))
+    else:
+        y = _expand(y)
+    if op.set_instead_of_inc:
+        return [(tt.set_subtensor(subtensor, y), True)]
+    return [(tt.inc_subtensor(subtensor, y), True)]
+
+
+def _scanned_node(node, inputs, name):
+    """Loop the op of `node` over the rows of the batched inputs."""
+    sequences = [var for var, is_batched in inputs if is_batched]
+
+    def row_outputs(*rows):
+        rows = list(rows)
+        values = [rows.pop(0) if is_batched else var for var, is_batched in inputs]
+        return node.op(*values, return_list=True)
+
+    outputs, updates = theano.scan(row_outputs, sequences=sequences, name=name)
+    if updates:
+        raise ValueError("Graphs with random updates can not be batched.")
+    if not isinstance(outputs, list):
+        outputs = [outputs]
+    return [(out, True) for out in outputs]
+
+
 def join_nonshared_inputs(xs, vars, shared, make_shared=False):
     """
     Takes a list of theano Variables and joins their non shared inputs into a single input.
@@ -18,6 +18,9 @@ Created on Mar 12, 2011
 @author: johnsalvatier
 """
 import copy
+import multiprocessing
+
+from contextlib import ExitStack
 
 import numpy as np
 import theano.gradient as tg
@@ -29,7 +32,7 @@ from scipy.optimize import minimize
 import pymc3 as pm
 
 from pymc3.blocking import ArrayOrdering, DictToArrayBijection
-from pymc3.model import Point, modelcontext
+from pymc3.model import Point, ValueGradFunction, modelcontext
 from pymc3.theanof import inputvars
 from pymc3.util import (
     check_start_vals,
@@ -37,7 +40,7 @@ from pymc3.util import (
     get_var_name,
     update_start_vals,
 )
-from pymc3.vartypes import discrete_types, typefilter
+from pymc3.vartypes import continuous_types, discrete_types, typefilter
 
 __all__ = ["find_MAP"]
 
@@ -52,6 +55,9 @@ def find_MAP(
     maxeval=5000,
     model=None,
     *args,
+    starts=None,
+    cores=None,
+    random_seed=None,
     **kwargs
 ):
     """
@@ -79,15 +85,38 @@ def find_MAP(
     maxeval: int, optional, defaults to 5000
         The maximum number of times the posterior distribution is evaluated.
     model: Model (optional if in `with` context)
+    starts: int or list of dicts, optional
+        Run one optimization from each of these starting points, or from ``start``
+        and ``starts - 1`` points jittered around it by uniform noise in [-1, 1]
+        in the transformed space. Helps to find the global maximum of multimodal
+        posteriors.
+    cores: int, optional
+        The number of processes that run the optimizations of ``starts`` in
+        parallel. Defaults to the number of CPUs in the system, but at most 4.
+    random_seed: int, optional
+        Seed for the jitter of ``starts``.
     *args, **kwargs
         Extra args passed to scipy.optimize.minimize
 
+    Returns
+    -------
+    map_estimate: dict
+        The point with the highest logp.
+    optima: list of dicts
+        Only if ``starts`` is given. The optima of all optimizations, sorted by
+        decreasing logp, so that the first is ``map_estimate``.
+    opt_result: OptimizeResult or list of OptimizeResult
+        Only if ``return_raw`` is True. The output of scipy.optimize.minimize, in the
+        same order as ``optima`` if ``starts`` is given.
+
     Notes
     -----
     Older code examples used find_MAP() to initialize the NUTS sampler,
     but this is not an effective way of choosing starting values for sampling.
     As a result, we have greatly enhanced the initialization of NUTS and
     wrapped it inside pymc3.sample() and you should thus avoid this method.
+
+    The logp and its gradient are computed by a single compiled function.
     """
     model = modelcontext(model)
 
@@ -96,7 +125,6 @@ def find_MAP(
         if not vars:
             raise ValueError("Model has no unobserved continuous variables.")
     vars = inputvars(vars)
-    disc_vars = list(typefilter(vars, discrete_types))
     allinmodel(vars, model)
     start = copy.deepcopy(start)
     if start is None:
@@ -107,16 +135,10 @@ def find_MAP(
 
     start = Point(start, model=model)
     bij = DictToArrayBijection(ArrayOrdering(vars), start)
-    logp_func = bij.mapf(model.fastlogp_nojac)
+    logp_func, logp_dlogp_func = _logp_functions(model, vars, start, bij)
     x0 = bij.map(start)
 
-    try:
-        dlogp_func = bij.mapf(model.fastdlogp_nojac(vars))
-        compute_gradient = True
-    except (AttributeError, NotImplementedError, tg.NullTypeGradError):
-        compute_gradient = False
-
-    if disc_vars or not compute_gradient:
+    if logp_dlogp_func is None:
         pm._log.warning(
             "Warning: gradient not available."
             + "(E.g. vars contains discrete variables). MAP "
@@ -126,13 +148,93 @@ def find_MAP(
         )
         method = "Powell"
 
-    if compute_gradient:
-        cost_func = CostFuncWrapper(maxeval, progressbar, logp_func, dlogp_func)
+    if starts is None:
+        cost_func = CostFuncWrapper(
+            maxeval, progressbar, logp_func, logp_dlogp_func=logp_dlogp_func
+        )
+        mx0, opt_result = _minimize(cost_func, x0, method, args, kwargs)
+        optima = [(mx0, opt_result)]
     else:
-        cost_func = CostFuncWrapper(maxeval, progressbar, logp_func)
+        x0s = _starting_points(starts, x0, bij, model, random_seed)
+        initargs = (model, [var.name for var in vars], start, method, maxeval, args, kwargs)
+        if cores is None:
+            cores = min(4, multiprocessing.cpu_count())
+        with ExitStack() as stack:
+            if cores == 1 or len(x0s) == 1:
+                stack.callback(_map_worker.clear)
+                _map_worker.update(
+                    logp_func=logp_func,
+                    logp_dlogp_func=logp_dlogp_func,
+                    method=method,
+                    maxeval=maxeval,
+                    args=args,
+                    kwargs=kwargs,
+                )
+                results = map(_run_map, x0s)
+            else:
+                from pymc3.parallel_sampling import _get_mp_ctx
+
+                processes = min(cores, len(x0s))
+                pool = stack.enter_context(
+                    _get_mp_ctx(None).Pool(processes, _init_map_worker, initargs)
+                )
+                results = pool.imap(_run_map, x0s)
+            if progressbar:
+                results = progress_bar(results, total=len(x0s), display=progressbar)
+            optima = list(results)
+        logps = np.array([_logp(logp_func, logp_dlogp_func, mx0) for mx0, _ in optima])
+        # Optima with an undefined logp come last
+        logps[np.isnan(logps)] = -np.inf
+        optima = [optima[i] for i in np.argsort(-logps, kind="stable")]
 
+    vars = get_default_varnames(model.unobserved_RVs, include_transformed)
+    point_func = model.fastfn(vars)
+    points = [
+        {var.name: value for var, value in zip(vars, point_func(bij.rmap(mx0)))}
+        for mx0, _ in optima
+    ]
+    opt_results = [opt_result for _, opt_result in optima]
+
+    if starts is None:
+        if return_raw:
+            return points[0], opt_results[0]
+        return points[0]
+    if return_raw:
+        return points[0], points, opt_results
+    return points[0], points
+
+
+def _logp_functions(model, vars, start, bij):
+    """Compile the logp of the model without jacobian terms as a function of an array.
+
+    Returns a function for the logp, and a function that computes the logp and its
+    gradient in a single call, or None if the gradient is not available.
+    """
+    if not typefilter(vars, discrete_types):
+        names = {var.name for var in vars}
+        extra_vars = [var for var in model.free_RVs if var.name not in names]
+        try:
+            logp_dlogp_func = ValueGradFunction([model.logp_nojact], vars, extra_vars)
+        except (AttributeError, NotImplementedError, tg.NullTypeGradError):
+            pass
+        else:
+            logp_dlogp_func.set_extra_values(start)
+            return None, logp_dlogp_func
+    return bij.mapf(model.fastlogp_nojac), None
+
+
+def _logp(logp_func, logp_dlogp_func, x):
+    if logp_dlogp_func is not None:
+        return logp_dlogp_func(pm.floatX(x))[0]
+    return logp_func(pm.floatX(x))
+
+
+def _minimize(cost_func, x0, method, args, kwargs):
+    """Minimize ``cost_func`` from ``x0``, stopping early after ``maxeval`` evaluations."""
     try:
-        opt_result = minimize(cost_func, x0, method=method, jac=compute_gradient, *args, **kwargs)
+        opt_result = minimize(
+            cost_func, x0, method=method, jac=cost_func.use_gradient, *args, **kwargs
+        )
         mx0 = opt_result["x"]  # r -> opt_result
     except (KeyboardInterrupt, StopIteration) as e:
         mx0, opt_result = cost_func.previous_x, None
@@ -140,19 +242,64 @@ def find_MAP(
             pm._log.info(e)
     finally:
         last_v = cost_func.n_eval
-        if progressbar:
+        if cost_func.progressbar:
             assert isinstance(cost_func.progress, ProgressBar)
             cost_func.progress.total = last_v
             cost_func.progress.update(last_v)
             print()
-
-    vars = get_default_varnames(model.unobserved_RVs, include_transformed)
-    mx = {var.name: value for var, value in zip(vars, model.fastfn(vars)(bij.rmap(mx0)))}
-
-    if return_raw:
-        return mx, opt_result
-    else:
-        return mx
+    if mx0 is None:
+        mx0 = x0
+    return mx0, opt_result
+
+
+def _starting_points(starts, x0, bij, model, random_seed):
+    """Return the arrays of the starting points of a multi-start optimization."""
+    if isinstance(starts, int):
+        if starts < 1:
+            raise ValueError("starts must be positive, not %s" % starts)
+        jitter = np.random.RandomState(random_seed).uniform(-1, 1, (starts - 1, len(x0)))
+        for varmap in bij.ordering.vmap:
+            if varmap.dtyp not in continuous_types:
+                jitter[:, varmap.slc] = 0
+        return [x0] + list(x0 + jitter)
+    x0s = []
+    for point in starts:
+        point = copy.deepcopy(point)
+        update_start_vals(point, model.test_point, model)
+        check_start_vals(point, model)
+        x0s.append(bij.map(Point(point, model=model)))
+    if not x0s:
+        raise ValueError("starts must contain at least one starting point.")
+    return x0s
+
+
+# The compiled functions of the processes that run multi-start optimizations
+_map_worker = {}
+
+
+def _init_map_worker(model, var_names, start, method, maxeval, args, kwargs):
+    vars = [model[name] for name in var_names]
+    bij = DictToArrayBijection(ArrayOrdering(vars), start)
+    logp_func, logp_dlogp_func = _logp_functions(model, vars, start, bij)
+    _map_worker.update(
+        logp_func=logp_func,
+        logp_dlogp_func=logp_dlogp_func,
+        method=method,
+        maxeval=maxeval,
+        args=args,
+        kwargs=kwargs,
+    )
+
+
+def _run_map(x0):
+    cost_func = CostFuncWrapper(
+        _map_worker["maxeval"],
+        False,
+        _map_worker["logp_func"],
+        logp_dlogp_func=_map_worker["logp_dlogp_func"],
+    )
+    method, args, kwargs = _map_worker["method"], _map_worker["args"], _map_worker["kwargs"]
+    return _minimize(cost_func, x0, method, args, kwargs)
 
 
 def allfinite(x):
@@ -171,11 +318,14 @@ def allinmodel(vars, model):
 
 
 class CostFuncWrapper:
-    def __init__(self, maxeval=5000, progressbar=True, logp_func=None, dlogp_func=None):
+    def __init__(
+        self, maxeval=5000, progressbar=True, logp_func=None, dlogp_func=None, logp_dlogp_func=None
+    ):
         self.n_eval = 0
         self.maxeval = maxeval
         self.logp_func = logp_func
-        if dlogp_func is None:
+        self.logp_dlogp_func = logp_dlogp_func
+        if dlogp_func is None and logp_dlogp_func is None:
             self.use_gradient = False
             self.desc = "logp = {:,.5g}"
         else:
@@ -191,10 +341,16 @@ class CostFuncWrapper:
             self.progress = range(maxeval)
 
     def __call__(self, x):
-        neg_value = np.float64(self.logp_func(pm.floatX(x)))
+        if self.logp_dlogp_func is not None:
+            # The logp and its gradient share one evaluation of the graph
+            neg_value, neg_grad = self.logp_dlogp_func(pm.floatX(x))
+            neg_value = np.float64(neg_value)
+        else:
+            neg_value = np.float64(self.logp_func(pm.floatX(x)))
+            if self.use_gradient:
+                neg_grad = self.dlogp_func(pm.floatX(x))
         value = -1.0 * nan_to_high(neg_value)
         if self.use_gradient:
-            neg_grad = self.dlogp_func(pm.floatX(x))
             if np.all(np.isfinite(neg_grad)):
                 self.previous_x = x
             grad = nan_to_num(-1.0 * neg_grad)
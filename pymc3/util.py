@@ -14,18 +14,21 @@
 
 import functools
 import re
+import sys
 import warnings
 
-from typing import Dict, List, Tuple, Union
+from typing import TYPE_CHECKING, Dict, List, Tuple, Union
 
-import arviz
 import numpy as np
-import xarray
 
 from theano.tensor import TensorVariable
 
 from pymc3.exceptions import SamplingError
 
+if TYPE_CHECKING:
+    import arviz
+    import xarray
+
 LATEX_ESCAPE_RE = re.compile(r"(%|_|\$|#|&)", re.MULTILINE)
 
 
@@ -265,7 +268,7 @@ def biwrap(wrapper):
 
 # FIXME: this function is poorly named, because it returns a LIST of
 # points, not a dictionary of points.
-def dataset_to_point_dict(ds: xarray.Dataset) -> List[Dict[str, np.ndarray]]:
+def dataset_to_point_dict(ds: "xarray.Dataset") -> List[Dict[str, np.ndarray]]:
     warnings.warn(
         "dataset_to_point_dict was renamed to dataset_to_point_list and will be removed!",
         DeprecationWarning,
@@ -273,7 +276,7 @@ def dataset_to_point_dict(ds: xarray.Dataset) -> List[Dict[str, np.ndarray]]:
     return dataset_to_point_list(ds)
 
 
-def dataset_to_point_list(ds: xarray.Dataset) -> List[Dict[str, np.ndarray]]:
+def dataset_to_point_list(ds: "xarray.Dataset") -> List[Dict[str, np.ndarray]]:
     # grab posterior samples for each variable
     _samples: Dict[str, np.ndarray] = {vn: ds[vn].values for vn in ds.keys()}
     # make dicts
@@ -287,12 +290,28 @@ def dataset_to_point_list(ds: xarray.Dataset) -> List[Dict[str, np.ndarray]]:
     return points
 
 
-def chains_and_samples(data: Union[xarray.Dataset, arviz.InferenceData]) -> Tuple[int, int]:
+def is_inference_data(obj) -> bool:
+    """Whether ``obj`` is an ``arviz.InferenceData``.
+
+    ArviZ is only consulted if it has already been imported: no ``InferenceData``
+    can exist otherwise, and importing it just to answer ``False`` is slow.
+    """
+    arviz = sys.modules.get("arviz")
+    return arviz is not None and isinstance(obj, arviz.InferenceData)
+
+
+def is_dataset(obj) -> bool:
+    """Whether ``obj`` is an ``xarray.Dataset``, without importing xarray."""
+    xarray = sys.modules.get("xarray")
+    return xarray is not None and isinstance(obj, xarray.Dataset)
+
+
+def chains_and_samples(data: Union["xarray.Dataset", "arviz.InferenceData"]) -> Tuple[int, int]:
     """Extract and return number of chains and samples in xarray or arviz traces."""
-    dataset: xarray.Dataset
-    if isinstance(data, xarray.Dataset):
+    dataset: "xarray.Dataset"
+    if is_dataset(data):
         dataset = data
-    elif isinstance(data, arviz.InferenceData):
+    elif is_inference_data(data):
         dataset = data.posterior
     else:
         raise ValueError(
@@ -90,7 +90,7 @@ class Stein(WithMemoization):
             )
         return sized_symbolic_logp / self.approx.symbolic_normalizing_constant
 
-    @memoize
+    @memoize(weak=True)
     @theano.config.change_flags(compute_test_value="off")
     def _kernel(self):
         return self._kernel_f(self.input_joint_matrix)